@@ -1,10 +1,28 @@
 import time
 import os
+import sys
 import csv
 import random
 import argparse
 import heapq
-from multiprocessing import Pool, cpu_count
+import math
+import signal
+import queue
+import threading
+import cProfile
+import json
+import hashlib
+import pickle
+import functools
+from bisect import bisect_right
+from collections import OrderedDict, deque
+from itertools import accumulate
+from multiprocessing import Pool, cpu_count, shared_memory
+
+try:
+    import numpy as np   # 선택 의존성 — 배치 엔진(run_leveling_batch) 전용
+except ImportError:
+    np = None
 
 # =========================================================
 #  데이터 디렉터리
@@ -26,7 +44,7 @@ def _load_level_exp_table(version: str = "v1") -> dict:
     return table
 
 
-def _available_exp_versions() -> list:
+def _load_exp_versions() -> list:
     """level_exp.csv 에서 사용 가능한 EXP 버전 열 이름 목록 반환 (레벨 열 제외)."""
     with open(os.path.join(DATA_DIR, "level_exp.csv"), encoding="utf-8") as f:
         reader = csv.DictReader(f)
@@ -119,22 +137,24 @@ def _load_enhance_table() -> dict:
 
 
 def _run_enhance(enhance_table: dict, weapon_tier: int, stop_atk: int,
-                 start_level: int = 0) -> tuple:
+                 start_level: int = 0, rand=random.random) -> tuple:
     """무기 1개를 start_level 부터 이어서 강화 시도.
     - 강화 성공 후 ATK > stop_atk 이면 즉시 중단 → 장착 권장
     - 강화 실패 → 즉시 파괴
     - 최대 강화 도달(파괴 없음) → 폐기 (더 약하거나 동급)
+    rand: [0, 1) 균등 난수 함수 (기본: 전역 random.random).
     반환: (final_level, equipped, destroyed)
     """
     max_enhance = max(enhance_table.keys()) if enhance_table else 9
+    atk_row = TABLES.get("weapon_atk").get(weapon_tier) or (0,) * (max_enhance + 1)
     level = start_level
     for next_level in range(start_level + 1, max_enhance + 1):
         rate = enhance_table.get(next_level, 0.0)
         if rate == 0:
             break
-        if random.random() < rate:
+        if rand() < rate:
             level = next_level
-            if calc_weapon_atk(weapon_tier, level) > stop_atk:
+            if atk_row[level] > stop_atk:
                 return level, True, False   # 장착
         else:
             return level, False, True       # 파괴
@@ -190,34 +210,401 @@ def _load_weapon_drop_table() -> dict:
     return table
 
 
-# 모듈 임포트 시 CSV 읽기
-LEVEL_EXP_TABLE      = _load_level_exp_table("v1")  # 기본값 (Character 생성 시 fallback)
-MONSTER_TEMPLATES    = _load_monster_templates("v1")  # 기본값 (Monster 생성 시 fallback)
-DIFFICULTY_TABLE     = _load_difficulty_table()
-CHARACTER_TIER_TABLE = _load_character_tier_table()
-POTION_TABLE         = _load_potion_table()
-FOOD_TABLE           = _load_food_table()
-WEAPON_DROP_TABLE         = _load_weapon_drop_table()
-ENHANCE_TABLE             = _load_enhance_table()
-WEAPON_STAT_TABLE         = _load_weapon_stat_table()
-WEAPON_ENHANCE_STAT_TABLE = _load_weapon_enhance_stat_table()
-
-
 def calc_weapon_atk(tier: int, enhance: int) -> int:
     """티어 + 강화 단계로 무기 공격력 계산."""
-    base   = WEAPON_STAT_TABLE.get(tier, 0)
-    bonus  = WEAPON_ENHANCE_STAT_TABLE.get(tier, 0) * enhance
+    base   = TABLES.get("weapon_stat").get(tier, 0)
+    bonus  = TABLES.get("weapon_enhance_stat").get(tier, 0) * enhance
     return base + bonus
 
+
+# =========================================================
+#  강화 결과 분포 (사전 계산 + 균등 난수 1회 추출)
+# =========================================================
+class EnhanceDistTable:
+    """
+    _run_enhance 의 결과 분포를 (weapon_tier, start_level, stop_atk) 별로 계산·캐시.
+    강화 단계마다 random() 을 부르는 대신, 결과 (final_level, equipped, destroyed) 의
+    범주형 분포(누적 확률)를 한 번 만들어 두고 균등 난수 1회 + 이진 탐색으로 추출.
+    분포는 _run_enhance 와 동일 (난수 소비 순서는 다르므로 같은 시드의 개별 결과는 달라짐).
+    """
+
+    def __init__(self, enhance_table: dict):
+        self.enhance_table = enhance_table
+        self.max_enhance   = max(enhance_table.keys()) if enhance_table else 9
+        self.weapon_atk    = TABLES.get("weapon_atk")
+        self._dists        = {}   # (tier, start_level, stop_atk) -> (누적 확률 목록, 결과 목록)
+
+    def __len__(self) -> int:
+        return len(self._dists)
+
+    def distribution(self, weapon_tier: int, stop_atk: int, start_level: int = 0) -> tuple:
+        """반환: (누적 확률 목록, [(final_level, equipped, destroyed), ...]) — 캐시됨."""
+        key  = (weapon_tier, start_level, stop_atk)
+        dist = self._dists.get(key)
+        if dist is None:
+            dist = self._dists[key] = self._build(weapon_tier, stop_atk, start_level)
+        return dist
+
+    def _build(self, weapon_tier: int, stop_atk: int, start_level: int) -> tuple:
+        """_run_enhance 의 분기를 그대로 따라가며 각 종료 결과의 확률을 누적."""
+        cum, outcomes = [], []
+        reach = 1.0     # 현재 단계까지 파괴 없이 도달할 확률
+        acc   = 0.0
+        level = start_level
+        atk   = self.weapon_atk.get(weapon_tier) or (0,) * (self.max_enhance + 1)
+        for next_level in range(start_level + 1, self.max_enhance + 1):
+            rate = self.enhance_table.get(next_level, 0.0)
+            if rate == 0:
+                break
+            if rate < 1.0:
+                acc += reach * (1.0 - rate)
+                cum.append(acc)
+                outcomes.append((level, False, True))       # 파괴
+            reach *= rate
+            level  = next_level
+            if atk[level] > stop_atk:
+                cum.append(1.0)
+                outcomes.append((level, True, False))       # 장착
+                return cum, outcomes
+        cum.append(1.0)
+        outcomes.append((level, False, False))              # 최대 강화 달성 → 폐기
+        return cum, outcomes
+
+    def sample(self, weapon_tier: int, stop_atk: int, start_level: int = 0,
+               rand=random.random) -> tuple:
+        """_run_enhance 와 같은 분포에서 1회 추출. 반환: (final_level, equipped, destroyed)"""
+        cum, outcomes = self.distribution(weapon_tier, stop_atk, start_level)
+        i = bisect_right(cum, rand())
+        return outcomes[i] if i < len(outcomes) else outcomes[-1]
+
+
+# =========================================================
+#  무기 드랍 샘플러 (기하 간격 + Walker alias 테이블)
+# =========================================================
+class WeaponDropSampler:
+    """
+    사냥터 티어 1개의 무기 드랍 샘플러 — 로드 시 1회 생성.
+    - gap()   : 다음 드랍까지 건너뛸 '드랍 없는 처치 수' (기하분포, 난수 1회)
+    - choose(): 드랍된 무기 종류 인덱스 (Walker alias 테이블, 난수 1회)
+    처치마다 드랍 판정을 하는 것과 분포가 같지만, 드랍률이 낮을수록 난수 호출이 크게 줄어듦.
+    """
+
+    def __init__(self, weights: list):
+        self.total = sum(weights)                        # 처치 1회당 드랍 확률
+        self._log_miss = math.log1p(-self.total) if self.total < 1.0 else None
+        n = len(weights)
+        # ── Vose alias 테이블 구성 ─────────────────────────
+        scaled = [w / self.total * n for w in weights]
+        self._prob  = [1.0] * n
+        self._alias = list(range(n))
+        small = [i for i, v in enumerate(scaled) if v < 1.0]
+        large = [i for i, v in enumerate(scaled) if v >= 1.0]
+        while small and large:
+            s, l = small.pop(), large.pop()
+            self._prob[s]  = scaled[s]
+            self._alias[s] = l
+            scaled[l] -= 1.0 - scaled[s]
+            (small if scaled[l] < 1.0 else large).append(l)
+        # 남은 항목(부동소수 오차 포함)은 확률 1.0 유지
+
+    def gap(self, rand=random.random) -> int:
+        """다음 드랍 전까지의 드랍 없는 처치 수 (0 = 다음 처치에서 드랍)."""
+        if self._log_miss is None:
+            return 0
+        return int(math.log(1.0 - rand()) / self._log_miss)
+
+    def choose(self, rand=random.random) -> int:
+        """드랍 무기 종류 인덱스 (WEAPON_NAMES 순서)."""
+        u = rand() * len(self._prob)
+        i = int(u)
+        return i if u - i < self._prob[i] else self._alias[i]
+
+
+# =========================================================
+#  참조 드랍·강화 (검증용 — 기존 구현의 처치별 random() 판정 + _run_enhance)
+# =========================================================
+class ReferenceDropSampler:
+    """
+    WeaponDropSampler 와 같은 인터페이스의 참조 구현 (_run_leveling(reference=True), --validate 용).
+    - gap()   : 처치마다 rand() < 총 드랍 확률 판정을 드랍이 나올 때까지 반복 (처치 1회당 난수 1회)
+    - choose(): random.choices(WEAPON_NAMES, weights) 와 같은 누적 가중치 + 난수 1회 선택
+    기하 간격·alias 테이블을 거치지 않으므로 고속 샘플러의 분포 검정 기준으로 사용.
+    """
+
+    def __init__(self, weights: list):
+        self.total = sum(weights)
+        self._cum  = list(accumulate(weights))
+
+    def gap(self, rand=random.random) -> int:
+        """다음 드랍 전까지의 드랍 없는 처치 수 — 처치별 판정을 그대로 반복."""
+        n = 0
+        while rand() >= self.total:
+            n += 1
+        return n
+
+    def choose(self, rand=random.random) -> int:
+        """드랍 무기 종류 인덱스 (WEAPON_NAMES 순서)."""
+        return min(bisect_right(self._cum, rand() * self._cum[-1]), len(self._cum) - 1)
+
+
+class ReferenceEnhance:
+    """EnhanceDistTable 과 같은 sample() 인터페이스로 _run_enhance 를 직접 호출 (강화 단계마다 난수 1회)."""
+
+    def __init__(self, enhance_table: dict):
+        self.enhance_table = enhance_table
+
+    def sample(self, weapon_tier: int, stop_atk: int, start_level: int = 0,
+               rand=random.random) -> tuple:
+        return _run_enhance(self.enhance_table, weapon_tier, stop_atk, start_level, rand)
+
+
+def _build_weapon_atk_table() -> dict:
+    """calc_weapon_atk 를 미리 계산한 표. 반환: {tier: (강화 0 ATK, 강화 1 ATK, ..., 최대 강화 ATK)}"""
+    max_enhance = max(TABLES.get("enhance").keys(), default=9)
+    tiers = TABLES.get("weapon_stat").keys() | TABLES.get("weapon_enhance_stat").keys()
+    return {t: tuple(calc_weapon_atk(t, e) for e in range(max_enhance + 1)) for t in tiers}
+
+
+def _build_drop_samplers() -> dict:
+    """무기 드랍 테이블에서 티어별 WeaponDropSampler 생성 (드랍률 0 인 티어 제외)."""
+    return {t: WeaponDropSampler(wt["weights"])
+            for t, wt in TABLES.get("weapon_drop").items() if wt["total"] > 0}
+
+
+# =========================================================
+#  테이블 레지스트리 (지연 로딩 + (파일, 버전, mtime) 메모이즈)
+# =========================================================
+class TableRegistry:
+    """
+    CSV 테이블을 처음 접근할 때 읽고 (파일, 이름, 버전, mtime) 키로 메모이즈.
+    - get()       : 한 번 확인한 (이름, 버전) 은 파일 검사 없이 바로 반환 (핫 경로용)
+    - revalidate(): 파일 mtime 을 다시 확인하도록 표시. CSV 가 바뀌었으면 다음 get() 에서
+                    새로 읽고 generation 을 1 올림 (그대로면 메모 재사용).
+    - fresh       : simulate_* 진입점 데코레이터 — 호출마다 revalidate() 후 실행하므로
+                    실행 중간에는 테이블이 바뀌지 않고, 실행 사이의 CSV 수정은 반영됨.
+    - generation  : 테이블 세대 번호 — 테이블에서 파생된 값을 보관하는 캐시(FightCache,
+                    MonsterGroup 등)는 이 값이 바뀌면 비움.
+    - snapshot() / preload(): 부모가 읽은 테이블을 Pool 워커에 넘겨 재파싱 방지.
+    specs: {이름: (파일 또는 파일 튜플, 로더, 버전 인자 여부)}
+    """
+
+    def __init__(self, specs: dict):
+        self._specs = specs
+        self._memo  = {}   # (파일, 이름, 버전, mtime) -> 테이블
+        self._hot   = {}   # (이름, 버전) -> 테이블
+        self.generation = 0
+
+    def get(self, name: str, version: str = None):
+        try:
+            return self._hot[(name, version)]
+        except KeyError:
+            pass
+        files, loader, versioned = self._specs[name]
+        key   = (files, name, version, self._mtime(files))
+        table = self._memo.get(key)
+        if table is None:
+            table = self._memo[key] = loader(version) if versioned else loader()
+        self._hot[(name, version)] = table
+        return table
+
+    @staticmethod
+    def _mtime(files) -> tuple:
+        if isinstance(files, str):
+            files = (files,)
+        return tuple(os.stat(os.path.join(DATA_DIR, f)).st_mtime_ns for f in files)
+
+    def revalidate(self):
+        """다음 get() 부터 mtime 을 다시 확인. 오래된 메모 항목은 정리."""
+        self._hot.clear()
+        memo = {k: v for k, v in self._memo.items() if self._mtime(k[0]) == k[3]}
+        if len(memo) != len(self._memo):
+            self.generation += 1
+        self._memo = memo
+
+    def fresh(self, fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            self.revalidate()
+            return fn(*args, **kwargs)
+        return wrapper
+
+    def warm(self, *names: str, version: str = None):
+        """지정 테이블을 미리 로드 (워커에 snapshot 으로 넘기기 전 호출)."""
+        for name in names:
+            self.get(name, version if self._specs[name][2] else None)
+
+    def snapshot(self) -> dict:
+        return dict(self._memo)
+
+    def preload(self, snapshot: dict):
+        self._memo.update(snapshot)
+
+    def loaded(self) -> list:
+        """현재 메모된 (이름, 버전) 목록."""
+        return sorted((k[1], k[2] or "") for k in self._memo)
+
+
+_WEAPON_ATK_FILES = ("weapon_enhance.csv", "weapon_stat.csv", "weapon_enhance_stat.csv")
+TABLES = TableRegistry({
+    "exp_versions":        ("level_exp.csv",           _load_exp_versions,               False),
+    "level_exp":           ("level_exp.csv",           _load_level_exp_table,            True),
+    "monster_templates":   ("monster_tier.csv",        _load_monster_templates,          True),
+    "difficulty":          ("monster_difficulty.csv",  _load_difficulty_table,           False),
+    "character_tier":      ("character_tier.csv",      _load_character_tier_table,       False),
+    "potion":              ("potion.csv",              _load_potion_table,               False),
+    "food":                ("food.csv",                _load_food_table,                 False),
+    "weapon_drop":         ("weapon_drop.csv",         _load_weapon_drop_table,          False),
+    "enhance":             ("weapon_enhance.csv",      _load_enhance_table,              False),
+    "weapon_stat":         ("weapon_stat.csv",         _load_weapon_stat_table,          False),
+    "weapon_enhance_stat": ("weapon_enhance_stat.csv", _load_weapon_enhance_stat_table,  False),
+    # 파생 테이블 — 원본 CSV 가 바뀌면 함께 다시 생성
+    "enhance_dist":        (_WEAPON_ATK_FILES, lambda: EnhanceDistTable(TABLES.get("enhance")), False),
+    "weapon_atk":          (_WEAPON_ATK_FILES,         _build_weapon_atk_table,          False),
+    "drop_samplers":       ("weapon_drop.csv",         _build_drop_samplers,             False),
+})
+
+# 레벨업 루프(_run_leveling / run_leveling_batch)가 쓰는 테이블 — Pool 워커로 넘길 대상
+_LEVELING_TABLES = ("level_exp", "monster_templates", "difficulty", "character_tier", "potion",
+                    "food", "weapon_stat", "weapon_enhance_stat", "enhance_dist", "drop_samplers")
+
+# 예전 모듈 전역 이름 → 레지스트리 (외부 코드 호환, 접근 시 로드)
+_LAZY_GLOBALS = {
+    "LEVEL_EXP_TABLE":           ("level_exp", "v1"),
+    "MONSTER_TEMPLATES":         ("monster_templates", "v1"),
+    "DIFFICULTY_TABLE":          ("difficulty", None),
+    "CHARACTER_TIER_TABLE":      ("character_tier", None),
+    "POTION_TABLE":              ("potion", None),
+    "FOOD_TABLE":                ("food", None),
+    "WEAPON_DROP_TABLE":         ("weapon_drop", None),
+    "ENHANCE_TABLE":             ("enhance", None),
+    "WEAPON_STAT_TABLE":         ("weapon_stat", None),
+    "WEAPON_ENHANCE_STAT_TABLE": ("weapon_enhance_stat", None),
+    "ENHANCE_DIST":              ("enhance_dist", None),
+    "WEAPON_DROP_SAMPLERS":      ("drop_samplers", None),
+}
+
+
+def __getattr__(name: str):
+    if name in _LAZY_GLOBALS:
+        return TABLES.get(*_LAZY_GLOBALS[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _available_exp_versions() -> list:
+    """level_exp.csv 에서 사용 가능한 EXP 버전 열 이름 목록 반환 (레벨 열 제외)."""
+    return TABLES.get("exp_versions")
+
+
+def _monster_templates_for(exp_version: str) -> dict:
+    """exp_version 의 몬스터 템플릿. 해당 버전 경험치 열이 비어 있으면 v1 템플릿."""
+    return TABLES.get("monster_templates", exp_version) or TABLES.get("monster_templates", "v1")
+
 # ── 소비 아이템 설정 ──────────────────────────────────────
 POTION_COOLDOWN     = 60.0   # 포션 쿨타임 (초) — 전투 중 사용
 FOOD_COOLDOWN       = 20.0   # 음식 쿨타임 (초) — 전투 외 사용
+ABSORPTION_TIME     = 8.0    # 전투 후 음식 흡수 대기 (초) — 전투 사이 기본 휴식 시간
 POTION_HP_THRESHOLD = 0.5    # HP 50% 미만일 때 포션 자동 사용
 
 # ── 무기 강화 설정 ────────────────────────────────────────
 # 고정 목표 없음 — 현재 장착 무기 공격력을 초과하는 순간 강화 중단 후 장착
 
 
+# =========================================================
+#  결과 캐시 (디스크, 내용 주소 기반) — data/ 해시 + 실행 조건 → 결과
+# =========================================================
+ENGINE_VERSION = 3   # 시뮬레이션 규칙이 바뀌어 결과가 달라지는 변경 시 올림 (기존 캐시 무효화)
+                     # 2: Monte Carlo 런별 독립 난수 스트림(_run_stream), PvP 연속 시각 이벤트 루프
+                     # 3: _run_stream 을 numpy 유무와 무관한 단일 방식으로 통일
+RNG_STREAM_VERSION = 1   # _run_stream 난수열 생성 방식 — 바뀌면 올림 (같은 --seed 가 다른 런이 됨)
+_CACHE_DEFAULT_DIR = ".sim-cache"
+
+
+class ResultCache:
+    """
+    시드가 고정된 결과를 디스크에 저장하는 캐시. 키는 ENGINE_VERSION, RNG_STREAM_VERSION(난수열
+    방식), data/ 의 모든 파일 내용 해시(SHA-256), 결과 종류와 실행 조건(목표 레벨·난이도·EXP 버전·
+    시드 범위 등)의 SHA-256.
+    CSV 를 한 글자만 바꿔도 키가 달라지므로 무효화가 따로 필요 없음 (디렉터리는 지워도 무방).
+
+    root/<종류>/<키>.pkl          : 단일 결과 (레벨업 1회, 비교 표 1칸)
+    root/mc/<키>/<런 수>.pkl      : Monte Carlo 런 1..n 의 집계 — 더 큰 n 요청 시 가장 긴
+                                    접두 구간을 재사용하고 나머지 런만 실행해 병합
+    값은 pickle (임시 파일 + os.replace 로 원자적 저장).
+    """
+    def __init__(self, root: str = _CACHE_DEFAULT_DIR):
+        self.root  = root
+        self.hits  = 0
+        self._data_sig  = None
+        self._data_hash = None
+
+    def data_hash(self) -> str:
+        """data/ 전체 파일 내용 해시 — (이름, 크기, mtime) 이 그대로면 재계산하지 않음."""
+        names = sorted(os.listdir(DATA_DIR))
+        sig   = tuple((nm, os.stat(os.path.join(DATA_DIR, nm)).st_size,
+                       os.stat(os.path.join(DATA_DIR, nm)).st_mtime_ns) for nm in names)
+        if sig != self._data_sig:
+            h = hashlib.sha256()
+            for nm in names:
+                path = os.path.join(DATA_DIR, nm)
+                if os.path.isfile(path):
+                    h.update(nm.encode("utf-8") + b"\0")
+                    with open(path, "rb") as f:
+                        h.update(f.read())
+                    h.update(b"\0")
+            self._data_sig, self._data_hash = sig, h.hexdigest()
+        return self._data_hash
+
+    def key(self, kind: str, **params) -> str:
+        text = repr((ENGINE_VERSION, RNG_STREAM_VERSION, self.data_hash(), kind,
+                     sorted(params.items())))
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()[:32]
+
+    def _load(self, path: str):
+        try:
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            return None
+
+    def _store(self, path: str, value):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+    def get(self, kind: str, key: str):
+        value = self._load(os.path.join(self.root, kind, f"{key}.pkl"))
+        if value is not None:
+            self.hits += 1
+        return value
+
+    def put(self, kind: str, key: str, value):
+        self._store(os.path.join(self.root, kind, f"{key}.pkl"), value)
+
+    def mc_lookup(self, key: str, n: int, sample_size: int = 0, exact: bool = False) -> tuple:
+        """런 1..m (m ≤ n) 집계 중 가장 긴 것. 표본이 sample_size 보다 적게 저장된 항목은 제외.
+        exact: True 이면 m == n 만 (배치 엔진 — 결과가 작업 분할에 의존해 접두 구간 재사용 불가).
+        반환: (m, MonteCarloSummary) / 없으면 (0, None)"""
+        folder = os.path.join(self.root, "mc", key)
+        try:
+            sizes = sorted((int(nm[:-4]) for nm in os.listdir(folder) if nm.endswith(".pkl")),
+                           reverse=True)
+        except OSError:
+            return 0, None
+        for m in sizes:
+            if m > n or (exact and m != n):
+                continue
+            state = self._load(os.path.join(folder, f"{m}.pkl"))
+            if state is not None and state["sample_size"] >= sample_size:
+                self.hits += 1
+                return m, _mc_summary_from_state(state)
+        return 0, None
+
+    def mc_store(self, key: str, n: int, summary: "MonteCarloSummary"):
+        self._store(os.path.join(self.root, "mc", key, f"{n}.pkl"), _mc_summary_state(summary))
+
+
 # =========================================================
 #  데미지 계산 공식
 # =========================================================
@@ -233,8 +620,30 @@ def calc_damage(raw_atk: float, target_def: float) -> float:
 # =========================================================
 #  스킬
 # =========================================================
+# 스킬 정의 — 고정 인덱스 0=Q, 1=W, 2=E, 3=R (전투 중 사용 우선순위도 이 순서)
+# (키, 설명, 배율, 시전 시간, 쿨타임, 마나 소모, 광역 여부)
+SKILL_SPECS = (
+    ("Q", "강력한 일격", 2.0, 1.0,  5.0, 10, False),
+    ("W", "연속 베기",   2.5, 1.0, 12.0, 30, True),
+    ("E", "방어 강화",   1.5, 1.0, 15.0, 15, False),
+    ("R", "궁극기",      4.0, 1.0, 40.0, 50, True),
+)
+# 고정 인덱스 배열 — 전투 루프(_fight / _fight_analytic / PvP / 배치 엔진)가 이 값으로 로테이션 판정.
+# Skill 객체에는 인덱스별 마지막 사용 시각(last_used_time)과 출력용 이름·설명만 필요.
+SKILL_KEYS        = tuple(sp[0] for sp in SKILL_SPECS)
+SKILL_MULTIPLIERS = tuple(sp[2] for sp in SKILL_SPECS)
+SKILL_CAST_TIMES  = tuple(sp[3] for sp in SKILL_SPECS)
+SKILL_COOLDOWNS   = tuple(sp[4] for sp in SKILL_SPECS)
+SKILL_MANA_COSTS  = tuple(sp[5] for sp in SKILL_SPECS)
+SKILL_AOE         = tuple(sp[6] for sp in SKILL_SPECS)
+SKILL_COUNT       = len(SKILL_SPECS)
+
+
 class Skill:
     """스킬 정보"""
+    __slots__ = ("name", "description", "multiplier", "cast_time", "cooldown", "mana_cost",
+                 "is_aoe", "last_used_time")
+
     def __init__(self, name, description, multiplier, cast_time, cooldown, mana_cost, is_aoe=False):
         self.name = name
         self.description = description
@@ -253,9 +662,18 @@ class Skill:
 #  플레이어 캐릭터
 # =========================================================
 class Character:
-    """플레이어 캐릭터"""
+    """플레이어 캐릭터
+    skills    : {키: Skill} — 이름으로 접근 (로그/PvP 출력용)
+    skill_list: 같은 Skill 객체를 SKILL_KEYS 순서로 담은 고정 인덱스 목록 (전투 루프용)
+    potion/food: 현재 레벨의 소비 아이템 행 ({"name", "heal"}) — 레벨이 바뀔 때만 다시 조회
+    """
+    __slots__ = ("exp_table", "level", "max_hp", "hp", "max_mp", "mp", "attack_speed",
+                 "critical_rate", "critical_damage", "exp", "total_exp", "defe",
+                 "weapon_type", "weapon_tier", "weapon_enhance", "atk", "skills", "skill_list",
+                 "last_basic_attack_time", "last_potion_time", "last_food_time", "potion", "food")
+
     def __init__(self, level: int = 1, exp_table: dict = None):
-        self.exp_table = exp_table if exp_table is not None else LEVEL_EXP_TABLE
+        self.exp_table = exp_table if exp_table is not None else TABLES.get("level_exp", "v1")
         self.level = level
         self.max_hp = 1400 + level * 100
         self.hp = float(self.max_hp)
@@ -266,19 +684,16 @@ class Character:
         self.critical_damage = 1.2
         self.exp = 0           # 현재 레벨 내 누적 EXP (레벨업 시 초과분만 이월)
         self.total_exp = 0     # 전체 누적 EXP (통계용)
-        _ct = min((level - 1) // 10 + 1, max(CHARACTER_TIER_TABLE.keys()))
-        self.defe = CHARACTER_TIER_TABLE[_ct]["defe"]
+        tier_table = TABLES.get("character_tier")
+        self.defe  = tier_table[min((level - 1) // 10 + 1, max(tier_table.keys()))]["defe"]
+        self._bind_consumables()
         # 무기 — 기본 장착: Tier1 양손검 +0
         self.weapon_type    = "양손검"
         self.weapon_tier    = 1
         self.weapon_enhance = 0
         self.atk = calc_weapon_atk(self.weapon_tier, self.weapon_enhance)
-        self.skills = {
-            "Q": Skill("Q", "강력한 일격", 2.0, 1.0,  5.0, 10),
-            "W": Skill("W", "연속 베기",   2.5, 1.0, 12.0, 30, is_aoe=True),
-            "E": Skill("E", "방어 강화",   1.5, 1.0, 15.0, 15),
-            "R": Skill("R", "궁극기",      4.0, 1.0, 40.0, 50, is_aoe=True),
-        }
+        self.skill_list = [Skill(*sp) for sp in SKILL_SPECS]
+        self.skills     = {sk.name: sk for sk in self.skill_list}
         self.last_basic_attack_time = -999.0
         self.last_potion_time = -POTION_COOLDOWN  # 시작 시 즉시 사용 가능
         self.last_food_time   = -FOOD_COOLDOWN    # 시작 시 즉시 사용 가능
@@ -286,7 +701,7 @@ class Character:
     def add_exp(self, amount: int) -> list:
         """
         EXP 추가 및 레벨업 자동 처리.
-        LEVEL_EXP_TABLE 은 '해당 레벨에서 다음 레벨까지 요구되는 EXP'.
+        exp_table 은 '해당 레벨에서 다음 레벨까지 요구되는 EXP'.
         레벨업 시 초과 EXP 이월, 달성한 새 레벨 번호 목록 반환.
         """
         self.total_exp += amount
@@ -300,15 +715,24 @@ class Character:
 
     def level_up(self):
         """레벨업: HP/MP 증가, 티어 전환 시 DEF를 CSV 기준값으로 교체. ATK는 무기 기반."""
-        old_tier = min((self.level - 1) // 10 + 1, max(CHARACTER_TIER_TABLE.keys()))
+        tier_table = TABLES.get("character_tier")
+        max_ct   = max(tier_table.keys())
+        old_tier = min((self.level - 1) // 10 + 1, max_ct)
         self.level  += 1
         self.max_hp += 100
         self.max_mp += 20
         self.hp = min(self.hp + 100, self.max_hp)
         self.mp = min(self.mp + 20,  self.max_mp)
-        new_tier = min((self.level - 1) // 10 + 1, max(CHARACTER_TIER_TABLE.keys()))
+        new_tier = min((self.level - 1) // 10 + 1, max_ct)
         if new_tier != old_tier:
-            self.defe = CHARACTER_TIER_TABLE[new_tier]["defe"]
+            self.defe = tier_table[new_tier]["defe"]
+        self._bind_consumables()
+
+    def _bind_consumables(self):
+        """현재 레벨의 포션/음식 행을 묶어 둠 (전투·휴식 루프에서 테이블 조회 없이 사용)."""
+        ct = _consumable_tier(self.level)
+        self.potion = TABLES.get("potion")[ct]
+        self.food   = TABLES.get("food")[ct]
 
     def reset_for_next_fight(self):
         """전투 사이 휴식: MP 완전 회복.
@@ -321,14 +745,15 @@ class Character:
         self.mp = float(self.max_mp)
         self.last_basic_attack_time = -999.0
 
-    def use_skill(self, skill_name: str, current_time: float):
-        """스킬 사용. (cast_time, raw_damage, label) 반환"""
-        sk = self.skills[skill_name]
-        if self.mp >= sk.mana_cost:
-            self.mp -= sk.mana_cost
+    def use_skill(self, i: int, current_time: float):
+        """고정 인덱스 i(0=Q … 3=R) 스킬 사용. (cast_time, raw_damage, label) 반환"""
+        cost = SKILL_MANA_COSTS[i]
+        if self.mp >= cost:
+            sk = self.skill_list[i]
+            self.mp -= cost
             sk.last_used_time = current_time
-            raw = self.atk * sk.multiplier
-            return sk.cast_time, raw, f"[스킬 {sk.name}] {sk.description}"
+            return (SKILL_CAST_TIMES[i], self.atk * SKILL_MULTIPLIERS[i],
+                    f"[스킬 {sk.name}] {sk.description}")
         return 0.0, 0.0, ""
 
     def basic_attack(self, current_time: float):
@@ -342,10 +767,13 @@ class Character:
 # =========================================================
 class Monster:
     """몬스터 클래스 — 티어(CSV) + 난이도(CSV) 배율로 스탯 결정"""
+    __slots__ = ("index", "name", "tier", "difficulty", "atk", "defe", "max_hp", "hp",
+                 "attack_speed", "exp", "last_attack_time")
+
     def __init__(self, tier: int, index: int = 0, difficulty: str = "Normal",
                  templates: dict = None):
-        data = (templates or MONSTER_TEMPLATES)[tier]
-        diff = DIFFICULTY_TABLE[difficulty]
+        data = (templates or TABLES.get("monster_templates", "v1"))[tier]
+        diff = TABLES.get("difficulty")[difficulty]
         self.index        = index
         self.name         = data["name"]
         self.tier         = data["tier"]
@@ -377,6 +805,37 @@ class Monster:
         return "[" + "#" * filled + "-" * (width - filled) + "]"
 
 
+class MonsterGroup:
+    """
+    전투마다 Monster 를 새로 만들지 않고 재사용하는 몬스터 그룹 버퍼.
+    (티어, 난이도, 템플릿, 테이블 세대)가 같으면 기존 객체의 전투 상태(hp, 마지막 공격 시각)만 초기화.
+    반환된 목록은 다음 fill() 호출 전까지만 유효 (전투 1회용).
+    """
+    __slots__ = ("_key", "_templates", "_monsters")
+    SIZE = 3   # 한 그룹 최대 마리 수
+
+    def __init__(self):
+        self._key       = None
+        self._templates = None
+        self._monsters  = []
+
+    def fill(self, tier: int, count: int, difficulty: str = "Normal",
+             templates: dict = None) -> list:
+        templates = templates or TABLES.get("monster_templates", "v1")
+        key = (tier, difficulty, TABLES.generation)
+        if self._key != key or self._templates is not templates or len(self._monsters) < count:
+            self._key       = key
+            self._templates = templates
+            self._monsters  = [Monster(tier=tier, index=i, difficulty=difficulty,
+                                       templates=templates)
+                               for i in range(max(count, self.SIZE))]
+        else:
+            for m in self._monsters[:count]:
+                m.hp               = m.max_hp
+                m.last_attack_time = -999.0
+        return self._monsters[:count]
+
+
 # =========================================================
 #  헬퍼
 # =========================================================
@@ -386,6 +845,31 @@ def _hp_bar(current: float, maximum: float, width: int = 20) -> str:
     return "[" + "#" * filled + "-" * (width - filled) + "]"
 
 
+def _rest_after_fight(player: Character, now: float) -> float:
+    """
+    전투 사이 휴식 규칙 (레벨업 루프 · 정확 해석 · --log-fights 공용). now: 전투가 끝난 시각.
+    MP 회복 → 음식 쿨타임이 끝났으면 1차 섭취 → 흡수 대기(ABSORPTION_TIME),
+    HP 50% 이하면 음식 쿨타임만큼 더 대기한 뒤 2차 섭취. 반환: 휴식 시간(초)
+    """
+    player.reset_for_next_fight()
+
+    # ── 1차 음식 섭취 (전투 직후) ──────────────────────
+    if player.hp < player.max_hp and now - player.last_food_time >= FOOD_COOLDOWN:
+        player.hp = min(player.max_hp, player.hp + player.food["heal"])
+        player.last_food_time = now
+
+    rest = ABSORPTION_TIME
+
+    # ── HP 50% 이하 → 쿨타임(20초) 더 대기 후 2차 섭취 ──
+    if player.hp / player.max_hp <= 0.5:
+        rest += FOOD_COOLDOWN
+        eat_time = now + rest
+        if player.hp < player.max_hp and eat_time - player.last_food_time >= FOOD_COOLDOWN:
+            player.hp = min(player.max_hp, player.hp + player.food["heal"])
+            player.last_food_time = eat_time
+    return rest
+
+
 def _consumable_tier(level: int) -> int:
     """레벨에 따른 소비 아이템 등급 인덱스 반환 (0=하급, 1=중급, 2=상급, 3=최상급).
     Lv.1~10 → 0, Lv.11~25 → 1, Lv.26~40 → 2, Lv.41+ → 3
@@ -396,16 +880,178 @@ def _consumable_tier(level: int) -> int:
     return 3
 
 
+# =========================================================
+#  계측 / 프로파일링 (--profile)
+# =========================================================
+class Profiler:
+    """
+    핫 경로 계측 — 카운터와 단계별 시간(time.perf_counter, 단조 시계).
+    모듈 전역 PROFILER 에 설치했을 때만 동작하고, 꺼져 있으면 각 지점은
+    'PROFILER is None' 검사 1회만 수행 (전투 이벤트 루프 내부에는 계측 코드 없음).
+    counters: fights(전투 수), fight_cache_hits, analytic_fights, heap_fights,
+              fight_events(힙 이벤트 처리 수), heap_pushes, drops, enhance_samples(분포 추출),
+              enhance_attempts(환산 강화 시도 수), rng_draws(레벨업 루프의 균등 난수 수)
+    phases  : fight / drop(드랍·강화) / rest(경험치·음식·휴식) 누적 초
+    """
+    COUNTERS = ("fights", "fight_cache_hits", "analytic_fights", "heap_fights", "fight_events",
+                "heap_pushes", "drops", "enhance_samples", "enhance_attempts", "rng_draws")
+    PHASES   = ("fight", "drop", "rest")
+
+    def __init__(self):
+        self.counters = dict.fromkeys(self.COUNTERS, 0)
+        self.phases   = dict.fromkeys(self.PHASES, 0.0)
+        self.wall     = 0.0
+
+    def lap(self, phase: str, t0: float) -> float:
+        """t0 부터 지금까지를 phase 에 더하고 현재 시각을 반환 (다음 구간 시작)."""
+        now = time.perf_counter()
+        self.phases[phase] += now - t0
+        return now
+
+    def report(self, title: str = "계측 결과"):
+        c, W = self.counters, 60
+        wall = self.wall or sum(self.phases.values()) or 1e-12
+        print("=" * W)
+        print(f"  [{title}]  총 {wall:.3f}초")
+        print("-" * W)
+        print(f"  전투/초        : {c['fights'] / wall:>12,.0f}   (전투 {c['fights']:,}회)")
+        print(f"  힙 이벤트/초    : {c['fight_events'] / wall:>12,.0f}   (이벤트 {c['fight_events']:,}개)")
+        print(f"  전투 엔진      : 캐시 {c['fight_cache_hits']:,}  /  해석적 {c['analytic_fights']:,}"
+              f"  /  이벤트 힙 {c['heap_fights']:,}  (push {c['heap_pushes']:,})")
+        print(f"  드랍 / 강화     : 드랍 {c['drops']:,}  /  분포 추출 {c['enhance_samples']:,}"
+              f"  /  환산 시도 {c['enhance_attempts']:,}")
+        print(f"  난수 추출       : {c['rng_draws']:,}")
+        print("-" * W)
+        for ph in self.PHASES:
+            sec = self.phases[ph]
+            print(f"  {ph:<6} 단계     : {sec:>8.3f}초  ({sec / wall * 100:5.1f}%)")
+        print("=" * W)
+
+
+PROFILER = None   # 활성 Profiler (None = 계측 끔)
+
+
+class _StackSampler:
+    """
+    주 스레드 호출 스택을 일정 간격으로 샘플링해 folded-stack 형식(flamegraph.pl /
+    speedscope 입력)으로 저장하는 순수 Python 샘플러.
+    """
+
+    def __init__(self, interval: float = 0.001):
+        self.interval = interval
+        self.samples  = {}
+        self._target  = threading.main_thread().ident
+        self._stop    = threading.Event()
+        self._thread  = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                key = ";".join(reversed(stack))
+                self.samples[key] = self.samples.get(key, 0) + 1
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def dump(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, n in sorted(self.samples.items()):
+                f.write(f"{stack} {n}\n")
+
+
+def _profiled_call(func, profile_out: str = None, *args, **kwargs):
+    """
+    PROFILER 를 설치한 상태로 func(*args, **kwargs) 실행. 반환: (결과, Profiler)
+    profile_out: '.folded' 로 끝나면 스택 샘플러의 folded-stack 파일,
+                 그 외 경로면 cProfile 결과를 pstats 덤프로 저장.
+    """
+    global PROFILER
+    prof = PROFILER = Profiler()
+    t0 = time.perf_counter()
+    try:
+        if profile_out and profile_out.endswith(".folded"):
+            with _StackSampler() as sampler:
+                result = func(*args, **kwargs)
+            sampler.dump(profile_out)
+        elif profile_out:
+            cp = cProfile.Profile()
+            result = cp.runcall(func, *args, **kwargs)
+            cp.dump_stats(profile_out)
+        else:
+            result = func(*args, **kwargs)
+    finally:
+        prof.wall = time.perf_counter() - t0
+        PROFILER  = None
+    return result, prof
+
+
 # =========================================================
 #  내부 전투 코어 (출력 없음, 다중 호출용)
 # =========================================================
+def _ready_skill(player: Character, t: float) -> int:
+    """시각 t 에 쓸 수 있는 첫 스킬 인덱스 (Q→W→E→R 순, 쿨타임·MP 충족). 없으면 -1."""
+    for i, sk in enumerate(player.skill_list):
+        if t - sk.last_used_time >= SKILL_COOLDOWNS[i] and player.mp >= SKILL_MANA_COSTS[i]:
+            return i
+    return -1
+
+
+def _next_skill_time(player: Character) -> float:
+    """현재 MP 로 쓸 수 있는 스킬 중 가장 빠른 쿨타임 종료 시각 (없으면 inf)."""
+    return min((sk.last_used_time + SKILL_COOLDOWNS[i]
+                for i, sk in enumerate(player.skill_list)
+                if player.mp >= SKILL_MANA_COSTS[i]),
+               default=float("inf"))
+
+
+def _player_turn(player: Character, skill_t: float, basic_t: float) -> tuple:
+    """
+    플레이어 행동 1회 — 스킬 로테이션(_ready_skill), 불가 시 기본 공격.
+    skill_t: 스킬 쿨타임 기준 시각, basic_t: 기본 공격 기준 시각
+             (_fight 는 절대/전투 상대 시각을 따로 쓰고, PvP 는 같은 시각을 넘김).
+    반환: (스킬 인덱스 또는 -1, cast_time, raw_dmg, label). 행동 불가 시 raw_dmg = 0.
+    """
+    i = _ready_skill(player, skill_t)
+    if i >= 0:
+        return (i,) + player.use_skill(i, skill_t)
+    if basic_t - player.last_basic_attack_time >= 1.0 / player.attack_speed:
+        return (-1,) + player.basic_attack(basic_t)
+    return -1, 0.0, 0.0, ""
+
+
+def _drink_potion(player: Character, t: float) -> float:
+    """장착 포션 사용 (사용 조건은 호출 측에서 확인). 반환: 실제 회복량."""
+    healed = min(player.max_hp, player.hp + player.potion["heal"]) - player.hp
+    player.hp += healed
+    player.last_potion_time = t
+    return healed
+
+
 def _fight(player: Character, monsters: list, duration: float = 300,
-           sim_time: float = 0.0) -> tuple:
+           sim_time: float = 0.0, trace: dict = None, log: list = None) -> tuple:
     """
     이벤트 기반 전투 시뮬레이션 — 다음 행동 시각으로 직접 점프.
     타임스텝 루프 대비 불필요한 반복을 제거해 속도를 개선.
 
     이벤트 타입: 0 = 플레이어, 1 = 몬스터(idx)
+    trace: FightCache 전용. dict 를 넘기면 스킬/포션 사용 시각(전투 상대 시각)을 기록하고,
+           쿨타임 비교가 부동소수 오차 범위 안에서 갈리는 경우 trace["tie"] = True 로,
+           결과가 유지되는 sim_time 하한을 trace["min_sim"] 으로 표시.
+    log  : list 를 넘기면 전투 이벤트를 시간순으로 추가 (_fight_and_log 재생용, 결과에는 영향 없음).
+           (t, "player", label, is_aoe, [(idx, 피해, 남은 HP), ...], 플레이어 MP)
+           (t, "monster", idx, 피해, 플레이어 HP)
+           (t, "potion", 포션 이름, 회복량, 플레이어 HP)
     Returns: (victory, exp_gained, kills, combat_time)
     """
     heap   = []
@@ -445,37 +1091,41 @@ def _fight(player: Character, monsters: list, duration: float = 300,
                 _push(action_end_time, 0)
                 continue
 
-            raw_dmg    = 0.0
-            used_skill = None
-            cast_time  = 0.0
-
-            for sk_name in ["Q", "W", "E", "R"]:
-                sk = player.skills[sk_name]
-                if sk.is_ready(abs_time) and player.mp >= sk.mana_cost:
-                    cast_time, raw_dmg, _ = player.use_skill(sk_name, abs_time)
-                    used_skill = sk
-                    break
+            if trace is not None:
+                # 로테이션이 확인하는 스킬(사용할 스킬까지) 중 쿨타임이 경계에 걸린 것이 있는지
+                ready = _ready_skill(player, abs_time)
+                for i in range(ready + 1 if ready >= 0 else SKILL_COUNT):
+                    sk = player.skill_list[i]
+                    if abs(abs_time - sk.last_used_time - SKILL_COOLDOWNS[i]) < _FIGHT_TIE_EPS:
+                        trace["tie"] = True
 
-            if raw_dmg == 0.0:
-                if current_time - player.last_basic_attack_time >= 1.0 / player.attack_speed:
-                    cast_time, raw_dmg, _ = player.basic_attack(current_time)
+            used_skill, cast_time, raw_dmg, label = _player_turn(player, abs_time, current_time)
+            if trace is not None and used_skill >= 0:
+                trace["skills"][player.skill_list[used_skill].name] = current_time
 
             if raw_dmg > 0.0:
-                is_aoe  = used_skill is not None and used_skill.is_aoe
+                is_aoe  = used_skill >= 0 and SKILL_AOE[used_skill]
                 targets = alive if is_aoe else [alive[0]]
                 for tgt in targets:
                     tgt.take_damage(calc_damage(raw_dmg, tgt.defe))
+                if log is not None:
+                    log.append((current_time, "player", label, is_aoe,
+                                [(tgt.index, calc_damage(raw_dmg, tgt.defe), tgt.hp)
+                                 for tgt in targets], player.mp))
                 action_end_time = current_time + cast_time
                 _push(action_end_time, 0)
             else:
                 # 스킬·기본공격 모두 불가 → 다음 가능 시각으로 점프
                 next_basic = player.last_basic_attack_time + 1.0 / player.attack_speed
-                next_skill = min(
-                    (sk.last_used_time + sk.cooldown
-                     for sk in player.skills.values()
-                     if player.mp >= sk.mana_cost),
-                    default=float("inf"),
-                )
+                next_skill = _next_skill_time(player)
+                if trace is not None:
+                    # next_skill 은 절대 시각, next_basic 은 전투 상대 시각.
+                    # next_skill >= next_basic 인 동안만 sim_time 과 무관 → 그 하한을 기록
+                    if next_skill < next_basic + _FIGHT_TIE_EPS:
+                        trace["tie"] = True
+                    else:
+                        trace["min_sim"] = max(trace["min_sim"],
+                                               next_basic - (next_skill - sim_time) + _FIGHT_TIE_EPS)
                 _push(max(current_time + 0.05, min(next_basic, next_skill)), 0)
 
         # ── 몬스터 행동 ───────────────────────────────────
@@ -485,15 +1135,24 @@ def _fight(player: Character, monsters: list, duration: float = 300,
                 continue
 
             if m.can_attack(current_time):
-                player.hp = max(0.0, player.hp - calc_damage(m.do_attack(current_time), player.defe))
+                dmg       = calc_damage(m.do_attack(current_time), player.defe)
+                player.hp = max(0.0, player.hp - dmg)
+                if log is not None:
+                    log.append((current_time, "monster", idx, dmg, player.hp))
 
                 # 포션 자동 사용
+                if (trace is not None and player.hp > 0.0 and
+                        player.hp / player.max_hp < POTION_HP_THRESHOLD and
+                        abs(abs_time - player.last_potion_time - POTION_COOLDOWN) < _FIGHT_TIE_EPS):
+                    trace["tie"] = True
                 if (player.hp > 0.0 and
                         player.hp / player.max_hp < POTION_HP_THRESHOLD and
                         abs_time - player.last_potion_time >= POTION_COOLDOWN):
-                    potion = POTION_TABLE[_consumable_tier(player.level)]
-                    player.hp = min(player.max_hp, player.hp + potion["heal"])
-                    player.last_potion_time = abs_time
+                    healed = _drink_potion(player, abs_time)
+                    if trace is not None:
+                        trace["potion"] = current_time
+                    if log is not None:
+                        log.append((current_time, "potion", player.potion["name"], healed, player.hp))
 
                 if player.hp > 0.0:
                     _push(current_time + 1.0 / m.attack_speed, 1, idx)
@@ -501,280 +1160,767 @@ def _fight(player: Character, monsters: list, duration: float = 300,
                 # t=0 초기 이벤트에서 아직 공격 불가인 경우
                 _push(m.last_attack_time + 1.0 / m.attack_speed, 1, idx)
 
+    if PROFILER is not None:
+        c = PROFILER.counters
+        c["heap_fights"]  += 1
+        c["heap_pushes"]  += _ctr
+        c["fight_events"] += _ctr - len(heap)
+
     victory    = player.hp > 0.0
     kills      = sum(1 for m in monsters if not m.is_alive())
     exp_gained = sum(m.exp for m in monsters if not m.is_alive()) if victory else 0
     return victory, exp_gained, kills, current_time
 
 
+# =========================================================
+#  해석적 전투 솔버 (이벤트 힙 없음) — 2~3마리 그룹 전용 고속 경로
+# =========================================================
+def _fight_analytic(player: Character, monsters: list, duration: float = 300,
+                    sim_time: float = 0.0, trace: dict = None):
+    """
+    힙 없이 _fight 와 동일한 결과를 계산하는 구간 점프 솔버.
+
+    플레이어 행동(스킬 로테이션·기본 공격·대기 점프)은 몬스터 공격과 무관하므로 먼저
+    처치 시각표를 구하고, 몬스터 공격(주기 1/attack_speed)은 처치 시각까지의 타격만
+    시간순으로 적용해 피격·포션 발동을 계산. 같은 시각의 플레이어/몬스터 처리 순서는
+    _fight 의 힙 카운터 규칙(먼저 push 된 이벤트 우선)을 그대로 재현.
+
+    적용 불가(그룹 크기 2~3 아님, 공격 주기 불일치/비정수, 플레이어 사망, 시간 초과) 시
+    None 반환 — 이 경우 player/monsters/trace 는 변경되지 않음.
+    Returns: (victory, exp_gained, kills, combat_time) 또는 None
+    """
+    n = len(monsters)
+    if n not in (2, 3) or player.hp <= 0.0:
+        return None
+    period = 1.0 / monsters[0].attack_speed
+    if period != int(period):
+        return None
+    for m in monsters:
+        if (m.attack_speed != monsters[0].attack_speed or m.hp <= 0.0 or
+                0.0 - m.last_attack_time < period):
+            return None
+
+    # ── 1단계: 플레이어 행동 시각표 (로컬 사본으로 계산, 성공 시에만 반영) ──
+    skills     = player.skill_list
+    last_used  = [sk.last_used_time for sk in skills]
+    cooldowns  = SKILL_COOLDOWNS
+    mana_costs = SKILL_MANA_COSTS
+    skill_uses = {}
+    mp         = player.mp
+    last_basic = player.last_basic_attack_time
+    interval   = 1.0 / player.attack_speed
+    atk        = player.atk
+    tie        = False
+    min_sim    = float("-inf")
+
+    mon_hp   = [m.hp for m in monsters]
+    alive    = list(range(n))
+    death_t  = [0.0] * n
+    death_pf = [True] * n   # 처치 시각에 플레이어 이벤트가 몬스터 이벤트보다 먼저였는지
+
+    t  = 0.0
+    pf = True                # t=0: 플레이어 이벤트가 가장 먼저 push 됨
+    while True:
+        if t > duration:
+            return None
+        abs_time = sim_time + t
+
+        raw_dmg = 0.0
+        is_aoe  = False
+        for i in range(SKILL_COUNT):
+            if trace is not None and abs(abs_time - last_used[i] - cooldowns[i]) < _FIGHT_TIE_EPS:
+                tie = True
+            if abs_time - last_used[i] >= cooldowns[i] and mp >= mana_costs[i]:
+                mp -= mana_costs[i]
+                last_used[i] = abs_time
+                skill_uses[SKILL_KEYS[i]] = t
+                raw_dmg   = atk * SKILL_MULTIPLIERS[i]
+                cast_time = SKILL_CAST_TIMES[i]
+                is_aoe    = SKILL_AOE[i]
+                break
+
+        if raw_dmg == 0.0 and t - last_basic >= interval:
+            last_basic = t
+            raw_dmg    = float(atk)
+            cast_time  = interval
+
+        if raw_dmg > 0.0:
+            for i in (alive if is_aoe else alive[:1]):
+                mon_hp[i] = max(0.0, mon_hp[i] - calc_damage(raw_dmg, monsters[i].defe))
+                if mon_hp[i] <= 0.0:
+                    death_t[i]  = t
+                    death_pf[i] = pf
+            alive  = [i for i in alive if mon_hp[i] > 0.0]
+            next_t = t + cast_time
+            if not alive:
+                break
+        else:
+            next_basic = last_basic + interval
+            next_skill = min(
+                (last_used[i] + cooldowns[i]
+                 for i in range(SKILL_COUNT) if mp >= mana_costs[i]),
+                default=float("inf"),
+            )
+            if trace is not None:
+                if next_skill < next_basic + _FIGHT_TIE_EPS:
+                    tie = True
+                else:
+                    min_sim = max(min_sim, next_basic - (next_skill - sim_time) + _FIGHT_TIE_EPS)
+            next_t = max(t + 0.05, min(next_basic, next_skill))
+
+        # 다음 플레이어 이벤트(t 에서 push)와 같은 시각의 몬스터 이벤트(next_t - period 에서 push) 순서
+        if next_t % period == 0.0:
+            pushed_m = next_t - period
+            pf = t < pushed_m or (t == pushed_m and pf)
+        t = next_t
+
+    final_t, final_pf, next_player = t, pf, next_t
+
+    # ── 2단계: 몬스터 공격 — 처치 전까지의 주기적 타격을 시간순 적용 ──
+    hp          = player.hp
+    max_hp      = player.max_hp
+    last_potion = player.last_potion_time
+    potion_used = None
+    hits        = [calc_damage(m.atk, player.defe) for m in monsters]
+    last_attack = [m.last_attack_time for m in monsters]
+    next_event  = [0.0] * n
+    potion_heal = player.potion["heal"]
+
+    T = 0.0
+    while True:
+        attacked = False
+        for i in range(n):
+            if death_t[i] > T or (death_t[i] == T and not death_pf[i]):
+                attacked = True
+                last_attack[i] = T
+                next_event[i]  = T + period
+                hp = max(0.0, hp - hits[i])
+                if hp <= 0.0:
+                    return None
+                abs_time = sim_time + T
+                if hp / max_hp < POTION_HP_THRESHOLD:
+                    if (trace is not None and
+                            abs(abs_time - last_potion - POTION_COOLDOWN) < _FIGHT_TIE_EPS):
+                        tie = True
+                    if abs_time - last_potion >= POTION_COOLDOWN:
+                        hp = min(max_hp, hp + potion_heal)
+                        last_potion = abs_time
+                        potion_used = T
+        if not attacked:
+            break
+        T += period
+
+    # ── 종료 시각: 마지막 처치 직후 힙에서 꺼내질 첫 이벤트 ──
+    combat_time = next_player
+    for i in range(n):
+        te = next_event[i]
+        if (te > final_t or (te == final_t and final_pf)) and te < combat_time:
+            combat_time = te
+    if combat_time > duration:
+        combat_time = duration
+
+    # ── 상태 반영 ──────────────────────────────────────────
+    player.hp = hp
+    player.mp = mp
+    player.last_basic_attack_time = last_basic
+    player.last_potion_time       = last_potion
+    for sk, lu in zip(skills, last_used):
+        sk.last_used_time = lu
+    for i, m in enumerate(monsters):
+        m.hp = mon_hp[i]
+        m.last_attack_time = last_attack[i]
+    if trace is not None:
+        trace["skills"].update(skill_uses)
+        if potion_used is not None:
+            trace["potion"] = potion_used
+        trace["tie"]     = trace["tie"] or tie
+        trace["min_sim"] = max(trace["min_sim"], min_sim)
+
+    return True, sum(m.exp for m in monsters), n, combat_time
+
+
+def _fight_fast(player: Character, monsters: list, duration: float = 300,
+                sim_time: float = 0.0, trace: dict = None) -> tuple:
+    """_fight_analytic 시도 후 적용 불가하면 이벤트 힙 엔진(_fight)으로 대체."""
+    result = _fight_analytic(player, monsters, duration, sim_time, trace)
+    if result is None:
+        result = _fight(player, monsters, duration, sim_time, trace)
+    elif PROFILER is not None:
+        PROFILER.counters["analytic_fights"] += 1
+    return result
+
+
+# =========================================================
+#  전투 결과 캐시 (LRU) — _fight 는 난수를 쓰지 않으므로 상태가 같으면 결과도 같음
+# =========================================================
+_FIGHT_TIE_EPS = 1e-6   # 쿨타임 비교 여유가 이보다 작으면 sim_time 부동소수 오차에 민감 → 캐시 제외
+
+
+class FightCache:
+    """
+    _fight 앞단의 LRU 캐시.
+
+    키: 플레이어 레벨/ATK/DEF/HP/MP, 스킬·포션 쿨타임 위상(sim_time 기준 경과 시간,
+        쿨타임 이상이면 쿨타임 값으로 정규화), 몬스터 티어/난이도/마릿수/템플릿 스탯.
+    값: 전투 결과 + 전투 후 플레이어 상태 변화(HP, MP, 스킬/포션 사용 상대 시각).
+    적중 시 Monster 생성과 이벤트 힙을 모두 건너뛰고 상태 변화만 Character 에 재생.
+    재생 시 절대 시각은 참조 엔진과 같은 식(sim_time + 상대 시각)으로 계산하므로
+    결과는 _fight 직접 호출과 비트 단위로 동일.
+    쿨타임 비교가 오차 범위에서 갈린 전투는 저장하지 않고, 대기 점프가 sim_time 하한에
+    의존하는 전투는 그 하한(min_sim) 이상일 때만 재생.
+    키에 없는 테이블 값(난이도 배율, 포션 회복량 등)이 바뀌면 — TABLES.generation 변경 — 전부 비움.
+    """
+    def __init__(self, maxsize: int = 65536):
+        self.maxsize = maxsize
+        self.hits    = 0
+        self.misses  = 0
+        self._store: OrderedDict = OrderedDict()
+        self._group  = MonsterGroup()   # 미스 시 전투용 몬스터 버퍼
+        self._generation = TABLES.generation
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+    def clear(self):
+        self._store.clear()
+        self.hits   = 0
+        self.misses = 0
+
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def _key(self, player: Character, tier: int, count: int, difficulty: str,
+             templates: dict, duration: float, sim_time: float) -> tuple:
+        tpl    = templates[tier]
+        phases = []
+        for sk, cd in zip(player.skill_list, SKILL_COOLDOWNS):
+            elapsed = sim_time - sk.last_used_time
+            phases.append(cd if elapsed >= cd else elapsed)
+        potion_elapsed = sim_time - player.last_potion_time
+        if potion_elapsed >= POTION_COOLDOWN:
+            potion_elapsed = POTION_COOLDOWN
+        return (tier, count, difficulty, duration,
+                tpl["atk"], tpl["defe"], tpl["hp"], tpl["attack_speed"], tpl["exp"],
+                player.level, player.atk, player.defe, player.max_hp, player.hp, player.mp,
+                player.last_basic_attack_time, tuple(phases), potion_elapsed)
+
+    def fight(self, player: Character, tier: int, count: int, difficulty: str = "Normal",
+              templates: dict = None, duration: float = 300,
+              sim_time: float = 0.0, analytic: bool = True) -> tuple:
+        """캐시 적중 시 결과 재생, 미스 시 전투 실행 후 저장. 반환 형식은 _fight 와 동일.
+        analytic: 미스 시 해석적 솔버(_fight_fast) 사용 여부. False 이면 _fight 만 사용."""
+        templates = templates or TABLES.get("monster_templates", "v1")
+        if self._generation != TABLES.generation:   # CSV 가 다시 읽힘 → 예전 테이블 기준 결과 폐기
+            self._store.clear()
+            self._generation = TABLES.generation
+        key   = self._key(player, tier, count, difficulty, templates, duration, sim_time)
+        entry = self._store.get(key)
+
+        if entry is not None and sim_time >= entry[6]:
+            self._store.move_to_end(key)
+            self.hits += 1
+            if PROFILER is not None:
+                PROFILER.counters["fight_cache_hits"] += 1
+            result, hp, mp, last_basic, skill_uses, potion_t, _ = entry
+            player.hp = hp
+            player.mp = mp
+            player.last_basic_attack_time = last_basic
+            for sk_name, t in skill_uses:
+                player.skills[sk_name].last_used_time = sim_time + t
+            if potion_t is not None:
+                player.last_potion_time = sim_time + potion_t
+            return result
+
+        self.misses += 1
+        monsters = self._group.fill(tier, count, difficulty, templates)
+        trace  = {"skills": {}, "potion": None, "tie": False, "min_sim": float("-inf")}
+        engine = _fight_fast if analytic else _fight
+        result = engine(player, monsters, duration, sim_time, trace=trace)
+        if not trace["tie"] and entry is None:
+            self._store[key] = (result, player.hp, player.mp, player.last_basic_attack_time,
+                                tuple(trace["skills"].items()), trace["potion"],
+                                trace["min_sim"])
+            if len(self._store) > self.maxsize:
+                self._store.popitem(last=False)
+        return result
+
+
+FIGHT_CACHE = FightCache()   # 프로세스 공용 기본 캐시 (Pool 워커마다 독립)
+
+
+# =========================================================
+#  터미널 렌더러 (ANSI 커서 주소 지정, 변경된 줄만 다시 그림)
+# =========================================================
+class TermView:
+    """
+    실시간 전투/PvP 화면용 증분 렌더러.
+    draw(lines) 는 직전 프레임과 달라진 줄만 커서 이동(ESC[행;1H) + 줄 끝 지우기(ESC[K)로
+    덮어쓰고, 한 프레임을 한 번의 write 로 내보냄 — 셸 호출(clear) 없음, 느린 SSH 에서도 전송량 최소.
+    max_fps 를 넘는 갱신은 건너뛰고 마지막 내용만 보관했다가 다음 draw()/flush() 때 그림.
+    출력이 터미널이 아니면(파일·파이프) 제어 코드 없이 프레임 전체를 그대로 출력.
+    """
+
+    def __init__(self, max_fps: float = 30.0, stream=None):
+        self.stream    = stream or sys.stdout
+        self.ansi      = self.stream.isatty() and os.environ.get("TERM") != "dumb"
+        self.min_gap   = 1.0 / max_fps if max_fps and max_fps > 0 else 0.0
+        self._prev     = None   # 마지막으로 그린 줄 목록
+        self._pending  = None   # 프레임 제한으로 보류된 줄 목록
+        self._last     = float("-inf")
+        if self.ansi and os.name == "nt":
+            os.system("")       # Windows 콘솔의 VT 처리 활성화
+
+    def draw(self, lines: list, force: bool = False):
+        """lines 를 화면에 반영. 프레임 간격 제한에 걸리면 보류 (force=True 면 즉시)."""
+        now = time.monotonic()
+        if not force and now - self._last < self.min_gap:
+            self._pending = lines
+            return
+        self._pending = None
+        self._last    = now
+        self._paint(lines)
+
+    def flush(self):
+        """보류된 프레임이 있으면 즉시 그림."""
+        if self._pending is not None:
+            self.draw(self._pending, force=True)
+
+    def _paint(self, lines: list):
+        if not self.ansi:
+            self.stream.write("\n".join(lines) + "\n")
+            self.stream.flush()
+            return
+        prev = self._prev
+        out  = []
+        if prev is None:
+            out.append("\x1b[2J\x1b[H")          # 첫 프레임: 화면 지우고 전체 출력
+            out.append("\x1b[K\n".join(lines) + "\x1b[K")
+        else:
+            for row, line in enumerate(lines):
+                if row >= len(prev) or prev[row] != line:
+                    out.append(f"\x1b[{row + 1};1H{line}\x1b[K")
+            for row in range(len(lines), len(prev)):
+                out.append(f"\x1b[{row + 1};1H\x1b[K")
+        out.append(f"\x1b[{len(lines) + 1};1H")   # 커서를 프레임 아래로
+        self._prev = list(lines)
+        self.stream.write("".join(out))
+        self.stream.flush()
+
+
 # =========================================================
 #  전투 시뮬레이션 (화면 출력 포함, 단일 전투)
 # =========================================================
-def _fight_and_log(player: Character, monsters: list, duration: float = 300, sim_time: float = 0.0):
+def _fight_and_log(player: Character, monsters: list, duration: float = 300,
+                   sim_time: float = 0.0, speed: float = 1.0, headless: bool = False,
+                   max_fps: float = 30.0):
     """
-    단일 전투를 수행하며 상세 로그를 출력.
-    simulate_leveling 내부에서 호출되며, player 상태를 직접 변경.
+    단일 전투를 수행하며 상세 로그를 출력. player 상태를 직접 변경.
+    전투 자체는 _fight(log=...) 로 계산하고 (결과는 _fight 와 동일), 기록된 이벤트를 재생.
+    speed   : 재생 배속 (1.0 = 실시간, 4.0 = 4배속, 0 이하 = 대기 없이 화면 갱신만).
+    headless: True 이면 화면 갱신·대기 없이 로그 줄만 순서대로 출력 (파일 저장용).
+    max_fps : 화면 갱신 상한 (TermView).
+    Returns: (victory, exp_gained, kills, combat_time)
     """
-    current_time = 0.0
-    time_step = 0.1
-    action_end_time = 0.0
-    total_damage_dealt = 0.0
-    total_damage_taken = 0.0
-    log_messages: list = []
     LOG_DISPLAY = 18
+    # 화면 표시용 상태 — 이벤트를 적용하며 전투 시작 시점부터 다시 진행
+    view = {
+        "t": 0.0, "hp": player.hp, "mp": player.mp, "dealt": 0.0, "taken": 0.0,
+        "mon_hp": [m.hp for m in monsters],
+    }
+    log_messages: list = []
+
+    term = None if headless else TermView(max_fps)
 
-    # 렌더링 함수
-    def render():
-        os.system('cls' if os.name == 'nt' else 'clear')
-        print("=" * 78)
-        print(f"   전투 로그 (플레이어 Lv.{player.level} / 몬스터 Tier {_tier_for_level(player.level)})")
-        print("=" * 78)
+    def render(force: bool = False):
         req_exp = player.exp_table.get(player.level, None)
         exp_str = f"{player.exp} / {req_exp}" if req_exp else f"{player.exp} (최대레벨)"
-        print(f"  [플레이어 Lv.{player.level}]")
-        print(f"  HP {player.hp:>6.0f} / {player.max_hp:<6}  {_hp_bar(player.hp, player.max_hp)}")
-        print(f"  MP {player.mp:>6.0f} / {player.max_mp:<6}  EXP {exp_str}")
-        print("-" * 78)
-        for m in monsters:
-            tag = " [사망]" if not m.is_alive() else ""
-            print(f"  [{m.name}  Tier{m.tier}  {m.difficulty}  #{m.index + 1}]{tag}")
-            print(f"  HP {m.hp:>7.0f} / {m.max_hp:<7.0f}  {m.hp_bar()}  EXP:{m.exp}")
-        print("-" * 78)
-        for msg in log_messages[-LOG_DISPLAY:]:
-            print(msg)
-        blank = LOG_DISPLAY - min(len(log_messages), LOG_DISPLAY)
-        for _ in range(blank):
-            print()
-        print("=" * 78)
-        print(f"  경과: {current_time:5.1f}s  |  "
-              f"가한 피해: {total_damage_dealt:>7.0f}  |  "
-              f"받은 피해: {total_damage_taken:>7.0f}")
+        lines = [
+            "=" * 78,
+            f"   전투 로그 (플레이어 Lv.{player.level} / 몬스터 Tier {_tier_for_level(player.level)})",
+            "=" * 78,
+            f"  [플레이어 Lv.{player.level}]",
+            f"  HP {view['hp']:>6.0f} / {player.max_hp:<6}  {_hp_bar(view['hp'], player.max_hp)}",
+            f"  MP {view['mp']:>6.0f} / {player.max_mp:<6}  EXP {exp_str}",
+            "-" * 78,
+        ]
+        for m, hp in zip(monsters, view["mon_hp"]):
+            tag = " [사망]" if hp <= 0.0 else ""
+            lines.append(f"  [{m.name}  Tier{m.tier}  {m.difficulty}  #{m.index + 1}]{tag}")
+            lines.append(f"  HP {hp:>7.0f} / {m.max_hp:<7.0f}  {_hp_bar(hp, m.max_hp)}  EXP:{m.exp}")
+        lines.append("-" * 78)
+        shown = log_messages[-LOG_DISPLAY:]
+        lines.extend(shown)
+        lines.extend([""] * (LOG_DISPLAY - len(shown)))
+        lines.append("=" * 78)
+        lines.append(f"  경과: {view['t']:5.1f}s  |  "
+                     f"가한 피해: {view['dealt']:>7.0f}  |  "
+                     f"받은 피해: {view['taken']:>7.0f}")
+        term.draw(lines, force=force)
+
+    def emit(lines: list):
+        if headless:
+            for line in lines:
+                print(line)
+        else:
+            log_messages.extend(lines)
+            render()
 
-    render()
+    events = []
+    result = _fight(player, monsters, duration, sim_time, log=events)
+    victory, _, _, combat_time = result
+
+    if not headless:
+        render(force=True)
+    start = time.monotonic()
+    for ev in events:
+        t = ev[0]
+        if not headless and speed > 0:
+            delay = start + t / speed - time.monotonic()
+            if delay > 0:
+                term.flush()      # 대기 전에 보류된 프레임을 그려 화면이 멈춰 보이지 않게
+                time.sleep(delay)
+        view["t"] = t
+        emit(_format_fight_event(ev, monsters, view))
+
+    view["t"] = combat_time
+    if victory and all(hp <= 0.0 for hp in view["mon_hp"]):
+        emit([f"[{combat_time:.1f}s] ★ 모든 몬스터 처치! 전투 승리!"])
+    elif not victory:
+        emit([f"[{combat_time:.1f}s] ✗ 플레이어 사망. 전투 패배."])
+    if term is not None:
+        render(force=True)
+    return result
 
-    # 전투 루프
-    while current_time <= duration:
-        abs_time = sim_time + current_time   # 절대 시뮬레이션 시각 (스킬/포션 쿨타임 공통 기준)
-        alive = [m for m in monsters if m.is_alive()]
 
-        if not alive:
-            log_messages.append(f"[{current_time:.1f}s] ★ 모든 몬스터 처치! 전투 승리!")
-            render()
-            break
-        if player.hp <= 0.0:
-            log_messages.append(f"[{current_time:.1f}s] ✗ 플레이어 사망. 전투 패배.")
-            render()
-            break
+def _format_fight_event(ev: tuple, monsters: list, view: dict) -> list:
+    """_fight(log=...) 이벤트 1개를 로그 줄 목록으로 변환하고 view(표시 상태)에 반영."""
+    t, kind = ev[0], ev[1]
+    lines   = []
+    if kind == "player":
+        _, _, label, is_aoe, hits, mp = ev
+        view["mp"] = mp
+        if is_aoe:
+            lines.append(f"[{t:5.1f}s] {label:<16} → 전체 {len(hits)}마리")
+        for idx, dmg, hp in hits:
+            m = monsters[idx]
+            view["mon_hp"][idx] = hp
+            view["dealt"]      += dmg
+            dead_mark = "  → 처치!" if hp <= 0.0 else ""
+            if is_aoe:
+                lines.append(f"           #{m.index + 1} {m.name}: "
+                             f"{dmg:5.0f} 피해  (HP {hp:>7.0f}){dead_mark}")
+            else:
+                lines.append(f"[{t:5.1f}s] {label:<16} → {m.name}: "
+                             f"{dmg:5.0f} 피해  (몬 HP {hp:>7.0f}){dead_mark}")
+    elif kind == "monster":
+        _, _, idx, dmg, hp = ev
+        m = monsters[idx]
+        view["hp"]     = hp
+        view["taken"] += dmg
+        lines.append(f"[{t:5.1f}s] {m.name}({m.difficulty}) 공격"
+                     f"  → 플레이어: {dmg:5.0f} 피해  (플 HP {hp:>6.0f})")
+    elif kind == "potion":
+        _, _, name, healed, hp = ev
+        view["hp"] = hp
+        lines.append(f"[{t:5.1f}s] [포션] {name} 사용"
+                     f"  → HP +{healed:.0f}  (플 HP {hp:>6.0f})")
+    return lines
 
-        updated = False
-
-        # 플레이어 행동
-        if current_time >= action_end_time:
-            raw_dmg = 0.0
-            act_label = ""
-            cast_time = 0.0
-            used_skill = None
-
-            for sk_name in ["Q", "W", "E", "R"]:
-                sk = player.skills[sk_name]
-                if sk.is_ready(abs_time) and player.mp >= sk.mana_cost:
-                    cast_time, raw_dmg, act_label = player.use_skill(sk_name, abs_time)
-                    used_skill = sk
-                    action_end_time = current_time + cast_time
-                    break
 
-            if raw_dmg == 0.0:
-                interval = 1.0 / player.attack_speed
-                if current_time - player.last_basic_attack_time >= interval:
-                    cast_time, raw_dmg, act_label = player.basic_attack(current_time)
-                    action_end_time = current_time + cast_time
+# =========================================================
+#  PvP 전투 코어 (이벤트 기반, 출력 없음)
+# =========================================================
+def _pvp_action(player: Character, t: float) -> tuple:
+    """
+    PvP 플레이어 행동 1회 — _fight 와 같은 _player_turn 로테이션 (한 시간축이라 스킬·기본 공격 모두 t 기준).
+    반환: (raw_dmg, label, 다음 행동 시각). 행동 불가 시 raw_dmg=0 이고
+          다음 행동 시각은 가장 빠른 기본 공격/스킬 가능 시각 (_fight 의 대기 점프와 동일).
+    """
+    _, cast_time, raw_dmg, label = _player_turn(player, t, t)
+    if raw_dmg > 0.0:
+        return raw_dmg, label, t + cast_time
+    next_basic = player.last_basic_attack_time + 1.0 / player.attack_speed
+    return 0.0, "", max(t + 0.05, min(next_basic, _next_skill_time(player)))
+
 
-            if raw_dmg > 0.0:
-                is_aoe = used_skill is not None and used_skill.is_aoe
-                targets = alive if is_aoe else [alive[0]]
-                if is_aoe:
-                    log_messages.append(
-                        f"[{current_time:5.1f}s] {act_label:<16} → 전체 {len(targets)}마리"
-                    )
-                for t in targets:
-                    actual = calc_damage(raw_dmg, t.defe)
-                    t.take_damage(actual)
-                    total_damage_dealt += actual
-                    dead_mark = "  → 처치!" if not t.is_alive() else ""
-                    if is_aoe:
-                        log_messages.append(
-                            f"           #{t.index + 1} {t.name}: "
-                            f"{actual:5.0f} 피해  (HP {t.hp:>7.0f}){dead_mark}"
-                        )
-                    else:
-                        log_messages.append(
-                            f"[{current_time:5.1f}s] {act_label:<16} → {t.name}: "
-                            f"{actual:5.0f} 피해  (몬 HP {t.hp:>7.0f}){dead_mark}"
-                        )
-                updated = True
-
-        # 몬스터 행동
-        for monster in alive:
-            if monster.can_attack(current_time):
-                raw_dmg = monster.do_attack(current_time)
-                actual = calc_damage(raw_dmg, player.defe)
-                player.hp = max(0.0, player.hp - actual)
-                total_damage_taken += actual
-                log_messages.append(
-                    f"[{current_time:5.1f}s] {monster.name}({monster.difficulty}) 공격"
-                    f"  → 플레이어: {actual:5.0f} 피해  (플 HP {player.hp:>6.0f})"
-                )
-                updated = True
-
-        # 포션 자동 사용 (전투 중, HP 50% 미만)
-        if (player.hp > 0 and
-                player.hp / player.max_hp < POTION_HP_THRESHOLD and
-                abs_time - player.last_potion_time >= POTION_COOLDOWN):
-            potion = POTION_TABLE[_consumable_tier(player.level)]
-            healed = min(player.max_hp, player.hp + potion["heal"]) - player.hp
-            player.hp += healed
-            player.last_potion_time = abs_time
-            log_messages.append(
-                f"[{current_time:5.1f}s] [포션] {potion['name']} 사용"
-                f"  → HP +{healed:.0f}  (플 HP {player.hp:>6.0f})"
-            )
-            updated = True
+def _pvp_fight(p1: Character, p2: Character, duration: float = 300.0,
+               log: list = None) -> tuple:
+    """
+    두 캐릭터의 PvP 1회 — 다음 행동/포션 가능 시각으로 직접 점프하는 이벤트 루프.
+    기존 구현의 0.1초 틱 루프와 달리 행동·포션 시각을 0.1초 격자로 올림하지 않으므로
+    전투 시간과 (근소한 차이의) 승패가 틱 방식 결과와 다를 수 있음 — _fight 와 같은 연속 시각 규칙.
+    같은 시각에 행동하는 두 플레이어의 공격은 함께 수집한 뒤 동시에 적용 (동시 사망 가능),
+    이어서 HP 50% 미만이고 쿨타임이 끝난 쪽은 포션 사용 (simulate_pvp 규칙).
+    log: list 를 넘기면 이벤트를 시간순으로 추가 (simulate_pvp 재생용).
+         (t, "attack", 공격자(0/1), label, 피해, 대상 HP, 공격자 MP)
+         (t, "potion", 사용자(0/1), 이름, 회복량, HP)
+    Returns: (winner, combat_time) — winner: 1 = P1 승, 2 = P2 승, 0 = 무승부(동시 사망/시간 초과)
+    """
+    players = (p1, p2)
+    act     = [0.0, 0.0]                   # 플레이어별 다음 행동 시각
+    dmg_memo = {}                          # (raw, 대상 DEF) -> 피해 (전투 중 값 종류가 적음)
+
+    while True:
+        # 다음 시각: 두 플레이어의 행동 시각과 (HP 가 낮은 쪽의) 포션 가능 시각 중 최소
+        t = act[0] if act[0] < act[1] else act[1]
+        for p in players:
+            if 0.0 < p.hp < p.max_hp * POTION_HP_THRESHOLD:
+                t_pot = p.last_potion_time + POTION_COOLDOWN
+                if t_pot < t:
+                    t = t_pot
+        if t > duration:
+            return 0, duration
+
+        # ── 행동 수집 → 동시 적용 ───────────────────────
+        hits = []
+        for k in (0, 1):
+            if act[k] <= t:
+                raw_dmg, label, act[k] = _pvp_action(players[k], t)
+                if raw_dmg > 0.0:
+                    hits.append((k, raw_dmg, label))
+        for k, raw_dmg, label in hits:
+            target = players[1 - k]
+            dmg    = dmg_memo.get((raw_dmg, target.defe))
+            if dmg is None:
+                dmg = dmg_memo[(raw_dmg, target.defe)] = calc_damage(raw_dmg, target.defe)
+            target.hp = max(0.0, target.hp - dmg)
+            if log is not None:
+                log.append((t, "attack", k, label, dmg, target.hp, players[k].mp))
 
-        if updated:
-            render()
+        # ── 포션 자동 사용 (양쪽 모두, HP 50% 미만) ──────
+        for k, p in enumerate(players):
+            if (p.hp > 0.0 and p.hp / p.max_hp < POTION_HP_THRESHOLD and
+                    t >= p.last_potion_time + POTION_COOLDOWN):
+                healed = _drink_potion(p, t)
+                if log is not None:
+                    log.append((t, "potion", k, p.potion["name"], healed, p.hp))
 
-        time.sleep(time_step) # 실시간 느낌을 위해 약간의 딜레이
-        current_time = round(current_time + time_step, 2)
+        if p1.hp <= 0.0 or p2.hp <= 0.0:
+            winner = 0 if p1.hp <= 0.0 and p2.hp <= 0.0 else (2 if p1.hp <= 0.0 else 1)
+            return winner, t
 
-    # 전투 결과 반환
-    victory = player.hp > 0.0
-    kills = sum(1 for m in monsters if not m.is_alive())
-    exp_gained = sum(m.exp for m in monsters if not m.is_alive()) if victory else 0
-        
-    return victory, exp_gained, kills, current_time
+
+def _equip(player: Character, weapon_tier: int, weapon_enhance: int):
+    """캐릭터에 무기(티어, 강화) 장착 — ATK 재계산."""
+    player.weapon_tier    = weapon_tier
+    player.weapon_enhance = weapon_enhance
+    player.atk            = calc_weapon_atk(weapon_tier, weapon_enhance)
 
 
 # =========================================================
 #  PvP 시뮬레이션 (같은 레벨 캐릭터 1:1)
 # =========================================================
-def simulate_pvp(level: int, difficulty: str = "Normal"):
-    """같은 레벨의 두 캐릭터 간 PvP 시뮬레이션 (1회 전투, 실시간 출력)."""
-    duration  = 300.0
-    time_step = 0.1
+@TABLES.fresh
+def simulate_pvp(level: int, max_fps: float = 30.0, speed: float = 1.0,
+                 headless: bool = False):
+    """같은 레벨의 두 캐릭터 간 PvP 시뮬레이션 (1회 전투, 실시간 출력).
+    전투는 _pvp_fight(log=...) 로 계산하고 기록된 이벤트를 재생.
+    max_fps : 화면 갱신 상한 (TermView).
+    speed   : 재생 배속 (1.0 = 실시간, 0 이하 = 대기 없음).
+    headless: True 이면 화면 갱신·대기 없이 로그 줄만 출력."""
+    duration = 300.0
 
     p1 = Character(level=level)
     p2 = Character(level=level)
 
-    current_time  = 0.0
-    p1_action_end = 0.0
-    p2_action_end = 0.0
+    # 화면 표시용 상태 — 이벤트를 적용하며 전투 시작 시점부터 다시 진행
+    view = {"t": 0.0, "hp": [p1.hp, p2.hp], "mp": [p1.mp, p2.mp]}
     log_messages: list = []
     LOG_DISPLAY = 16
-
-    def render():
-        os.system('cls' if os.name == 'nt' else 'clear')
-        print("=" * 78)
-        print(f"   PvP 시뮬레이션  Lv.{level}  (ATK={p1.atk}  DEF={p1.defe})")
-        print("=" * 78)
-        for tag, p in [("P1", p1), ("P2", p2)]:
-            dead = "  [사망]" if p.hp <= 0 else ""
-            print(f"  [{tag}]{dead}")
-            print(f"  HP {p.hp:>6.0f} / {p.max_hp:<6}  {_hp_bar(p.hp, p.max_hp)}")
-            print(f"  MP {p.mp:>6.0f} / {p.max_mp:<6}")
-        print("-" * 78)
-        for msg in log_messages[-LOG_DISPLAY:]:
-            print(msg)
-        for _ in range(LOG_DISPLAY - min(len(log_messages), LOG_DISPLAY)):
-            print()
-        print("=" * 78)
-        print(f"  경과: {current_time:5.1f}s")
-
-    def _collect_action(player: Character, action_end: float) -> tuple:
-        """이번 틱에서 플레이어의 공격을 수집. (raw_dmg, label, new_action_end) 반환."""
-        if current_time < action_end:
-            return 0.0, "", action_end
-        for sk_name in ["Q", "W", "E", "R"]:
-            sk = player.skills[sk_name]
-            if sk.is_ready(current_time) and player.mp >= sk.mana_cost:
-                cast_time, raw_dmg, label = player.use_skill(sk_name, current_time)
-                return raw_dmg, label, current_time + cast_time
-        if current_time - player.last_basic_attack_time >= 1.0 / player.attack_speed:
-            cast_time, raw_dmg, label = player.basic_attack(current_time)
-            return raw_dmg, label, current_time + cast_time
-        return 0.0, "", action_end
-
-    render()
-
-    while current_time <= duration:
-        if p1.hp <= 0.0 or p2.hp <= 0.0:
-            break
-
-        # 두 플레이어의 공격을 동시에 수집한 뒤 동시에 적용
-        p1_raw, p1_label, p1_action_end = _collect_action(p1, p1_action_end)
-        p2_raw, p2_label, p2_action_end = _collect_action(p2, p2_action_end)
-
-        updated = False
-
-        if p1_raw > 0.0:
-            actual = calc_damage(p1_raw, p2.defe)
-            p2.hp  = max(0.0, p2.hp - actual)
-            log_messages.append(
-                f"[{current_time:5.1f}s] P1 {p1_label:<16} → P2: {actual:5.0f}  (P2 HP {p2.hp:>6.0f})"
-                + ("  → 사망!" if p2.hp <= 0 else "")
-            )
-            updated = True
-
-        if p2_raw > 0.0:
-            actual = calc_damage(p2_raw, p1.defe)
-            p1.hp  = max(0.0, p1.hp - actual)
-            log_messages.append(
-                f"[{current_time:5.1f}s] P2 {p2_label:<16} → P1: {actual:5.0f}  (P1 HP {p1.hp:>6.0f})"
-                + ("  → 사망!" if p1.hp <= 0 else "")
-            )
-            updated = True
-
-        # ── 포션 자동 사용 (양쪽 모두, HP 50% 미만) ──────
-        for tag, p in [("P1", p1), ("P2", p2)]:
-            if (p.hp > 0 and
-                    p.hp / p.max_hp < POTION_HP_THRESHOLD and
-                    current_time - p.last_potion_time >= POTION_COOLDOWN):
-                potion = POTION_TABLE[_consumable_tier(p.level)]
-                healed = min(p.max_hp, p.hp + potion["heal"]) - p.hp
-                p.hp += healed
-                p.last_potion_time = current_time
-                log_messages.append(
-                    f"[{current_time:5.1f}s] [{tag} 포션] {potion['name']}"
-                    f"  → HP +{healed:.0f}  ({tag} HP {p.hp:>6.0f})"
-                )
-                updated = True
-
-        if updated:
+    term = None if headless else TermView(max_fps)
+
+    def render(force: bool = False):
+        lines = [
+            "=" * 78,
+            f"   PvP 시뮬레이션  Lv.{level}  (ATK={p1.atk}  DEF={p1.defe})",
+            "=" * 78,
+        ]
+        for k, (tag, p) in enumerate([("P1", p1), ("P2", p2)]):
+            hp   = view["hp"][k]
+            dead = "  [사망]" if hp <= 0 else ""
+            lines.append(f"  [{tag}]{dead}")
+            lines.append(f"  HP {hp:>6.0f} / {p.max_hp:<6}  {_hp_bar(hp, p.max_hp)}")
+            lines.append(f"  MP {view['mp'][k]:>6.0f} / {p.max_mp:<6}")
+        lines.append("-" * 78)
+        shown = log_messages[-LOG_DISPLAY:]
+        lines.extend(shown)
+        lines.extend([""] * (LOG_DISPLAY - len(shown)))
+        lines.append("=" * 78)
+        lines.append(f"  경과: {view['t']:5.1f}s")
+        term.draw(lines, force=force)
+
+    def emit(line: str):
+        if headless:
+            print(line)
+        else:
+            log_messages.append(line)
             render()
 
-        time.sleep(time_step)
-        current_time = round(current_time + time_step, 2)
+    events = []
+    winner, combat_time = _pvp_fight(p1, p2, duration, log=events)
+
+    if not headless:
+        render(force=True)
+    start = time.monotonic()
+    for ev in events:
+        t, kind, k = ev[0], ev[1], ev[2]
+        if not headless and speed > 0:
+            delay = start + t / speed - time.monotonic()
+            if delay > 0:
+                term.flush()
+                time.sleep(delay)
+        view["t"] = t
+        tag, other = ("P1", "P2") if k == 0 else ("P2", "P1")
+        if kind == "attack":
+            _, _, _, label, dmg, hp, mp = ev
+            view["hp"][1 - k] = hp
+            view["mp"][k]     = mp
+            emit(f"[{t:5.1f}s] {tag} {label:<16} → {other}: {dmg:5.0f}  ({other} HP {hp:>6.0f})"
+                 + ("  → 사망!" if hp <= 0 else ""))
+        else:
+            _, _, _, name, healed, hp = ev
+            view["hp"][k] = hp
+            emit(f"[{t:5.1f}s] [{tag} 포션] {name}"
+                 f"  → HP +{healed:.0f}  ({tag} HP {hp:>6.0f})")
 
     # 최종 결과 메시지
     if p1.hp <= 0.0 and p2.hp <= 0.0:
         result_msg = "★ 동시 사망 - 무승부!"
-    elif p1.hp <= 0.0:
+    elif winner == 2:
         result_msg = f"★ P1 사망 - P2 승리!  (P2 남은 HP {p2.hp:.0f})"
-    elif p2.hp <= 0.0:
+    elif winner == 1:
         result_msg = f"★ P2 사망 - P1 승리!  (P1 남은 HP {p1.hp:.0f})"
     else:
         result_msg = f"★ 시간 초과 - 무승부  (P1 {p1.hp:.0f} / P2 {p2.hp:.0f})"
 
-    log_messages.append(f"[{current_time:.1f}s] {result_msg}")
-    render()
+    view["t"] = combat_time
+    emit(f"[{combat_time:.1f}s] {result_msg}")
+    if term is not None:
+        render(force=True)
 
     print()
     print("=" * 60)
     print("  [PvP 결과]")
     print(f"  {result_msg}")
-    print(f"  전투 시간 : {current_time:.1f} 초")
+    print(f"  전투 시간 : {combat_time:.1f} 초")
     print("=" * 60)
 
 
+# =========================================================
+#  PvP 승률 매트릭스 (레벨 × 무기 조합, 병렬)
+# =========================================================
+def _pvp_matrix_enhances() -> tuple:
+    """기본 무기 조합의 강화 단계 — 0, 중간, 최대 강화 (최대는 강화 테이블에서)."""
+    top = max(TABLES.get("enhance"))
+    return tuple(sorted({0, (top + 1) // 2, top}))
+
+
+def _pvp_matrix_worker(args: tuple) -> tuple:
+    """Pool 워커 — 레벨 1개에서 모든 무기 조합 쌍(i <= j)의 PvP 결과를 계산.
+    반환: (level, [(i, j, winner, combat_time), ...])"""
+    level, configs, duration = args
+    out = []
+    for i, (ti, ei) in enumerate(configs):
+        for j in range(i, len(configs)):
+            tj, ej = configs[j]
+            p1, p2 = Character(level=level), Character(level=level)
+            _equip(p1, ti, ei)
+            _equip(p2, tj, ej)
+            winner, combat_time = _pvp_fight(p1, p2, duration)
+            out.append((i, j, winner, combat_time))
+    return level, out
+
+
+@TABLES.fresh
+def simulate_pvp_matrix(max_level: int = 70, enhances: tuple = None,
+                        duration: float = 300.0):
+    """
+    Lv.1 ~ max_level 의 모든 레벨에서 무기 조합(티어 × 강화) 쌍마다 PvP 를 실행하고
+    행(P1 무기) 기준 승/무/패 비율과 평균 처치 시간(TTK) 매트릭스, 레벨별 요약을 출력.
+    PvP 에는 난수가 없으므로 (레벨, 무기 쌍)마다 1회 전투로 충분 — 비율은 레벨 전체에 대한 값.
+    무승부(동시 사망·시간 초과)는 승률에 섞지 않고 따로 집계하며, TTK 는 한쪽 이상이
+    사망한 전투만 평균 (시간 초과 전투의 duration 은 제외). 레벨 단위 작업을 프로세스 풀에서 병렬 실행.
+    enhances: 무기 조합의 강화 단계들 — 모든 티어 × 이 단계 (None = _pvp_matrix_enhances()).
+    """
+    if enhances is None:
+        enhances = _pvp_matrix_enhances()
+    tiers   = sorted(TABLES.get("weapon_stat").keys())
+    configs = [(t, e) for t in tiers for e in enhances]
+    n       = len(configs)
+    levels  = list(range(1, max_level + 1))
+    print(f"  PvP 매트릭스: Lv.1~{max_level}  /  무기 {n}종 (Tier{tiers[0]}~{tiers[-1]} × "
+          f"+{', +'.join(map(str, enhances))})  /  전투 {len(levels) * n * (n + 1) // 2:,}회")
+
+    wins    = [[0] * n for _ in range(n)]     # P1(행) 승리 수
+    draws   = [[0] * n for _ in range(n)]     # 무승부 수 (동시 사망 + 시간 초과)
+    ttk_sum = [[0.0] * n for _ in range(n)]   # 결착 전투(시간 초과 제외) 전투 시간 합
+    ttk_n   = [[0] * n for _ in range(n)]
+    per_level = {}                            # level -> 결과 행 목록 (레벨별 요약용)
+    TABLES.warm("character_tier", "potion", "weapon_stat", "weapon_enhance_stat", "level_exp",
+                version="v1")
+    t0 = time.monotonic()
+    with Pool(initializer=TABLES.preload, initargs=(TABLES.snapshot(),)) as pool:
+        task_args = [(lv, configs, duration) for lv in levels]
+        for done, (lv, rows) in enumerate(pool.imap_unordered(_pvp_matrix_worker, task_args), 1):
+            per_level[lv] = rows
+            for i, j, winner, combat_time in rows:
+                cells = ((i, j, 1),) if i == j else ((i, j, 1), (j, i, 2))
+                for r, c, me in cells:
+                    if winner == me:
+                        wins[r][c] += 1
+                    elif winner == 0:
+                        draws[r][c] += 1
+                    if combat_time < duration:
+                        ttk_sum[r][c] += combat_time
+                        ttk_n[r][c]   += 1
+            print(f"\r  실행 중... {done}/{len(levels)} 레벨", end="", flush=True)
+    print(f"\r  완료! {time.monotonic() - t0:.1f}초{' ' * 20}\n")
+
+    labels = [f"T{t}+{e}" for t, e in configs]
+    W      = 8 + 7 * n
+    L      = len(levels)
+    for title, cell in (
+            ("승률 (%, 행 = P1 무기)", lambda i, j: f"{wins[i][j] / L * 100:6.0f}"),
+            ("무승부율 (%)",           lambda i, j: f"{draws[i][j] / L * 100:6.0f}"),
+            ("평균 TTK (초, 결착 전투)",
+             lambda i, j: f"{ttk_sum[i][j] / ttk_n[i][j]:6.1f}" if ttk_n[i][j] else f"{'-':>6}")):
+        print("=" * W)
+        print(f"  [PvP {title}]  Lv.1~{max_level}")
+        print("=" * W)
+        print(f"  {'':>6}" + "".join(f" {lb:>6}" for lb in labels))
+        print("-" * W)
+        for i in range(n):
+            print(f"  {labels[i]:>6}" + "".join(f" {cell(i, j)}" for j in range(n)))
+        print("=" * W)
+        print()
+
+    # ── 레벨별 요약: 결착/동시 사망/시간 초과 수, 결착 TTK, 최다 승 무기 ──
+    print("=" * 72)
+    print(f"  [PvP 레벨별 요약]  무기 쌍 {n * (n + 1) // 2}개 / 레벨")
+    print("=" * 72)
+    print(f"  {'Lv':>4} {'결착':>6} {'동시사망':>8} {'시간초과':>8} {'평균TTK':>8}  최다 승 무기 (승/전)")
+    print("-" * 72)
+    for lv in levels:
+        rows    = per_level[lv]
+        decided = [ct for _, _, w, ct in rows if w != 0]
+        mutual  = sum(1 for _, _, w, ct in rows if w == 0 and ct < duration)
+        timeout = sum(1 for _, _, w, ct in rows if w == 0 and ct >= duration)
+        kills   = [ct for _, _, _, ct in rows if ct < duration]
+        won     = [0] * n
+        for i, j, w, _ in rows:
+            if w == 1:
+                won[i] += 1
+            elif w == 2:
+                won[j] += 1
+        best    = max(range(n), key=won.__getitem__)
+        avg_ttk = f"{sum(kills) / len(kills):7.1f}s" if kills else f"{'-':>8}"
+        print(f"  {lv:>4} {len(decided):>6} {mutual:>8} {timeout:>8} {avg_ttk}  "
+              f"{labels[best]} ({won[best]}/{n})")
+    print("=" * 72)
+    print()
+
+
 # =========================================================
 #  레벨 → 몬스터 티어 매핑 (10레벨마다 Tier 1씩 증가)
 # =========================================================
@@ -783,10 +1929,10 @@ def _tier_for_level(level: int) -> int:
     Lv. 1-10  → Tier 1
     Lv.11-20  → Tier 2
     Lv.21-30  → Tier 3  ...
-    최대 티어는 MONSTER_TEMPLATES 에 존재하는 최고 Tier 로 제한.
+    최대 티어는 v1 몬스터 템플릿에 존재하는 최고 Tier 로 제한.
     """
     tier = (level - 1) // 10 + 1
-    return min(tier, max(MONSTER_TEMPLATES.keys()))
+    return min(tier, max(TABLES.get("monster_templates", "v1").keys()))
 
 
 # =========================================================
@@ -798,7 +1944,10 @@ def _tier_for_level(level: int) -> int:
 def _run_leveling(target_level: int = 70, difficulty: str = "Normal",
                   exp_version: str = "v1", seed: int = None,
                   level_exp_table: dict = None, monster_templates: dict = None,
-                  lite: bool = False) -> dict:
+                  lite: bool = False, use_fight_cache: bool = True,
+                  fight_cache: FightCache = None, analytic_fight: bool = True,
+                  rand=None, importance=None, reference: bool = False,
+                  max_defeats: int = None) -> dict:
     """
     레벨업 시뮬레이션 루프를 실행하고 통계 dict 를 반환 (화면 출력 없음).
 
@@ -808,20 +1957,42 @@ def _run_leveling(target_level: int = 70, difficulty: str = "Normal",
     monster_templates: 사전 로딩된 몬스터 템플릿. None 이면 CSV 에서 로드.
     lite             : True 이면 Monte Carlo 전용 경량 모드 (티어별 세부 통계 생략).
     seed             : random.seed() 값. None 이면 시드 미설정.
+    use_fight_cache  : True 이면 FightCache 로 전투 결과 재사용 (결과는 캐시 미사용과 동일).
+    fight_cache      : 사용할 캐시. None 이면 프로세스 공용 FIGHT_CACHE.
+    analytic_fight   : True 이면 해석적 솔버(_fight_analytic) 우선 사용, 불가 시 _fight 로 대체.
+    rand             : [0, 1) 균등 난수 함수 (예: _run_stream(마스터 시드, 런 번호)),
+                       또는 _CRNStreams — 사냥터 티어·용도(그룹 크기/드랍/강화)별 스트림 (공통 난수 비교).
+                       None 이면 전역 random.random (seed 가 있으면 random.seed(seed) 후).
+                       lite/전체 모드는 같은 순서로 난수를 소비하므로 같은 rand 면 결과가 같음.
+    importance       : _RareEventIS — 드랍·강화를 제안 분포에서 추출하고 우도비를 누적
+                       (희귀 이벤트 추정용, 런마다 wrap() 으로 상태 초기화).
+    reference        : True 이면 드랍·강화를 참조 구현(ReferenceDropSampler / ReferenceEnhance —
+                       처치마다 random() 판정, 강화 단계마다 _run_enhance)으로 실행 (--validate 용, 느림).
+                       고속 샘플러와 분포는 같지만 난수 소비 순서가 달라 같은 시드의 결과는 다름.
+    max_defeats      : 연속 패배가 이 횟수에 이르면 진행 불가로 보고 중단하고
+                       {"unreachable": True, "level": 멈춘 레벨} 반환 (None = 제한 없음).
     """
-    if seed is not None:
-        random.seed(seed)
+    if rand is None:
+        if seed is not None:
+            random.seed(seed)
+        rand = random.random
+    crn = rand if isinstance(rand, _CRNStreams) else None
+    rand_group = rand_drop = rand_enh = rand
+    crn_tier   = None
 
     # 테이블 로딩 — 미리 로드된 값이 없을 때만 CSV 읽기
     if level_exp_table is None:
-        level_exp_table = _load_level_exp_table(exp_version)
+        level_exp_table = TABLES.get("level_exp", exp_version)
     if not level_exp_table:
         return {}
     if monster_templates is None:
-        monster_templates = _load_monster_templates(exp_version) or MONSTER_TEMPLATES
+        monster_templates = _monster_templates_for(exp_version)
 
-    ABSORPTION_TIME = 8.0
     max_tier = max(monster_templates.keys())
+    if use_fight_cache and fight_cache is None:
+        fight_cache = FIGHT_CACHE
+    # 루프에서 쓰는 테이블 값은 런 시작 시 한 번만 조회
+    tier_of = [_tier_for_level(max(lv, 1)) for lv in range(max(level_exp_table) + 2)]
 
     player = Character(level=1, exp_table=level_exp_table)
 
@@ -830,6 +2001,18 @@ def _run_leveling(target_level: int = 70, difficulty: str = "Normal",
     weapon_drops      = {name: 0 for name in WEAPON_NAMES}
     weapon_equips     = 0
     weapons_destroyed = 0
+    gap_tier, drop_gap = None, 0   # 무기 드랍 기하 간격 상태 (WeaponDropSampler.gap)
+    monster_group = MonsterGroup()
+    drop_samplers = TABLES.get("drop_samplers")
+    enhance_dist  = TABLES.get("enhance_dist")
+    weapon_atk    = TABLES.get("weapon_atk")
+    prof          = PROFILER   # 계측 (None 이면 아래 'prof is not None' 분기만 비용)
+    if reference:
+        drop_samplers = {t: ReferenceDropSampler(wt["weights"])
+                         for t, wt in TABLES.get("weapon_drop").items() if wt["total"] > 0}
+        enhance_dist  = ReferenceEnhance(TABLES.get("enhance"))
+    if importance is not None:
+        drop_samplers, enhance_dist = importance.wrap(drop_samplers, enhance_dist)
 
     # ── 전체 모드 전용 — 상세 통계 구조 초기화 ──────────────
     if not lite:
@@ -849,12 +2032,15 @@ def _run_leveling(target_level: int = 70, difficulty: str = "Normal",
         tier_groups_3     = {t: 0   for t in range(1, max_tier + 1)}
         tier_combat_time  = {t: 0.0 for t in range(1, max_tier + 1)}
 
+    defeats = 0
     while player.level < target_level:
-        tier  = _tier_for_level(player.level)
-        count = 2 if random.random() < 0.4 else 3
-        monsters = [Monster(tier=tier, index=i, difficulty=difficulty,
-                            templates=monster_templates)
-                    for i in range(count)]
+        if prof is not None:
+            t_ph = time.perf_counter()
+        tier  = tier_of[player.level]
+        if crn is not None and tier != crn_tier:
+            crn_tier = tier
+            rand_group, rand_drop, rand_enh = crn.for_tier(tier)
+        count = 2 if rand_group() < 0.4 else 3
 
         if not lite:
             if count == 2:
@@ -864,93 +2050,108 @@ def _run_leveling(target_level: int = 70, difficulty: str = "Normal",
             total_fights      += 1
             tier_fights[tier] += 1
 
-        victory, exp_gained, kills, combat_time = _fight(player, monsters, sim_time=total_time)
+        if use_fight_cache:
+            victory, exp_gained, kills, combat_time = fight_cache.fight(
+                player, tier, count, difficulty, monster_templates, sim_time=total_time,
+                analytic=analytic_fight)
+        else:
+            monsters = monster_group.fill(tier, count, difficulty, monster_templates)
+            engine = _fight_fast if analytic_fight else _fight
+            victory, exp_gained, kills, combat_time = engine(player, monsters, sim_time=total_time)
 
         total_time += combat_time
         if not lite:
             total_kills            += kills
             tier_kills[tier]       += kills
             tier_combat_time[tier] += combat_time
-
-        # ── 무기 드랍 (2단계: 총확률 1회 → 무기 종류 가중 선택) ──
-        wt = WEAPON_DROP_TABLE.get(tier)
-        if wt and wt["total"] > 0:
-            for _ in range(kills):
-                if random.random() < wt["total"]:
-                    chosen = random.choices(WEAPON_NAMES, weights=wt["weights"])[0]
-                    weapon_drops[chosen] += 1
-                    if not lite:
-                        tier_weapon_drops[tier][chosen] += 1
-                    # ── 무기 대결: 한쪽이 파괴/폐기될 때까지 교대로 강화 도전 ──
-                    ch_type, ch_tier, ch_enhance = chosen, tier, 0
-                    while True:
-                        enh_lv, eq, dest = _run_enhance(
-                            ENHANCE_TABLE, ch_tier, player.atk, ch_enhance)
-                        if dest:
-                            if not lite:
-                                enhance_destroyed[enh_lv] += 1
-                            weapons_destroyed += 1
-                            break
-                        elif eq:
-                            # 승자 ATK 는 lite/full 모두 필요
-                            win_type, win_tier, win_enhance = ch_type, ch_tier, enh_lv
-                            win_atk = calc_weapon_atk(ch_tier, enh_lv)
-                            if not lite:
-                                enhance_equipped[enh_lv] += 1
-                                weapon_log.append({
-                                    "level":       player.level,
-                                    "old_type":    player.weapon_type,
-                                    "old_tier":    player.weapon_tier,
-                                    "old_enhance": player.weapon_enhance,
-                                    "old_atk":     player.atk,
-                                    "new_type":    ch_type,
-                                    "new_tier":    ch_tier,
-                                    "new_enhance": enh_lv,
-                                    "new_atk":     win_atk,
-                                })
-                            ch_type    = player.weapon_type
-                            ch_tier    = player.weapon_tier
-                            ch_enhance = player.weapon_enhance
-                            player.weapon_type    = win_type
-                            player.weapon_tier    = win_tier
-                            player.weapon_enhance = win_enhance
-                            player.atk            = win_atk
-                            weapon_equips += 1
-                        else:
-                            if not lite:
-                                enhance_discarded[enh_lv] += 1
-                            break
+        if prof is not None:
+            t_ph = prof.lap("fight", t_ph)
+            prof.counters["fights"]    += 1
+            prof.counters["rng_draws"] += 1
+
+        # ── 무기 드랍 (기하 간격으로 드랍 처치까지 건너뜀 → alias 테이블로 종류 선택) ──
+        # drop_gap 은 티어가 같은 동안 전투를 넘어 이어짐. 티어가 바뀌면 새 드랍률로 다시 뽑음
+        # (기하분포의 무기억성으로 처치마다 판정하는 것과 같은 분포).
+        sampler = drop_samplers.get(tier)
+        if sampler:
+            if gap_tier != tier:
+                gap_tier, drop_gap = tier, sampler.gap(rand_drop)
+                if prof is not None:
+                    prof.counters["rng_draws"] += 1
+            left = kills
+            while drop_gap < left:
+                left    -= drop_gap + 1
+                drop_gap = sampler.gap(rand_drop)
+                chosen   = WEAPON_NAMES[sampler.choose(rand_drop)]
+                if prof is not None:
+                    prof.counters["drops"]     += 1
+                    prof.counters["rng_draws"] += 2
+                weapon_drops[chosen] += 1
+                if not lite:
+                    tier_weapon_drops[tier][chosen] += 1
+                # ── 무기 대결: 한쪽이 파괴/폐기될 때까지 교대로 강화 도전 ──
+                ch_type, ch_tier, ch_enhance = chosen, tier, 0
+                while True:
+                    enh_lv, eq, dest = enhance_dist.sample(ch_tier, player.atk, ch_enhance, rand_enh)
+                    if prof is not None:
+                        prof.counters["enhance_samples"]  += 1
+                        prof.counters["rng_draws"]        += 1
+                        prof.counters["enhance_attempts"] += enh_lv - ch_enhance + (1 if dest else 0)
+                    if dest:
+                        if not lite:
+                            enhance_destroyed[enh_lv] += 1
+                        weapons_destroyed += 1
+                        break
+                    elif eq:
+                        # 승자 ATK 는 lite/full 모두 필요
+                        win_type, win_tier, win_enhance = ch_type, ch_tier, enh_lv
+                        win_atk = weapon_atk[ch_tier][enh_lv]
+                        if not lite:
+                            enhance_equipped[enh_lv] += 1
+                            weapon_log.append({
+                                "level":       player.level,
+                                "old_type":    player.weapon_type,
+                                "old_tier":    player.weapon_tier,
+                                "old_enhance": player.weapon_enhance,
+                                "old_atk":     player.atk,
+                                "new_type":    ch_type,
+                                "new_tier":    ch_tier,
+                                "new_enhance": enh_lv,
+                                "new_atk":     win_atk,
+                            })
+                        ch_type    = player.weapon_type
+                        ch_tier    = player.weapon_tier
+                        ch_enhance = player.weapon_enhance
+                        player.weapon_type    = win_type
+                        player.weapon_tier    = win_tier
+                        player.weapon_enhance = win_enhance
+                        player.atk            = win_atk
+                        weapon_equips += 1
+                    else:
+                        if not lite:
+                            enhance_discarded[enh_lv] += 1
+                        break
+            drop_gap -= left
+        if prof is not None:
+            t_ph = prof.lap("drop", t_ph)
 
         if victory:
+            defeats = 0
             leveled = player.add_exp(exp_gained)
             if not lite:
                 for lv in leveled:
                     if lv not in level_time:
                         level_time[lv] = total_time
+        else:
+            defeats += 1
+            if max_defeats is not None and defeats >= max_defeats:
+                return {"unreachable": True, "level": player.level}
 
-        player.reset_for_next_fight()
-
-        # ── 1차 음식 섭취 (전투 직후) ──────────────────────
-        if (player.hp < player.max_hp and
-                total_time - player.last_food_time >= FOOD_COOLDOWN):
-            food = FOOD_TABLE[_consumable_tier(player.level)]
-            player.hp = min(player.max_hp, player.hp + food["heal"])
-            player.last_food_time = total_time
-
-        rest = ABSORPTION_TIME
-
-        # ── HP 50% 이하 → 쿨타임(20초) 더 대기 후 2차 섭취 ──
-        if player.hp / player.max_hp <= 0.5:
-            rest += FOOD_COOLDOWN
-            eat_time = total_time + rest
-            if (player.hp < player.max_hp and
-                    eat_time - player.last_food_time >= FOOD_COOLDOWN):
-                food = FOOD_TABLE[_consumable_tier(player.level)]
-                player.hp = min(player.max_hp, player.hp + food["heal"])
-                player.last_food_time = eat_time
-
+        rest = _rest_after_fight(player, total_time)
         total_rest_time += rest
         total_time      += rest
+        if prof is not None:
+            prof.lap("rest", t_ph)
 
     final_weapon = {
         "type":    player.weapon_type,
@@ -1173,13 +2374,22 @@ def _print_leveling_stats(stats: dict, show_weapon_log: bool = False):
         print("=" * W)
 
 
+@TABLES.fresh
 def simulate_leveling(target_level: int = 70, difficulty: str = "Normal",
                       exp_version: str = "v1", seed: int = None,
-                      show_weapon_log: bool = False):
-    """레벨업 시뮬레이션 실행 및 결과 출력."""
-    max_tier = max(MONSTER_TEMPLATES.keys())
-
-    level_exp_table = _load_level_exp_table(exp_version)
+                      show_weapon_log: bool = False, use_fight_cache: bool = True,
+                      analytic_fight: bool = True, profile: bool = False,
+                      profile_out: str = None, cache: ResultCache = None,
+                      replay: int = None):
+    """레벨업 시뮬레이션 실행 및 결과 출력.
+    profile    : True 이면 Profiler 계측 결과(전투/초, 이벤트/초, 단계별 시간)를 함께 출력.
+    profile_out: 지정 시 cProfile pstats 덤프(또는 '.folded' 이면 folded-stack)를 저장.
+    cache      : ResultCache — 시드가 고정되어 있고 계측 중이 아니면 결과를 재사용/저장.
+    replay     : Monte Carlo 런 번호 — seed 를 마스터 시드로 보고 그 런의 난수열
+                 (_run_stream(seed, replay))로 전체 모드 재실행 (무기 로그 포함)."""
+    max_tier = max(TABLES.get("monster_templates", "v1").keys())
+
+    level_exp_table = TABLES.get("level_exp", exp_version)
     if not level_exp_table:
         print(f"  [오류] EXP 버전 '{exp_version}' 에 데이터가 없습니다.")
         print(f"  level_exp.csv 의 '{exp_version}' 열을 채워주세요.")
@@ -1187,284 +2397,3358 @@ def simulate_leveling(target_level: int = 70, difficulty: str = "Normal",
 
     print(f"  레벨업 시뮬레이션 시작: Lv.1 -> Lv.{target_level}"
           f"  (난이도: {difficulty} / EXP:{exp_version}"
-          + (f" / seed:{seed}" if seed is not None else "") + ")")
+          + (f" / seed:{seed}" if seed is not None else "")
+          + (f" / 런 #{replay:,}" if replay is not None else "") + ")")
     print(f"  티어 전환: " + "  /  ".join(
         f"Lv.{t * 10 + 1}~ Tier{t + 1}"
         for t in range(1, min((target_level - 1) // 10 + 1, max_tier))
     ))
     print("  계산 중...", end="", flush=True)
 
-    stats = _run_leveling(target_level, difficulty, exp_version, seed)
-
-    print(" 완료!\n")
+    cache_key = None
+    if cache is not None and seed is not None and not (profile or profile_out):
+        cache_key = cache.key("leveling", target_level=target_level, difficulty=difficulty,
+                              exp_version=exp_version, seed=seed, replay=replay)
+        stats = cache.get("leveling", cache_key)
+        if stats is not None:
+            print(f" 결과 캐시 적중 ({cache.root})\n")
+            _print_leveling_stats(stats, show_weapon_log=show_weapon_log)
+            return
+
+    hits0, misses0 = FIGHT_CACHE.hits, FIGHT_CACHE.misses
+    rand = _run_stream(seed, replay) if replay is not None else None
+    prof = None
+    if profile or profile_out:
+        stats, prof = _profiled_call(_run_leveling, profile_out, target_level, difficulty,
+                                     exp_version, seed, use_fight_cache=use_fight_cache,
+                                     analytic_fight=analytic_fight, rand=rand)
+    else:
+        stats = _run_leveling(target_level, difficulty, exp_version, seed,
+                              use_fight_cache=use_fight_cache, analytic_fight=analytic_fight,
+                              rand=rand)
+    if cache_key is not None:
+        cache.put("leveling", cache_key, stats)
+
+    if use_fight_cache:
+        hits   = FIGHT_CACHE.hits   - hits0
+        misses = FIGHT_CACHE.misses - misses0
+        rate   = hits / (hits + misses) * 100 if hits + misses else 0.0
+        print(f" 완료!  (전투 캐시 적중 {hits:,} / 미스 {misses:,}  = {rate:.1f}%)\n")
+    else:
+        print(" 완료!\n")
     _print_leveling_stats(stats, show_weapon_log=show_weapon_log)
+    if prof is not None:
+        print()
+        prof.report("계측 결과 — _run_leveling 1회")
+        if profile_out:
+            kind = "folded-stack" if profile_out.endswith(".folded") else "cProfile pstats"
+            print(f"  {kind} 저장: {profile_out}")
+
+
+# =========================================================
+#  배치 레벨업 엔진 (NumPy lock-step, lite 모드 전용)
+# =========================================================
+class _UniformStream:
+    """NumPy Generator 에서 균등 난수를 블록 단위로 미리 뽑아 두고 1개씩 꺼내 쓰는 호출 객체.
+    random.random 대신 EnhanceDistTable.sample(rand=...) 등에 전달."""
+    def __init__(self, rng, block: int = 4096):
+        self._rng   = rng
+        self._block = block
+        self._buf   = []
+        self._pos   = 0
+
+    def __call__(self) -> float:
+        if self._pos >= len(self._buf):
+            self._buf = self._rng.random(self._block).tolist()
+            self._pos = 0
+        u = self._buf[self._pos]
+        self._pos += 1
+        return u
+
+
+def _run_stream(master_seed: int, run_id: int, stream: tuple = ()):
+    """
+    (마스터 시드, 런 번호) 로 정해지는 런 전용 [0, 1) 균등 난수 함수 — _run_leveling(rand=...) 용.
+    random.Random("master_seed:run_id") — 문자열 시드는 SHA-512 로 상태를 정하므로 numpy 유무·
+    플랫폼과 무관하게 같은 난수열 (RNG_STREAM_VERSION). 런마다 독립 스트림이므로 어느 워커가
+    어떤 순서로 실행해도 같은 런 번호는 같은 결과 — 백만 회 중 런 하나만 따로 재실행(--replay) 가능.
+    stream: 같은 런 안의 하위 스트림 식별자 ("master_seed:run_id:*stream", _CRNStreams 용).
+    """
+    key = (master_seed, run_id) + tuple(stream)
+    return random.Random(":".join(map(str, key))).random
+
+
+class _CRNStreams:
+    """
+    공통 난수(common random numbers) 비교용 — 런 1개의 (사냥터 티어, 용도) 별 독립 스트림 묶음.
+    한 스트림으로 모든 난수를 뽑으면 조건(EXP 버전·난이도)이 달라 전투 수가 한 번만 달라져도
+    이후 드랍·강화 난수가 전부 어긋남. 티어마다 그룹 크기 / 드랍(간격·종류) / 강화 스트림을
+    따로 두면, 조건과 무관하게 티어 t 의 k 번째 전투·드랍·강화 추출이 같은 난수를 씀
+    (모두 역변환 1회 추출이라 같은 난수 → 가까운 결과).
+    """
+    PURPOSES = 3   # 그룹 크기, 드랍, 강화
+
+    def __init__(self, master_seed: int, run_id: int):
+        self.master_seed = master_seed
+        self.run_id      = run_id
+        self._tiers      = {}
+
+    def for_tier(self, tier: int) -> tuple:
+        """티어 tier 의 (그룹 크기, 드랍, 강화) 난수 함수 — 처음 요청 시 생성."""
+        streams = self._tiers.get(tier)
+        if streams is None:
+            streams = self._tiers[tier] = tuple(
+                _run_stream(self.master_seed, self.run_id, stream=(tier, k))
+                for k in range(self.PURPOSES))
+        return streams
+
+
+def _chunk_seed(master_seed: int, start: int, size: int):
+    """배치 작업(런 start..start+size-1)의 run_leveling_batch 시드. 배치 엔진은 스텝 단위로
+    난수를 일괄 추출하므로 재현 단위는 런이 아니라 (마스터 시드, 작업 구간)."""
+    return np.random.SeedSequence(master_seed, spawn_key=(start, size))
+
+
+def _batch_fight(st: dict, rows, tier, count, mon: dict, duration: float = 300.0):
+    """
+    rows 에 해당하는 런들의 전투 1회를 동시에 계산 (_fight_analytic 의 벡터화 버전).
+    st 의 플레이어 상태 배열(hp, mp, lu, last_potion)을 직접 갱신.
+
+    원소별 부동소수 연산 순서가 스칼라 엔진과 같으므로 런 하나만 보면 _fight 와 같은 결과.
+    루프마다 끝난 런을 작업 배열에서 제외(compaction)해 가장 긴 전투에 끌려가지 않음.
+    플레이어 사망·시간 초과 등 해석적 경로가 불가한 런은 상태를 되돌린 뒤
+    스칼라 _fight_fast 로 개별 계산.
+    Returns: (victory[bool], exp_gained[int], kills[int], combat_time[float]) 배열
+    """
+    M      = len(rows)
+    sk     = mon["skills"]
+    sim    = st["total_time"][rows]
+    mp     = st["mp"][rows]
+    lu     = st["lu"][rows]
+    period = mon["period"][tier]
+    slots  = np.arange(3)
+    unsafe = ~mon["integral"][tier]
+    interval = 1.0 / st["attack_speed"]
+
+    death_t     = np.where(slots[None, :] < count[:, None], np.inf, -np.inf)
+    death_pf    = np.ones((M, 3), dtype=bool)
+    final_t     = np.zeros(M)
+    final_pf    = np.ones(M, dtype=bool)
+    next_player = np.zeros(M)
+
+    # ── 1단계: 플레이어 행동 시각표 (진행 중인 런만 작업 배열에 유지) ──
+    pos   = np.flatnonzero(~unsafe)
+    w_t   = np.zeros(len(pos))
+    w_pf  = np.ones(len(pos), dtype=bool)
+    w_lb  = np.full(len(pos), -999.0)
+    w_mp  = mp[pos]
+    w_lu  = lu[pos]
+    w_sim = sim[pos]
+    w_atk = st["atk"][rows[pos]]
+    w_red = mon["defe"][tier[pos]]
+    w_red = w_red / (w_red + 500.0)
+    w_per = period[pos]
+    w_dt  = death_t[pos]
+    w_dpf = death_pf[pos]
+    w_alive = w_dt == np.inf
+    w_mhp = np.where(w_alive, mon["hp"][tier[pos]][:, None], 0.0)
+    while len(pos):
+        abs_time = w_sim + w_t
+        ready    = ((abs_time[:, None] - w_lu >= sk["cooldown"]) &
+                    (w_mp[:, None] >= sk["mana_cost"]))
+        use      = ready.any(axis=1)
+        sidx     = ready.argmax(axis=1)
+        ui       = np.flatnonzero(use)
+        us       = sidx[ui]
+        w_mp[ui] -= sk["mana_cost"][us]
+        w_lu[ui, us] = abs_time[ui]
+        basic    = ~use & (w_t - w_lb >= interval)
+        w_lb[basic] = w_t[basic]
+        attack   = use | basic
+        raw      = np.where(use, w_atk * sk["multiplier"][sidx], w_atk)
+        aoe      = use & sk["is_aoe"][sidx]
+        hit      = np.where(aoe[:, None], w_alive,
+                            slots[None, :] == w_alive.argmax(axis=1)[:, None]) & attack[:, None]
+        dmg      = np.maximum(1.0, raw * (1.0 - w_red))
+        w_mhp    = np.where(hit, np.maximum(0.0, w_mhp - dmg[:, None]), w_mhp)
+        killed   = hit & (w_mhp <= 0.0)
+        if killed.any():
+            w_dt    = np.where(killed, w_t[:, None], w_dt)
+            w_dpf   = np.where(killed, w_pf[:, None], w_dpf)
+            w_alive = w_alive & ~killed
+
+        next_t = np.where(use, w_t + sk["cast_time"][sidx], w_t + interval)
+        idle   = ~attack
+        if idle.any():
+            ii = np.flatnonzero(idle)
+            next_skill = np.where(w_mp[ii, None] >= sk["mana_cost"],
+                                  w_lu[ii] + sk["cooldown"], np.inf).min(axis=1)
+            next_t[ii] = np.maximum(w_t[ii] + 0.05,
+                                    np.minimum(w_lb[ii] + interval, next_skill))
+
+        done = attack & ~w_alive.any(axis=1)
+        over = ~done & (next_t > duration)
+        fin  = done | over
+        if fin.any():
+            d = pos[done]
+            final_t[d]     = w_t[done]
+            final_pf[d]    = w_pf[done]
+            next_player[d] = next_t[done]
+            unsafe[pos[over]] = True
+            f = pos[fin]
+            mp[f]       = w_mp[fin]
+            lu[f]       = w_lu[fin]
+            death_t[f]  = w_dt[fin]
+            death_pf[f] = w_dpf[fin]
+            keep  = ~fin
+            pos   = pos[keep]
+            w_t, w_pf, w_lb, w_mp, w_lu = w_t[keep], w_pf[keep], w_lb[keep], w_mp[keep], w_lu[keep]
+            w_sim, w_atk, w_red, w_per  = w_sim[keep], w_atk[keep], w_red[keep], w_per[keep]
+            w_dt, w_dpf, w_alive, w_mhp = w_dt[keep], w_dpf[keep], w_alive[keep], w_mhp[keep]
+            next_t = next_t[keep]
+        # 다음 플레이어 이벤트와 같은 시각 몬스터 이벤트의 힙 순서 (_fight_analytic 과 동일 규칙)
+        pushed_m = next_t - w_per
+        w_pf = np.where(next_t % w_per == 0.0,
+                        (w_t < pushed_m) | ((w_t == pushed_m) & w_pf), w_pf)
+        w_t  = next_t
+
+    # ── 2단계: 몬스터 공격 (주기적 타격, 처치 시각까지 — 타격이 끝난 런은 제외) ──
+    hp         = st["hp"][rows]
+    lpot       = st["last_potion"][rows]
+    next_event = np.where(death_t == -np.inf, np.inf, 0.0)
+    pos    = np.flatnonzero(~unsafe)
+    w_hp   = hp[pos]
+    w_lp   = lpot[pos]
+    w_ne   = next_event[pos]
+    w_dt   = death_t[pos]
+    w_dpf  = death_pf[pos]
+    w_sim  = sim[pos]
+    w_per  = period[pos]
+    w_max  = st["max_hp"][rows[pos]]
+    w_heal = mon["potion_heal"][st["level"][rows[pos]]]
+    p_def  = st["defe"][rows[pos]]
+    w_hit  = np.maximum(1.0, mon["atk"][tier[pos]] * (1.0 - p_def / (p_def + 500.0)))
+    w_T    = np.zeros(len(pos))
+    while len(pos):
+        any_att = np.zeros(len(pos), dtype=bool)
+        died    = np.zeros(len(pos), dtype=bool)
+        for j in range(3):
+            att = ~died & ((w_dt[:, j] > w_T) | ((w_dt[:, j] == w_T) & ~w_dpf[:, j]))
+            if not att.any():
+                continue
+            any_att |= att
+            w_ne[att, j] = w_T[att] + w_per[att]
+            w_hp   = np.where(att, np.maximum(0.0, w_hp - w_hit), w_hp)
+            died  |= att & (w_hp <= 0.0)
+            abs_time = w_sim + w_T
+            potion = (att & ~died & (w_hp / w_max < POTION_HP_THRESHOLD) &
+                      (abs_time - w_lp >= POTION_COOLDOWN))
+            if potion.any():
+                w_hp = np.where(potion, np.minimum(w_max, w_hp + w_heal), w_hp)
+                w_lp = np.where(potion, abs_time, w_lp)
+        unsafe[pos[died]] = True
+        fin = ~any_att | died
+        if fin.any():
+            f = pos[fin]
+            hp[f]         = w_hp[fin]
+            lpot[f]       = w_lp[fin]
+            next_event[f] = w_ne[fin]
+            keep = ~fin
+            pos  = pos[keep]
+            w_hp, w_lp, w_ne, w_dt, w_dpf = w_hp[keep], w_lp[keep], w_ne[keep], w_dt[keep], w_dpf[keep]
+            w_sim, w_per, w_max, w_heal   = w_sim[keep], w_per[keep], w_max[keep], w_heal[keep]
+            w_hit, w_T                    = w_hit[keep], w_T[keep]
+        w_T = w_T + w_per
+
+    after = (next_event > final_t[:, None]) | ((next_event == final_t[:, None]) & final_pf[:, None])
+    combat_time = np.minimum(np.minimum(next_player, np.where(after, next_event, np.inf).min(axis=1)),
+                             duration)
+    victory = np.ones(M, dtype=bool)
+    kills   = count.copy()
+    exp     = count * mon["exp"][tier]
+
+    # ── 해석적 경로 불가 런: 원래 상태로 스칼라 엔진 실행 ──
+    safe = ~unsafe
+    sr   = rows[safe]
+    st["hp"][sr]          = hp[safe]
+    st["mp"][sr]          = mp[safe]
+    st["lu"][sr]          = lu[safe]
+    st["last_potion"][sr] = lpot[safe]
+    for k in np.nonzero(unsafe)[0]:
+        r = rows[k]
+        player = mon["scratch"]
+        player.level  = int(st["level"][r])
+        player._bind_consumables()
+        player.max_hp = st["max_hp"][r]
+        player.hp     = float(st["hp"][r])
+        player.mp     = float(st["mp"][r])
+        player.defe   = st["defe"][r]
+        player.atk    = int(st["atk"][r])
+        player.last_basic_attack_time = -999.0
+        player.last_potion_time       = float(st["last_potion"][r])
+        for i, s in enumerate(player.skill_list):
+            s.last_used_time = float(st["lu"][r, i])
+        monsters = [Monster(tier=int(tier[k]), index=i, difficulty=mon["difficulty"],
+                            templates=mon["templates"])
+                    for i in range(int(count[k]))]
+        v, e, kl, ct = _fight_fast(player, monsters, duration, float(sim[k]))
+        victory[k], exp[k], kills[k], combat_time[k] = v, e, kl, ct
+        st["hp"][r] = player.hp
+        st["mp"][r] = player.mp
+        st["last_potion"][r] = player.last_potion_time
+        for i, s in enumerate(player.skill_list):
+            st["lu"][r, i] = s.last_used_time
+    return victory, exp, kills, combat_time
+
+
+def run_leveling_batch(n: int, target_level: int = 70, difficulty: str = "Normal",
+                       exp_version: str = "v1", seed: int = None,
+                       level_exp_table: dict = None, monster_templates: dict = None) -> dict:
+    """
+    _run_leveling(lite=True) n회를 구조체-배열(struct-of-arrays) 형태로 한꺼번에 진행.
+
+    레벨/EXP/HP/MP/ATK/무기 티어·강화/스킬 타이머를 NumPy 배열로 두고, 매 스텝마다
+    모든 진행 중 런이 전투 1회씩을 동시에 수행 (그룹 크기·드랍·강화 난수는 스텝 단위로 일괄 추출).
+    규칙은 _run_leveling 과 동일하나 난수열이 다르므로 런별 결과가 아닌 분포가 일치.
+
+    반환: {"total_time", "weapon_drops"(n×무기종류), "weapon_equips", "weapons_destroyed",
+           "final_type"(WEAPON_NAMES 인덱스), "final_tier", "final_enhance", "final_atk"}
+          — 모두 길이 n 의 배열. EXP 버전 데이터가 없으면 빈 dict.
+    """
+    if np is None:
+        raise ImportError("run_leveling_batch 에는 numpy 가 필요합니다 (pip install numpy).")
+    if level_exp_table is None:
+        level_exp_table = TABLES.get("level_exp", exp_version)
+    if not level_exp_table:
+        return {}
+    if monster_templates is None:
+        monster_templates = _monster_templates_for(exp_version)
+
+    rng      = np.random.default_rng(seed)
+    rand     = _UniformStream(rng)
+    max_tier = max(monster_templates.keys())
+    max_ct   = max(TABLES.get("character_tier").keys())
+    max_lv   = max(max(level_exp_table.keys()), target_level) + 2
+
+    # ── 레벨/티어별 조회 테이블 ──────────────────────────
+    lv       = np.arange(max_lv + 1)
+    exp_req  = np.array([level_exp_table.get(l, np.inf) for l in range(max_lv + 1)], dtype=float)
+    char_def = np.array([TABLES.get("character_tier")[min(max(l - 1, 0) // 10 + 1, max_ct)]["defe"]
+                         for l in range(max_lv + 1)], dtype=float)
+    lv_tier  = np.minimum((np.maximum(lv, 1) - 1) // 10 + 1, max_tier)
+    cons     = np.array([_consumable_tier(max(l, 1)) for l in range(max_lv + 1)])
+    food     = np.array([f["heal"] for f in TABLES.get("food")], dtype=float)[cons]
+    proto    = {t: Monster(tier=t, difficulty=difficulty, templates=monster_templates)
+                for t in range(1, max_tier + 1)}
+    def _tier_arr(fn, dtype=float):
+        return np.array([fn(proto[t]) if t in proto else 0 for t in range(max_tier + 1)], dtype=dtype)
+    periods  = _tier_arr(lambda m: 1.0 / m.attack_speed)
+    scratch  = Character(level=1, exp_table=level_exp_table)
+    mon = {
+        "atk":         _tier_arr(lambda m: m.atk),
+        "defe":        _tier_arr(lambda m: m.defe),
+        "hp":          _tier_arr(lambda m: m.max_hp),
+        "exp":         _tier_arr(lambda m: m.exp, dtype=np.int64),
+        "period":      periods,
+        "integral":    periods == np.floor(periods),
+        "potion_heal": np.array([p["heal"] for p in TABLES.get("potion")], dtype=float)[cons],
+        "skills": {
+            "cooldown":   np.array(SKILL_COOLDOWNS),
+            "mana_cost":  np.array(SKILL_MANA_COSTS, dtype=float),
+            "multiplier": np.array(SKILL_MULTIPLIERS),
+            "cast_time":  np.array(SKILL_CAST_TIMES),
+            "is_aoe":     np.array(SKILL_AOE),
+        },
+        "scratch":    scratch,
+        "difficulty": difficulty,
+        "templates":  monster_templates,
+    }
+    drop_total = np.zeros(max_tier + 1)
+    drop_samplers = TABLES.get("drop_samplers")
+    enhance_dist  = TABLES.get("enhance_dist")
+    weapon_atk    = TABLES.get("weapon_atk")
+    for t, sampler in drop_samplers.items():
+        if t <= max_tier:
+            drop_total[t] = sampler.total
+
+    # ── 런별 상태 배열 ───────────────────────────────────
+    p0 = Character(level=1, exp_table=level_exp_table)
+    st = {
+        "level":        np.ones(n, dtype=np.int64),
+        "exp":          np.zeros(n, dtype=np.int64),
+        "max_hp":       np.full(n, float(p0.max_hp)),
+        "max_mp":       np.full(n, float(p0.max_mp)),
+        "hp":           np.full(n, p0.hp),
+        "mp":           np.full(n, p0.mp),
+        "defe":         np.full(n, float(p0.defe)),
+        "atk":          np.full(n, float(p0.atk)),
+        "attack_speed": p0.attack_speed,
+        "lu":           np.tile([s.last_used_time for s in p0.skill_list], (n, 1)).astype(float),
+        "last_potion":  np.full(n, p0.last_potion_time),
+        "last_food":    np.full(n, p0.last_food_time),
+        "total_time":   np.zeros(n),
+        "w_type":       np.full(n, WEAPON_NAMES.index(p0.weapon_type), dtype=np.int64),
+        "w_tier":       np.full(n, p0.weapon_tier, dtype=np.int64),
+        "w_enhance":    np.full(n, p0.weapon_enhance, dtype=np.int64),
+    }
+    weapon_drops      = np.zeros((n, len(WEAPON_NAMES)), dtype=np.int64)
+    weapon_equips     = np.zeros(n, dtype=np.int64)
+    weapons_destroyed = np.zeros(n, dtype=np.int64)
+
+    active = np.nonzero(st["level"] < target_level)[0]
+    while len(active):
+        rows  = active
+        tier  = lv_tier[st["level"][rows]]
+        count = np.where(rng.random(len(rows)) < 0.4, 2, 3)
+
+        victory, exp_gained, kills, combat_time = _batch_fight(st, rows, tier, count, mon)
+        st["total_time"][rows] += combat_time
+
+        # ── 무기 드랍: 런별 드랍 수를 이항분포로 일괄 추출, 드랍 발생 런만 개별 처리 ──
+        n_drop = rng.binomial(kills, drop_total[tier])
+        for k in np.nonzero(n_drop)[0]:
+            r, t = rows[k], int(tier[k])
+            sampler = drop_samplers[t]
+            for _ in range(n_drop[k]):
+                chosen = sampler.choose(rand)
+                weapon_drops[r, chosen] += 1
+                ch_type, ch_tier, ch_enhance = int(chosen), t, 0
+                while True:
+                    enh_lv, eq, dest = enhance_dist.sample(ch_tier, int(st["atk"][r]),
+                                                           ch_enhance, rand=rand)
+                    if dest:
+                        weapons_destroyed[r] += 1
+                        break
+                    elif eq:
+                        win = (ch_type, ch_tier, enh_lv)
+                        ch_type, ch_tier, ch_enhance = (int(st["w_type"][r]), int(st["w_tier"][r]),
+                                                        int(st["w_enhance"][r]))
+                        st["w_type"][r], st["w_tier"][r], st["w_enhance"][r] = win
+                        st["atk"][r] = weapon_atk[win[1]][win[2]]
+                        weapon_equips[r] += 1
+                    else:
+                        break
+
+        # ── EXP / 레벨업 (Character.add_exp / level_up 과 동일 규칙) ──
+        won = rows[victory]
+        st["exp"][won] += exp_gained[victory]
+        while True:
+            lvl = st["level"][won]
+            up  = st["exp"][won] >= exp_req[lvl]
+            if not up.any():
+                break
+            u = won[up]
+            st["exp"][u]    -= exp_req[st["level"][u]].astype(np.int64)
+            st["level"][u]  += 1
+            st["max_hp"][u] += 100
+            st["max_mp"][u] += 20
+            st["hp"][u]      = np.minimum(st["hp"][u] + 100, st["max_hp"][u])
+            st["mp"][u]      = np.minimum(st["mp"][u] + 20,  st["max_mp"][u])
+            st["defe"][u]    = char_def[st["level"][u]]
+
+        # ── 전투 사이 휴식 (reset_for_next_fight + 음식) ──────
+        hp = st["hp"][rows]
+        hp = np.where(hp <= 0.0, 1.0, hp)
+        st["mp"][rows] = st["max_mp"][rows]
+        max_hp = st["max_hp"][rows]
+        now    = st["total_time"][rows]
+        fheal  = food[st["level"][rows]]
+        lfood  = st["last_food"][rows]
+        eat    = (hp < max_hp) & (now - lfood >= FOOD_COOLDOWN)
+        hp     = np.where(eat, np.minimum(max_hp, hp + fheal), hp)
+        lfood  = np.where(eat, now, lfood)
+        low    = hp / max_hp <= 0.5
+        rest   = np.where(low, ABSORPTION_TIME + FOOD_COOLDOWN, ABSORPTION_TIME)
+        eat_t  = now + rest
+        eat2   = low & (hp < max_hp) & (eat_t - lfood >= FOOD_COOLDOWN)
+        hp     = np.where(eat2, np.minimum(max_hp, hp + fheal), hp)
+        lfood  = np.where(eat2, eat_t, lfood)
+        st["hp"][rows]         = hp
+        st["last_food"][rows]  = lfood
+        st["total_time"][rows] = now + rest
+
+        active = rows[st["level"][rows] < target_level]
+
+    return {
+        "total_time":        st["total_time"],
+        "weapon_drops":      weapon_drops,
+        "weapon_equips":     weapon_equips,
+        "weapons_destroyed": weapons_destroyed,
+        "final_type":        st["w_type"],
+        "final_tier":        st["w_tier"],
+        "final_enhance":     st["w_enhance"],
+        "final_atk":         st["atk"].astype(np.int64),
+    }
+
+
+# =========================================================
+#  정확 해석 엔진 (--exact) — 레벨별 전투 수 분포 (마르코프 연쇄 + 합성곱)
+#  전투 특성(승률·소요)만 고정 시드 전투 표본에서 추정하고, 그 위의 연쇄·합성곱은 정확 계산
+# =========================================================
+_EXACT_FIGHTS_N = 200             # 전투 특성 추정에 쓰는 표본 전투 수 (고정 시드 그룹 순서 — 결과는 결정적)
+_EXACT_WARMUP   = 20              # 앞쪽 워밍업 전투 (스킬 쿨타임·HP 가 정상 상태에 들도록 — 집계 제외)
+_EXACT_EPS      = 1e-12           # 이보다 작은 확률 질량은 버림
+_EXACT_FIGHTS: dict = {}          # (TABLES 세대, 난이도, EXP 버전, 레벨, 무기 티어, 강화) -> 전투 특성 (메모)
+
+
+def _parse_weapons(spec: str) -> list:
+    """무기 궤적 문자열 '1:1+0,11:2+4,21:3+5' → [(시작 레벨, 티어, 강화), ...] (레벨순).
+    형식이 틀리면 ValueError."""
+    out = []
+    for part in spec.split(","):
+        lv, _, weapon = part.strip().partition(":")
+        tier, _, enh = weapon.partition("+")
+        out.append((int(lv), int(tier), int(enh or 0)))
+        if (out[-1][1] not in TABLES.get("weapon_stat")
+                or not 0 <= out[-1][2] <= max(TABLES.get("enhance"))):
+            raise ValueError(f"없는 무기: Tier{tier} +{enh or 0}")
+    if not out or min(lv for lv, _, _ in out) > 1:
+        raise ValueError("Lv.1 의 무기가 지정되어야 합니다 (예: 1:1+0)")
+    return sorted(out)
+
+
+def _default_weapons(target_level: int) -> list:
+    """기본 무기 궤적 — 각 티어 진입 레벨부터 그 티어 무기 +3 (확정 성공 강화 구간의 끝)."""
+    max_tier = max(TABLES.get("weapon_stat").keys())
+    return [(1 + (t - 1) * 10, t, 3)
+            for t in range(1, min(max_tier, _tier_for_level(max(1, target_level - 1))) + 1)]
+
+
+def _sampled_fight_table(level: int, weapon_tier: int, weapon_enhance: int, difficulty: str,
+                         exp_version: str) -> tuple:
+    """
+    레벨·무기 고정 시 그룹 크기(2/3마리)별 전투 1회의 특성 — 표본 추정 (고정 시드라 결정적, 메모됨).
+    고정 시드 그룹 순서(2마리 40%)로 _EXACT_FIGHTS_N 전을 _run_leveling 과 같은 휴식 규칙
+    (_rest_after_fight)으로 진행하고, 워밍업을 뺀 표본 평균·분산을 사용
+    (승패는 직전 전투들의 HP 에 좌우되므로 고정 순환 몇 전으로는 승률이 치우침).
+    메모 키는 TABLES.generation 을 포함 — CSV 가 다시 읽히면 예전 항목을 모두 비움.
+    반환: (table, rel_se)
+      table : {count: (승리 비율, 승리 시 EXP, 패배 시 평균 소요, 승리 시 평균 소요,
+                       패배 시 소요 분산, 승리 시 소요 분산)} — 소요(초) = 전투 시간 + 휴식 시간.
+              EXP 테이블과 무관하므로 EXP 곡선을 바꿔도 재사용.
+      rel_se: 'EXP 1당 기대 소요' 추정값의 상대 표준오차 (그룹별 층화 비율 추정, 전투 간 상관 무시)
+              — 레벨 기대 시간의 표본 오차로 사용.
+    """
+    key = (TABLES.generation, difficulty, exp_version, level, weapon_tier, weapon_enhance)
+    cached = _EXACT_FIGHTS.get(key)
+    if cached is not None:
+        return cached
+    if any(k[0] != TABLES.generation for k in _EXACT_FIGHTS):
+        _EXACT_FIGHTS.clear()            # CSV 가 다시 읽힘 → 예전 테이블 기준 특성 폐기
+    monster_templates = _monster_templates_for(exp_version)
+    player = Character(level=level)
+    player.weapon_tier, player.weapon_enhance = weapon_tier, weapon_enhance
+    player.atk = calc_weapon_atk(weapon_tier, weapon_enhance)
+    tier  = _tier_for_level(level)
+    now   = 0.0
+    acc   = {2: [], 3: []}
+    rng   = random.Random(f"exact:{level}")
+    for n in range(_EXACT_FIGHTS_N):
+        count = 2 if rng.random() < 0.4 else 3
+        victory, exp_gained, _, combat_time = FIGHT_CACHE.fight(
+            player, tier, count, difficulty, monster_templates, sim_time=now)
+        now += combat_time
+        rest = _rest_after_fight(player, now)
+        now += rest
+        if n >= _EXACT_WARMUP:
+            acc[count].append((victory, exp_gained, combat_time + rest))
+    def mean_var(xs: list) -> tuple:
+        if not xs:
+            return 0.0, 0.0
+        m = sum(xs) / len(xs)
+        return m, (sum((x - m) ** 2 for x in xs) / (len(xs) - 1) if len(xs) > 1 else 0.0)
+
+    table = {}
+    for count, rows in acc.items():
+        wins   = [r for r in rows if r[0]]
+        l_mean, l_var = mean_var([r[2] for r in rows if not r[0]])
+        w_mean, w_var = mean_var([r[2] for r in wins])
+        table[count] = (len(wins) / len(rows) if rows else 0.0,
+                        wins[0][1] if wins else 0, l_mean, w_mean, l_var, w_var)
+
+    # EXP 1당 소요 r = T/E (T, E: 그룹 비율 0.4/0.6 로 가중한 전투 1회 평균 소요·EXP)
+    weight = {2: 0.4, 3: 0.6}
+    T = sum(weight[c] * sum(r[2] for r in rows) / len(rows) for c, rows in acc.items() if rows)
+    E = sum(weight[c] * sum(r[1] for r in rows) / len(rows) for c, rows in acc.items() if rows)
+    rel_se = 0.0
+    if T > 0.0 and E > 0.0:
+        ratio = T / E
+        var   = sum(weight[c] ** 2 * mean_var([r[2] - ratio * r[1] for r in rows])[1] / len(rows)
+                    for c, rows in acc.items() if rows)
+        rel_se = math.sqrt(var) / T
+    _EXACT_FIGHTS[key] = (table, rel_se)
+    return table, rel_se
+
+
+def _exact_level(need: int, carry: dict, fights: dict) -> tuple:
+    """
+    레벨 1개의 첫 통과 분포 — 다음 레벨까지 필요한 EXP need, 이월 EXP 분포 carry {EXP: 확률},
+    전투 특성 fights(_sampled_fight_table) 로 '처음으로 누적 EXP ≥ need 가 되는 시점' 의
+    (2마리 승리 수, 3마리 승리 수) 분포를 닫힌 꼴로 계산.
+    누적 EXP 는 전투마다 증가하므로 직전 상태(i, j)가 need 미만이고 마지막 1전으로 need 이상이 되는
+    경계 격자만 세면 됨 — 확률 C(i+j, j)·p2^i·p3^j·p_마지막. EXP 를 g = gcd(e2, e3) 단위로 세면
+    격자는 M = ceil((need − 이월)/g) 에만 의존하므로 이월 값이 달라도 M 이 같으면 한 번만 계산.
+    패배 전투(EXP 0)는 승리 1회당 기하분포 횟수만큼 끼어드는 것으로 보고 그 기대 소요를 승리 전투에 더함.
+    격자는 전투당 평균 소요로 시간을 매기므로, 전투별 소요 분산(승리)과 패배 횟수·소요의 분산은
+    승리 수 기댓값에 비례하는 정규 분포로 근사해 합성곱 (분위수 폭 보정, 기댓값은 그대로).
+    반환: (소요 시간 분포 (시작 초, 1초 격자 확률 배열), 다음 레벨 이월 EXP 분포, 전투 수 기댓값,
+           소요 시간 기댓값(초)) — 진행 불가(두 그룹 모두 패배)면 None.
+    """
+    v2, e2, l2, d2, lv2, dv2 = fights[2]
+    v3, e3, l3, d3, lv3, dv3 = fights[3]
+    win = 0.4 * v2 + 0.6 * v3
+    if win <= 0.0:
+        return None
+    p2, p3 = 0.4 * v2 / win, 0.6 * v3 / win
+    lose_t = (0.4 * (1 - v2) * l2 + 0.6 * (1 - v3) * l3) / win   # 승리 1회당 패배 소요 기댓값
+    # 승리 1회당 끼어드는 패배 소요 합의 분산: 횟수 K ~ 기하(실패 수), 소요 L ~ 그룹 혼합
+    q2, q3 = 0.4 * (1 - v2), 0.6 * (1 - v3)
+    loss   = q2 + q3
+    lose_var = 0.0
+    if loss > 0.0:
+        l_mean   = (q2 * l2 + q3 * l3) / loss
+        l_var    = (q2 * (lv2 + l2 * l2) + q3 * (lv3 + l3 * l3)) / loss - l_mean * l_mean
+        lose_var = (loss / win) * max(0.0, l_var) + (loss / win ** 2) * l_mean * l_mean
+    d2, d3 = d2 + lose_t, d3 + lose_t
+    e2, e3 = e2 or e3, e3 or e2          # 항상 지는 그룹은 확률 0 — EXP 단위 계산에만 쓰임
+    g      = math.gcd(e2, e3)
+    a, b   = e2 // g, e3 // g
+    lp2    = math.log(p2) if p2 > 0 else -math.inf
+    lp3    = math.log(p3) if p3 > 0 else -math.inf
+
+    groups = {}                          # M -> [(이월 EXP, 확률), ...]
+    for c_in, pc in carry.items():
+        groups.setdefault(max(0, -(-(need - c_in) // g)), []).append((c_in, pc))
+    m_max   = max(groups)
+    logfact = np.concatenate(([0.0], np.cumsum(np.log(np.arange(1, m_max + 2)))))
+
+    secs, weights, carry_out = [], [], {}
+    mean_fights = mean_time = extra_var = 0.0
+    for M, members in groups.items():
+        if M == 0:                       # 이월만으로 레벨업 — 전투 0회
+            n2 = n3 = np.zeros(1, dtype=np.int64)
+            prob = np.ones(1)
+        else:
+            parts = []
+            for lp, step, last2 in ((lp2, a, 1), (lp3, b, 0)):   # 마지막 전투 종류
+                if lp == -math.inf:
+                    continue
+                j  = np.arange((M - 1) // b + 1)                  # 직전까지 3마리 승리 수
+                lo = np.maximum(0, -(-(M - step - b * j) // a))   # a·i + b·j ∈ [M − step, M − 1]
+                hi = (M - 1 - b * j) // a
+                for off in range(int((hi - lo).max()) + 1 if (hi >= lo).any() else 0):
+                    i  = lo + off
+                    ok = i <= hi
+                    i, jj = i[ok], j[ok]
+                    with np.errstate(invalid="ignore"):
+                        lw = (logfact[i + jj] - logfact[i] - logfact[jj]
+                              + np.where(i > 0, i * lp2, 0.0) + np.where(jj > 0, jj * lp3, 0.0) + lp)
+                    parts.append((i + last2, jj + 1 - last2, np.exp(lw)))
+            n2   = np.concatenate([p[0] for p in parts])
+            n3   = np.concatenate([p[1] for p in parts])
+            prob = np.concatenate([p[2] for p in parts])
+        t     = d2 * n2 + d3 * n3
+        m_end = a * n2 + b * n3
+        ends  = np.unique(m_end)
+        mass  = [prob[m_end == m].sum() for m in ends]
+        pm    = sum(pc for _, pc in members)
+        secs.append(np.rint(t).astype(np.int64))
+        weights.append(prob * pm)
+        mean_fights += pm * float(prob @ (n2 + n3)) / win
+        mean_time   += pm * float(prob @ t)
+        extra_var   += pm * float(prob @ (n2 * (dv2 + lose_var) + n3 * (dv3 + lose_var)))
+        for c_in, pc in members:
+            for m, q in zip(ends, mass):
+                c = int(g * m - need + c_in)
+                carry_out[c] = carry_out.get(c, 0.0) + pc * q
+
+    secs, weights = np.concatenate(secs), np.concatenate(weights)
+    lo   = int(secs.min())
+    dist = (lo, np.bincount(secs - lo, weights=weights))
+    if extra_var >= 1.0:
+        dist = _pmf_convolve(dist, _pmf_gauss(extra_var))
+    return dist, carry_out, mean_fights, mean_time
+
+
+def _pmf_gauss(var: float) -> tuple:
+    """평균 0, 분산 var 인 정규 분포를 1초 격자(±6σ)로 이산화한 (시작 초, 확률 배열)."""
+    half = int(math.ceil(6.0 * math.sqrt(var)))
+    x    = np.arange(-half, half + 1)
+    pmf  = np.exp(-0.5 * x * x / var)
+    return -half, pmf / pmf.sum()
+
+
+def _pmf_convolve(a: tuple, b: tuple) -> tuple:
+    """(시작 초, 확률 배열) 두 분포의 합 분포. 꼬리의 _EXACT_EPS 미만 질량은 잘라냄.
+    지지 구간이 길면 FFT 합성곱 (직접 합성곱은 O(n·m) — 상위 티어 레벨은 수천 초 폭)."""
+    off = a[0] + b[0]
+    n   = len(a[1]) + len(b[1]) - 1
+    if len(a[1]) * len(b[1]) <= 1 << 16:
+        pmf = np.convolve(a[1], b[1])
+    else:
+        size = 1 << (n - 1).bit_length()    # 2의 거듭제곱 길이 — 소인수 큰 길이의 FFT 는 느림
+        pmf  = np.fft.irfft(np.fft.rfft(a[1], size) * np.fft.rfft(b[1], size), size)[:n]
+    nz  = np.nonzero(pmf > _EXACT_EPS)[0]
+    return off + nz[0], pmf[nz[0]:nz[-1] + 1]
+
+
+def _pmf_quantile(dist: tuple, q: float) -> float:
+    off, pmf = dist
+    cdf = np.cumsum(pmf)
+    return off + int(np.searchsorted(cdf, q * cdf[-1]))
+
+
+def solve_leveling_exact(target_level: int = 70, difficulty: str = "Normal",
+                         exp_version: str = "v1", weapons: list = None,
+                         level_exp_table: dict = None) -> dict:
+    """
+    Monte Carlo 없이 Lv.1 → target_level 소요 시간의 기댓값·분포를 계산 (numpy 필요).
+    무기 궤적 weapons [(시작 레벨, 티어, 강화), ...] 를 고정하면 남는 난수는 그룹 크기(2마리 40%)뿐이므로:
+    1) 레벨·무기별 전투 특성(승률, EXP, 소요 평균·분산)을 고정 시드 전투 표본에서 추정
+       (_sampled_fight_table, 메모) — 기대 시간의 표본 오차(표준오차)를 함께 계산
+    2) 레벨마다 이월 EXP 분포를 상태로 하는 첫 통과 연쇄로 전투 수·소요 시간 분포 (_exact_level)
+    3) 레벨별 소요 분포를 티어 안에서, 다시 티어끼리 합성곱 (1초 격자)
+    기댓값은 전투 특성 추정값 기준으로 정확, 분포는 레벨 간 이월 EXP 와 소요의 상관을 무시한 근사.
+    level_exp_table 을 넘기면 CSV 대신 사용 — EXP 곡선만 바꿔 반복할 때 1) 은 메모에서 재사용.
+    반환: {"levels": {레벨: {"fights", "seconds", "se"}},
+           "tiers": {티어: {"levels": (첫, 끝), "fights", "hours", "se", "p10", "p50", "p90"}},
+           "total": {"fights", "hours", "se", "p10", "p50", "p90"}} — se: 기대 시간의 표본
+          표준오차 (레벨 간 독립 합산, 시간 단위는 hours 와 같음). 진행 불가 시 "stuck": 레벨 추가.
+    """
+    if np is None:
+        raise ImportError("solve_leveling_exact 에는 numpy 가 필요합니다 (pip install numpy).")
+    if level_exp_table is None:
+        level_exp_table = TABLES.get("level_exp", exp_version)
+    weapons = weapons or _default_weapons(target_level)
+
+    levels, tiers = {}, {}
+    tier_dist     = {}
+    carry         = {0: 1.0}
+    result        = {"levels": levels, "tiers": tiers}
+    for level in range(1, target_level):
+        if level not in level_exp_table:
+            break
+        _, w_tier, w_enh = max(w for w in weapons if w[0] <= level)
+        fights, rel_se = _sampled_fight_table(level, w_tier, w_enh, difficulty, exp_version)
+        res = _exact_level(level_exp_table[level], carry, fights)
+        if res is None:
+            result["stuck"] = level
+            break
+        dist, carry, n_fights, seconds = res
+        levels[level] = {"fights": n_fights, "seconds": seconds, "se": seconds * rel_se}
+        t    = _tier_for_level(level)
+        tier_dist[t] = _pmf_convolve(tier_dist[t], dist) if t in tier_dist else dist
+        row = tiers.setdefault(t, {"levels": (level, level), "fights": 0.0, "hours": 0.0,
+                                   "se": 0.0})
+        row["levels"]  = (row["levels"][0], level)
+        row["fights"] += n_fights
+        row["hours"]  += seconds / 3600
+        row["se"]     += (seconds * rel_se / 3600) ** 2   # 분산으로 누적 → 아래에서 제곱근
+
+    for row in tiers.values():
+        row["se"] = math.sqrt(row["se"])
+    total = None
+    for t, dist in tier_dist.items():
+        total = dist if total is None else _pmf_convolve(total, dist)
+        for q in (10, 50, 90):
+            tiers[t][f"p{q}"] = _pmf_quantile(dist, q / 100) / 3600
+    result["total"] = {"fights": sum(r["fights"] for r in tiers.values()),
+                       "hours":  sum(r["hours"] for r in tiers.values()),
+                       "se":     math.sqrt(sum(r["se"] ** 2 for r in tiers.values()))}
+    if total is not None:
+        for q in (10, 50, 90):
+            result["total"][f"p{q}"] = _pmf_quantile(total, q / 100) / 3600
+    return result
+
+
+@TABLES.fresh
+def simulate_exact(target_level: int = 70, difficulty: str = "Normal", exp_version: str = "v1",
+                   weapons: list = None):
+    """solve_leveling_exact 결과를 티어별 표(전투 수·기대 시간 ± 표본 표준오차·p10/p50/p90)로 출력."""
+    if np is None:
+        print("  [오류] 정확 해석 엔진에는 numpy 가 필요합니다 (pip install numpy).")
+        return
+    if not TABLES.get("level_exp", exp_version):
+        print(f"  [오류] EXP 버전 '{exp_version}' 에 데이터가 없습니다.")
+        return
+    weapons = weapons or _default_weapons(target_level)
+    t0  = time.perf_counter()
+    res = solve_leveling_exact(target_level, difficulty, exp_version, weapons)
+    t1  = time.perf_counter()
+
+    W = 82
+    print("=" * W)
+    print(f"  [정확 해석]  Lv.1 -> Lv.{target_level}  /  {difficulty}  /  EXP:{exp_version}")
+    print("  무기 궤적  : " + ", ".join(f"Lv.{lv}~ Tier{t} +{e}" for lv, t, e in weapons))
+    print("=" * W)
+    print(f"  {'Tier':<6} {'레벨 구간':>10} {'전투 수':>10} {'기대(h)':>9} {'±SE(h)':>8}"
+          f" {'p10(h)':>9} {'p50(h)':>9} {'p90(h)':>9}")
+    print("-" * W)
+    for t, row in res["tiers"].items():
+        lo, hi = row["levels"]
+        print(f"  Tier{t:<2} {f'Lv.{lo:>2}~{hi:<2}':>10} {row['fights']:>10,.0f} {row['hours']:>9.2f}"
+              f" {row['se']:>8.2f} {row['p10']:>9.2f} {row['p50']:>9.2f} {row['p90']:>9.2f}")
+    print("-" * W)
+    tot = res["total"]
+    if "p50" in tot:
+        print(f"  {'합계':<5} {'':>10} {tot['fights']:>10,.0f} {tot['hours']:>9.2f}"
+              f" {tot['se']:>8.2f} {tot['p10']:>9.2f} {tot['p50']:>9.2f} {tot['p90']:>9.2f}")
+    if "stuck" in res:
+        print(f"  [경고] Lv.{res['stuck']} 에서 두 그룹 크기 모두 패배 — 이 무기로는 진행 불가 (이후 생략)")
+    print("=" * W)
+    print(f"  계산 시간: {(t1 - t0) * 1000:,.1f}ms  (전투 특성 표본 포함 — 같은 프로세스에서 EXP 곡선만"
+          f" 바꾸면 메모 재사용)")
+    print(f"  (무기 궤적 고정 · 레벨별 전투 특성은 고정 시드 표본 {_EXACT_FIGHTS_N - _EXACT_WARMUP}전의"
+          f" 추정값 — ±SE 는 그 표본 오차 · 분위수는 레벨 간 독립 근사)")
+
+
+# =========================================================
+#  Monte Carlo 스트리밍 집계 (워커에서 집계 → 부모에서 병합, 메모리 O(1))
+# =========================================================
+# 지표 이름 → 히스토그램 구간 폭 (희소 dict 로 저장하므로 범위를 미리 알 필요 없음)
+_MC_METRICS = {
+    "hours":     1.0,
+    "drops":     1,
+    "equips":    1,
+    "destroyed": 1,
+    "fw_atk":    10,
+}
+_MC_QUANTILE_METRICS = ("hours", "fw_atk")   # 분위수 스케치를 유지할 지표
+_MC_QUANTILES        = (0.5, 0.9, 0.99)
+_Z95                 = 1.959963984540054   # 95% 신뢰구간 정규 분위수
+
+
+class QuantileSketch:
+    """
+    상대 오차 보장 로그 버킷 분위수 스케치 (DDSketch 방식).
+    값 v>0 을 ceil(log_gamma(v)) 버킷에 세고, 분위수는 버킷 대표값으로 근사 —
+    상대 오차 rel_accuracy 이내. 버킷 카운트 합으로 병합되며 메모리는 O(log(최대/최소)).
+    정확한 최소/최대값도 함께 기록해 분위수를 [min, max] 로 제한 (버킷 대표값이 관측 범위를 넘지 않도록).
+    """
+    def __init__(self, rel_accuracy: float = 0.005):
+        self.rel_accuracy = rel_accuracy
+        self.gamma   = (1 + rel_accuracy) / (1 - rel_accuracy)
+        self._log_g  = math.log(self.gamma)
+        self.buckets = {}
+        self.zero    = 0   # v <= 0 개수
+        self.count   = 0
+        self.min     = math.inf
+        self.max     = -math.inf
+
+    def add(self, v: float):
+        self.count += 1
+        if v < self.min:
+            self.min = v
+        if v > self.max:
+            self.max = v
+        if v <= 0:
+            self.zero += 1
+        else:
+            i = math.ceil(math.log(v) / self._log_g)
+            self.buckets[i] = self.buckets.get(i, 0) + 1
+
+    def add_array(self, values):
+        """NumPy 배열을 한꺼번에 추가."""
+        values = np.asarray(values, dtype=float)
+        if not len(values):
+            return
+        self.count += len(values)
+        self.min    = min(self.min, float(values.min()))
+        self.max    = max(self.max, float(values.max()))
+        pos = values[values > 0]
+        self.zero += len(values) - len(pos)
+        idx, cnts = np.unique(np.ceil(np.log(pos) / self._log_g).astype(np.int64),
+                              return_counts=True)
+        for i, c in zip(idx.tolist(), cnts.tolist()):
+            self.buckets[i] = self.buckets.get(i, 0) + c
+
+    def merge(self, other: "QuantileSketch"):
+        if other.gamma != self.gamma:
+            raise ValueError("rel_accuracy 가 다른 스케치는 병합할 수 없습니다.")
+        self.count += other.count
+        self.zero  += other.zero
+        self.min    = min(self.min, other.min)
+        self.max    = max(self.max, other.max)
+        for i, c in other.buckets.items():
+            self.buckets[i] = self.buckets.get(i, 0) + c
+        return self
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = q * (self.count - 1)
+        seen = self.zero
+        if rank < seen:
+            return min(max(0.0, self.min), self.max)
+        for i in sorted(self.buckets):
+            seen += self.buckets[i]
+            if rank < seen:
+                break
+        return min(max(2 * self.gamma ** i / (self.gamma + 1), self.min), self.max)
+
+
+def _mc_sample_key(run_id: int) -> int:
+    """런 번호 → 표본 선택 우선순위 (결과와 무관한 결정론적 해시, 작을수록 우선)."""
+    return (run_id * 2654435761 + 0x9E3779B9) % 4294967296
+
+
+def _mc_sample_keys(ids):
+    """_mc_sample_key 의 벡터화 버전 — int64 런 번호 배열 → 같은 해시 키 배열 (add_batch 용).
+    런 번호 < 2**31 이면 곱이 int64 범위 안이므로 스칼라 버전과 값이 같음."""
+    return (ids * 2654435761 + 0x9E3779B9) % 4294967296
+
+
+class MonteCarloSummary:
+    """
+    Monte Carlo 런 결과의 병합 가능한 스트리밍 집계 — 런 수와 무관한 O(1) 메모리.
+    - 지표별 Welford 평균/분산(병합은 Chan 공식), 정확한 최솟값·최댓값
+    - 고정 폭 히스토그램, 소요 시간·최종 ATK 분위수 스케치(QuantileSketch)
+    - 최종 무기 빈도, 선택적으로 런 번호 해시 기준 표본 sample_size 개 (표시용)
+    """
+    def __init__(self, sample_size: int = 0):
+        self.count  = 0
+        self._mean  = {k: 0.0 for k in _MC_METRICS}
+        self._m2    = {k: 0.0 for k in _MC_METRICS}
+        self.min    = {k: float("inf")  for k in _MC_METRICS}
+        self.max    = {k: float("-inf") for k in _MC_METRICS}
+        self.hist   = {k: {} for k in _MC_METRICS}
+        self.sketch = {k: QuantileSketch() for k in _MC_QUANTILE_METRICS}
+        self.final_weapons = {}
+        self.sample_size   = sample_size
+        self.sample        = []   # [(key, run_id, row)] — key 오름차순 상위 sample_size 개
+
+    def add(self, row: dict, run_id: int = None):
+        """런 1개 추가. row: _mc_row() 형식."""
+        self.count += 1
+        n = self.count
+        for k, width in _MC_METRICS.items():
+            v     = row[k]
+            delta = v - self._mean[k]
+            self._mean[k] += delta / n
+            self._m2[k]   += delta * (v - self._mean[k])
+            if v < self.min[k]:
+                self.min[k] = v
+            if v > self.max[k]:
+                self.max[k] = v
+            b = int(v // width)
+            self.hist[k][b] = self.hist[k].get(b, 0) + 1
+        for k in _MC_QUANTILE_METRICS:
+            self.sketch[k].add(row[k])
+        fw = row["fw"]
+        self.final_weapons[fw] = self.final_weapons.get(fw, 0) + 1
+        if self.sample_size and run_id is not None:
+            key = _mc_sample_key(run_id)
+            if len(self.sample) < self.sample_size or key < self.sample[-1][0]:
+                self._offer_sample([(key, run_id, row)])
+
+    def add_batch(self, batch: dict, first_run_id: int = None):
+        """run_leveling_batch 결과 배열을 한꺼번에 추가 (NumPy 벡터 집계 후 병합)."""
+        cols = {
+            "hours":     batch["total_time"] / 3600,
+            "drops":     batch["weapon_drops"].sum(axis=1),
+            "equips":    batch["weapon_equips"],
+            "destroyed": batch["weapons_destroyed"],
+            "fw_atk":    batch["final_atk"],
+        }
+        m = len(cols["hours"])
+        if not m:
+            return
+        part = MonteCarloSummary()
+        part.count = m
+        for k, width in _MC_METRICS.items():
+            v = cols[k].astype(float)
+            part._mean[k] = float(v.mean())
+            part._m2[k]   = float(((v - v.mean()) ** 2).sum())
+            part.min[k]   = cols[k].min().item()
+            part.max[k]   = cols[k].max().item()
+            bins, cnts = np.unique((cols[k] // width).astype(np.int64), return_counts=True)
+            part.hist[k] = dict(zip(bins.tolist(), cnts.tolist()))
+        for k in _MC_QUANTILE_METRICS:
+            part.sketch[k].add_array(cols[k])
+        # 최종 무기 빈도 — (종류, 티어, 강화) 를 정수 코드로 묶어 np.unique 로 한 번에 집계
+        f_type = batch["final_type"].astype(np.int64)
+        f_tier = batch["final_tier"].astype(np.int64)
+        f_enh  = batch["final_enhance"].astype(np.int64)
+        codes, cnts = np.unique((f_type * 1000 + f_tier) * 1000 + f_enh, return_counts=True)
+        for code, c in zip(codes.tolist(), cnts.tolist()):
+            fw = f"{WEAPON_NAMES[code // 1_000_000]} Tier{code // 1000 % 1000} +{code % 1000}"
+            part.final_weapons[fw] = c
+        self.merge(part)
+        if self.sample_size and first_run_id is not None:
+            # 표본 후보는 해시 키 하위 sample_size 개만 dict 로 변환
+            ids  = np.arange(first_run_id, first_run_id + m, dtype=np.int64)
+            keys = _mc_sample_keys(ids)
+            pick = np.argsort(keys, kind="stable")[:self.sample_size]
+            self._offer_sample([
+                (int(keys[i]), int(ids[i]),
+                 {"hours": float(cols["hours"][i]), "drops": int(cols["drops"][i]),
+                  "equips": int(cols["equips"][i]), "destroyed": int(cols["destroyed"][i]),
+                  "fw_atk": int(cols["fw_atk"][i]),
+                  "fw": f"{WEAPON_NAMES[int(f_type[i])]} Tier{int(f_tier[i])} +{int(f_enh[i])}"})
+                for i in pick.tolist()
+            ])
+
+    def _offer_sample(self, entries: list):
+        self.sample = sorted(self.sample + entries)[:self.sample_size]
+
+    def merge(self, other: "MonteCarloSummary"):
+        """다른 부분 집계를 병합 (자기 자신을 갱신하고 반환)."""
+        n1, n2 = self.count, other.count
+        if not n2:
+            return self
+        n = n1 + n2
+        for k in _MC_METRICS:
+            delta = other._mean[k] - self._mean[k]
+            self._mean[k] += delta * n2 / n
+            self._m2[k]   += other._m2[k] + delta * delta * n1 * n2 / n
+            self.min[k]    = min(self.min[k], other.min[k])
+            self.max[k]    = max(self.max[k], other.max[k])
+            for b, c in other.hist[k].items():
+                self.hist[k][b] = self.hist[k].get(b, 0) + c
+        for k in _MC_QUANTILE_METRICS:
+            self.sketch[k].merge(other.sketch[k])
+        for fw, c in other.final_weapons.items():
+            self.final_weapons[fw] = self.final_weapons.get(fw, 0) + c
+        self.count = n
+        self.sample_size = max(self.sample_size, other.sample_size)
+        if self.sample_size and other.sample:
+            self._offer_sample(other.sample)
+        return self
+
+    def mean(self, k: str) -> float:
+        return self._mean[k] if self.count else 0.0
+
+    def std(self, k: str) -> float:
+        """표본 표준편차."""
+        return (self._m2[k] / (self.count - 1)) ** 0.5 if self.count >= 2 else 0.0
+
+    def ci95(self, k: str) -> float:
+        """평균의 95% 신뢰구간 반폭 (정규 근사)."""
+        return _Z95 * self.std(k) / self.count ** 0.5 if self.count else 0.0
+
+    def quantile(self, k: str, q: float) -> float:
+        """분위수 근사 (hours, fw_atk 만 지원)."""
+        return self.sketch[k].quantile(q)
+
+
+def _mc_row(stats: dict) -> dict:
+    """_run_leveling(lite=True) 결과에서 Monte Carlo 집계용 지표만 추출."""
+    fw = stats.get("final_weapon", {})
+    return {
+        "hours":     stats["total_time"] / 3600,
+        "drops":     sum(stats["weapon_drops"].values()),
+        "equips":    stats["weapon_equips"],
+        "destroyed": stats["weapons_destroyed"],
+        "fw_atk":    fw.get("atk", 0),
+        "fw":        f"{fw.get('type', '-')} Tier{fw.get('tier', 0)} +{fw.get('enhance', 0)}",
+    }
 
 
 # =========================================================
 #  Monte Carlo 멀티프로세싱 워커 (모듈 레벨 — pickling 필수)
 # =========================================================
-_MC_LV_TABLE: dict = {}
-_MC_MT_TABLE: dict = {}
+_MC_SHM = None   # 워커 측 공유 메모리 결과 버퍼 (이름, 런 수) — 공유 메모리 모드에서만
+
+
+class _MCRecords:
+    """
+    Monte Carlo 런 결과의 고정 폭 숫자 레코드 배열 (numpy 필요).
+    배열 모양은 (열 수, n) float64 — 열 우선 배치라 열 단위 벡터 집계가 연속 메모리 접근.
+    열: total_time, weapon_equips, weapons_destroyed, final_type(WEAPON_NAMES 인덱스),
+        final_tier, final_enhance, final_atk, 무기 종류별 드랍 수 (WEAPON_NAMES 순서).
+    first_run_id 번 런의 레코드가 [:, 0] — 런 번호 r 은 [:, r - first_run_id].
+    """
+    FIELDS = ("total_time", "weapon_equips", "weapons_destroyed",
+              "final_type", "final_tier", "final_enhance", "final_atk")
+
+    def __init__(self, n: int, buffer=None, first_run_id: int = 1):
+        self.n      = n
+        self.ncols  = len(self.FIELDS) + len(WEAPON_NAMES)
+        self.first_run_id = first_run_id
+        self.array  = (np.zeros((self.ncols, n)) if buffer is None else
+                       np.ndarray((self.ncols, n), dtype=np.float64, buffer=buffer))
+        self._type_id = {w: i for i, w in enumerate(WEAPON_NAMES)}
+
+    def write(self, run_id: int, stats: dict):
+        """_run_leveling(lite=True) 결과 1건을 런 번호 위치에 기록."""
+        a, j = self.array, run_id - self.first_run_id
+        fw   = stats["final_weapon"]
+        a[0, j] = stats["total_time"]
+        a[1, j] = stats["weapon_equips"]
+        a[2, j] = stats["weapons_destroyed"]
+        a[3, j] = self._type_id[fw["type"]]
+        a[4, j] = fw["tier"]
+        a[5, j] = fw["enhance"]
+        a[6, j] = fw["atk"]
+        drops = stats["weapon_drops"]
+        for i, w in enumerate(WEAPON_NAMES, len(self.FIELDS)):
+            a[i, j] = drops[w]
+
+    def write_batch(self, first_run_id: int, batch: dict):
+        """run_leveling_batch 결과 배열을 런 번호 구간에 한꺼번에 기록."""
+        a   = self.array
+        j   = first_run_id - self.first_run_id
+        sl  = slice(j, j + len(batch["total_time"]))
+        for i, f in enumerate(self.FIELDS):
+            a[i, sl] = batch[f]
+        a[len(self.FIELDS):, sl] = batch["weapon_drops"].T
+
+    def as_batch(self) -> dict:
+        """전체 레코드를 run_leveling_batch 결과 형식(dict of 배열)으로 변환 —
+        MonteCarloSummary.add_batch 로 바로 벡터 집계 가능. 정수 열은 int64 사본."""
+        a   = self.array
+        out = {"total_time": a[0]}
+        for i, f in enumerate(self.FIELDS[1:], 1):
+            out[f] = a[i].astype(np.int64)
+        out["weapon_drops"] = a[len(self.FIELDS):].T.astype(np.int64)
+        return out
+
+    def view(self, first_run_id: int, size: int) -> "_MCRecords":
+        """런 번호 first_run_id 부터 size 개 구간의 레코드 보기 (복사 없음)."""
+        rec = _MCRecords(0, first_run_id=first_run_id)
+        j   = first_run_id - self.first_run_id
+        rec.n, rec.array = size, self.array[:, j:j + size]
+        return rec
+
+
+class _MCSharedResults(_MCRecords):
+    """
+    공유 메모리(multiprocessing.shared_memory)에 둔 _MCRecords — 런 번호 1..n.
+    워커는 이름으로 연결해 자기 런 구간에만 쓰므로 잠금이 필요 없음.
+    """
+
+    def __init__(self, n: int, name: str = None):
+        nbytes     = max(1, (len(self.FIELDS) + len(WEAPON_NAMES)) * n * 8)
+        self.shm   = (shared_memory.SharedMemory(name=name) if name else
+                      shared_memory.SharedMemory(create=True, size=nbytes))
+        self.owner = name is None
+        super().__init__(n, buffer=self.shm.buf)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def close(self):
+        """매핑 해제 (생성한 쪽이면 공유 메모리 삭제까지)."""
+        self.array = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def _mc_worker_init(tables: dict = None, shm_name: str = None, shm_runs: int = 0):
+    """Pool 워커 프로세스 초기화 — 테이블을 프로세스당 1회만 수신.
+    tables  : TABLES.snapshot() — 주면 워커 레지스트리에 미리 채워 CSV 재파싱을 생략
+              (워커의 _run_leveling 은 exp_version 으로 레지스트리에서 테이블을 찾음).
+    shm_name: 공유 메모리 결과 버퍼 이름 — 주면 기억해 두고 _mc_shm_worker 가 작업마다
+              연결·기록·close() (Pool 종료 시 terminate 되는 워커에도 열린 매핑이 남지 않음)."""
+    global _MC_SHM
+    signal.signal(signal.SIGINT, signal.SIG_IGN)    # 중단은 부모가 처리 (체크포인트 후 terminate)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    if tables:
+        TABLES.preload(tables)
+    if shm_name:
+        _MC_SHM = (shm_name, shm_runs)
+
+
+def _mc_chunk_worker(args: tuple) -> MonteCarloSummary:
+    """Pool 워커 — 런 번호 start..start+size-1 을 실행하고 부분 집계만 반환.
+    batch=True 이면 run_leveling_batch 로 한꺼번에 실행.
+    records=True 이면 (부분 집계, 런별 _MCRecords) 를 반환 (아카이브 기록용).
+    런 run_id 는 _run_stream(seed, run_id) 난수열로 실행 (배치는 _chunk_seed(seed, start, size))."""
+    start, size, target_level, difficulty, exp_version, batch, sample_size, records, seed = args
+    summary = MonteCarloSummary(sample_size=sample_size)
+    rec     = _MCRecords(size, first_run_id=start) if records else None
+    if batch:
+        res = run_leveling_batch(size, target_level, difficulty, exp_version,
+                                 seed=_chunk_seed(seed, start, size))
+        summary.add_batch(res, first_run_id=start)
+        if rec is not None:
+            rec.write_batch(start, res)
+        return summary if rec is None else (summary, rec)
+    for run_id in range(start, start + size):
+        stats = _run_leveling(target_level, difficulty, exp_version,
+                              lite=True, rand=_run_stream(seed, run_id))
+        if stats:
+            summary.add(_mc_row(stats), run_id=run_id)
+            if rec is not None:
+                rec.write(run_id, stats)
+    return summary if rec is None else (summary, rec)
+
+
+def _mc_shm_worker(args: tuple) -> tuple:
+    """Pool 워커 (공유 메모리 모드) — 런 번호 start..start+size-1 결과를 _MC_SHM 에
+    직접 기록하고 완료 구간 (start, size) 만 반환 (결과 직렬화 없음)."""
+    start, size, target_level, difficulty, exp_version, batch, seed = args
+    name, runs = _MC_SHM
+    out = _MCSharedResults(runs, name=name)
+    try:
+        if batch:
+            out.write_batch(start, run_leveling_batch(size, target_level, difficulty, exp_version,
+                                                      seed=_chunk_seed(seed, start, size)))
+        else:
+            for run_id in range(start, start + size):
+                out.write(run_id, _run_leveling(target_level, difficulty, exp_version, lite=True,
+                                                rand=_run_stream(seed, run_id)))
+    finally:
+        out.close()   # 연결한 쪽은 매핑만 해제 (unlink 는 생성한 부모가 담당)
+    return start, size
+
+
+def _mc_default_chunk(n: int, workers: int, batch: bool) -> int:
+    """고정 n 실행의 기본 작업 단위 런 수 — 배치는 워커당 1개, 그 외는 워커당 약 4개 (최대 1000)."""
+    if batch:
+        return -(-n // workers)
+    return max(1, min(1000, -(-n // (workers * 4))))
+
+
+def _mc_chunks(n: int, chunk: int) -> list:
+    """n 회를 chunk 크기 작업 단위로 분할. 반환: [(첫 런 번호(1부터), 런 수), ...]"""
+    return [(i + 1, min(chunk, n - i)) for i in range(0, n, chunk)]
+
+
+# 순차 정지(--ci-width / --time-budget) 파라미터
+_MC_SEQ_MIN_RUNS = 30    # CI 판정 전 최소 런 수 (표본 분산 안정화)
+_MC_SEQ_TASK_SEC = 2.0   # 자동 chunk: 작업 1개가 이 시간 정도 걸리도록 조정
+_MC_SEQ_MAX_CHUNK = 1000
+
+
+# =========================================================
+#  Monte Carlo 결과 아카이브 (열 단위 파일 + JSON 인덱스, memmap 조회)
+# =========================================================
+class ResultArchive:
+    """
+    Monte Carlo 런별 결과를 디렉터리에 열(column)마다 하나의 원시 바이너리 파일로
+    이어 붙여 저장하는 추가 전용(append-only) 아카이브 (numpy 필요).
+
+    path/index.json : 형식 버전, 열 이름→dtype, 커밋된 행 수, 청크 목록 [첫 런 번호, 행 수],
+                      무기 종류 이름, 실행 조건(meta)
+    path/<열>.bin   : 리틀 엔디언 고정 폭 값의 연속 배열 (행 순서 = 청크 완료 순서)
+    append() 는 열 파일을 먼저 쓰고 flush 한 뒤 인덱스를 임시 파일 + os.replace 로 교체하므로
+    중단되더라도 인덱스의 행 수까지는 항상 완전한 데이터. 열 파일 끝의 미커밋 바이트는 무시.
+
+    조회: ResultArchive.open(path) → column(name) 은 np.memmap (필요한 열만 페이지 단위로 읽음),
+          where(type=, tier=, enhance=) 는 최종 무기 조건 행 마스크, quantile(name, q, mask).
+    """
+    FORMAT  = "mc-archive"
+    VERSION = 1
+    COLUMNS = (("run_id", "<i8"), ("hours", "<f8"), ("equips", "<i4"), ("destroyed", "<i4"),
+               ("final_type", "<i1"), ("final_tier", "<i1"), ("final_enhance", "<i1"),
+               ("final_atk", "<i4"))
+
+    def __init__(self, path: str, index: dict, mode: str):
+        self.path  = path
+        self.index = index
+        self.mode  = mode
+        self.dtypes = dict(index["columns"])
+        self._files = {}
+        self._maps  = {}
+
+    # ── 쓰기 ────────────────────────────────────────────────
+    @classmethod
+    def create(cls, path: str, meta: dict = None) -> "ResultArchive":
+        """새 아카이브 생성. 이미 인덱스가 있으면 FileExistsError (연구 간 런 번호 혼합 방지)."""
+        if os.path.exists(os.path.join(path, "index.json")):
+            raise FileExistsError(f"이미 아카이브가 있습니다: {path}")
+        os.makedirs(path, exist_ok=True)
+        columns = list(cls.COLUMNS) + [(f"drops_{i}", "<i4") for i in range(len(WEAPON_NAMES))]
+        index = {"format": cls.FORMAT, "version": cls.VERSION, "rows": 0,
+                 "columns": columns, "weapon_names": list(WEAPON_NAMES),
+                 "meta": dict(meta or {}, created=time.strftime("%Y-%m-%d %H:%M:%S")),
+                 "chunks": []}
+        arc = cls(path, index, "w")
+        for name, _ in columns:
+            arc._files[name] = open(os.path.join(path, f"{name}.bin"), "wb")
+        arc._write_index()
+        return arc
+
+    def append(self, records: "_MCRecords"):
+        """_MCRecords 한 묶음(런 번호 first_run_id.. 연속)을 각 열 파일 끝에 추가하고 커밋."""
+        a, m = records.array, records.n
+        if not m:
+            return
+        nf   = len(_MCRecords.FIELDS)
+        cols = {
+            "run_id":        np.arange(records.first_run_id, records.first_run_id + m),
+            "hours":         a[0] / 3600,
+            "equips":        a[1], "destroyed":     a[2],
+            "final_type":    a[3], "final_tier":    a[4],
+            "final_enhance": a[5], "final_atk":     a[6],
+        }
+        for i in range(len(WEAPON_NAMES)):
+            cols[f"drops_{i}"] = a[nf + i]
+        for name, f in self._files.items():
+            f.write(np.ascontiguousarray(cols[name], dtype=self.dtypes[name]).tobytes())
+            f.flush()
+        self.index["rows"] += m
+        self.index["chunks"].append([records.first_run_id, m])
+        self._write_index()
+
+    @classmethod
+    def reopen(cls, path: str, rows: int) -> "ResultArchive":
+        """체크포인트 재개용 — 커밋 행 수를 rows 로 되돌리고(이후 기록분·미커밋 바이트 삭제)
+        이어 쓰기 모드로 열기. 아카이브가 rows 보다 짧으면 ValueError."""
+        arc = cls.open(path)
+        if arc.index["rows"] < rows:
+            raise ValueError(f"아카이브 행 수({arc.index['rows']:,})가 체크포인트({rows:,})보다 적습니다: {path}")
+        chunks, total = [], 0
+        for first, m in arc.index["chunks"]:
+            if total + m > rows:
+                break
+            chunks.append([first, m])
+            total += m
+        arc.index["rows"], arc.index["chunks"] = total, chunks
+        for name, dtype in arc.index["columns"]:
+            f = open(os.path.join(path, f"{name}.bin"), "r+b")
+            f.truncate(total * np.dtype(dtype).itemsize)
+            f.seek(0, os.SEEK_END)
+            arc._files[name] = f
+        arc.mode = "w"
+        arc._write_index()
+        return arc
+
+    def _write_index(self):
+        tmp = os.path.join(self.path, "index.json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.index, f, ensure_ascii=False)
+        os.replace(tmp, os.path.join(self.path, "index.json"))
+
+    def close(self):
+        for f in self._files.values():
+            f.close()
+        self._files.clear()
+        self._maps.clear()
+
+    # ── 읽기 ────────────────────────────────────────────────
+    @classmethod
+    def open(cls, path: str) -> "ResultArchive":
+        with open(os.path.join(path, "index.json"), encoding="utf-8") as f:
+            index = json.load(f)
+        if index.get("format") != cls.FORMAT or index.get("version") != cls.VERSION:
+            raise ValueError(f"지원하지 않는 아카이브 형식: {index.get('format')} v{index.get('version')}")
+        return cls(path, index, "r")
+
+    def __len__(self) -> int:
+        return self.index["rows"]
+
+    def column(self, name: str):
+        """열 하나를 읽기 전용 memmap 으로 반환 (커밋된 행 수까지만)."""
+        if name not in self._maps:
+            rows = self.index["rows"]
+            self._maps[name] = (np.memmap(os.path.join(self.path, f"{name}.bin"),
+                                          dtype=self.dtypes[name], mode="r", shape=(rows,))
+                                if rows else np.zeros(0, dtype=self.dtypes[name]))
+        return self._maps[name]
+
+    def drops(self):
+        """런별 총 드랍 수 (무기 종류 열 합)."""
+        return sum(self.column(f"drops_{i}").astype(np.int64)
+                   for i in range(len(self.index["weapon_names"])))
+
+    def where(self, type: str = None, tier: int = None, enhance: int = None):
+        """최종 무기 조건(종류 이름 / 티어 / 강화)을 만족하는 행의 불리언 마스크."""
+        mask = np.ones(len(self), dtype=bool)
+        if type is not None:
+            names = self.index["weapon_names"]
+            if type not in names:
+                raise ValueError(f"알 수 없는 무기 종류: {type} (가능: {', '.join(names)})")
+            mask &= self.column("final_type") == names.index(type)
+        if tier is not None:
+            mask &= self.column("final_tier") == tier
+        if enhance is not None:
+            mask &= self.column("final_enhance") == enhance
+        return mask
+
+    def quantile(self, name: str, q, mask=None):
+        """열 name 의 분위수 (mask 주면 해당 행만). q 는 스칼라 또는 목록."""
+        values = self.column(name) if mask is None else self.column(name)[mask]
+        return np.quantile(values, q) if len(values) else np.full(np.shape(q), np.nan)
+
+
+def _parse_where(text: str) -> dict:
+    """--where 'tier=7,enhance=5,type=활' → {"tier": 7, "enhance": 5, "type": "활"}."""
+    cond = {}
+    for part in filter(None, (p.strip() for p in (text or "").split(","))):
+        key, sep, val = part.partition("=")
+        key, val = key.strip(), val.strip()
+        if not sep or key not in ("type", "tier", "enhance"):
+            raise ValueError(f"조건 형식 오류: {part!r} (예: tier=7,enhance=5,type=활)")
+        cond[key] = val if key == "type" else int(val)
+    return cond
+
+
+def query_archive(path: str, where: str = None, show: int = 10):
+    """아카이브 조회 결과 출력 — 조건에 맞는 런 수·비율, 소요 시간 분위수, 런 번호 일부."""
+    if np is None:
+        print("  [오류] 아카이브 조회에는 numpy 가 필요합니다 (pip install numpy).")
+        return
+    try:
+        arc  = ResultArchive.open(path)
+        cond = _parse_where(where)
+        mask = arc.where(**cond)
+    except (OSError, ValueError) as e:
+        print(f"  [오류] {e}")
+        return
+    meta, total = arc.index["meta"], len(arc)
+    hit  = int(mask.sum())
+    cond_txt = ", ".join(f"{k}={v}" for k, v in cond.items()) or "전체"
+    W = 72
+    print("=" * W)
+    print(f"  [아카이브 조회]  {path}  ({total:,}회 / Lv.1→{meta.get('target_level')} / "
+          f"{meta.get('difficulty')} / EXP:{meta.get('exp_version')})")
+    print("=" * W)
+    print(f"  조건        : {cond_txt}")
+    print(f"  해당 런     : {hit:,} / {total:,}  ({hit / total * 100 if total else 0:.2f}%)")
+    if hit:
+        hours = arc.column("hours")[mask]
+        p50, p90, p99 = np.quantile(hours, (0.5, 0.9, 0.99))
+        print(f"  소요(h)     : 평균 {hours.mean():.2f}  /  p50 {p50:.2f}  /  p90 {p90:.2f}"
+              f"  /  p99 {p99:.2f}  /  최대 {hours.max():.2f}")
+        ids = arc.column("run_id")[mask][:show]
+        print(f"  런 번호     : {', '.join(map(str, ids.tolist()))}{' ...' if hit > show else ''}")
+    print("=" * W)
+    arc.close()
+
 
+# 체크포인트 (--checkpoint / --resume)
+_MC_CKPT_VERSION = 2                     # 2: 결과 출처(_mc_ckpt_origin) 기록
+_MC_CKPT_DEFAULT = "mc-checkpoint.pkl"   # 경로 미지정 상태에서 중단되면 여기에 저장
 
-def _mc_worker_init(lv_table: dict, mt_table: dict):
-    """Pool 워커 프로세스 초기화 — 테이블을 프로세스당 1회만 수신."""
-    global _MC_LV_TABLE, _MC_MT_TABLE
-    _MC_LV_TABLE = lv_table
-    _MC_MT_TABLE = mt_table
 
+def _mc_ckpt_origin() -> dict:
+    """이 실행의 결과를 정하는 요소 — 엔진 버전, 난수열 방식, data/ 내용 해시.
+    하나라도 다르면 저장된 런과 이어서 실행할 런이 다른 실험이므로 --resume 거부."""
+    return {"engine_version": ENGINE_VERSION, "rng_stream": RNG_STREAM_VERSION,
+            "data_hash": ResultCache().data_hash()}
 
-def _mc_worker(args: tuple) -> dict:
-    """Pool 워커 — 단일 레벨업 시뮬레이션 실행 후 결과 반환."""
-    target_level, difficulty, exp_version = args
-    return _run_leveling(target_level, difficulty, exp_version, seed=None,
-                         level_exp_table=_MC_LV_TABLE,
-                         monster_templates=_MC_MT_TABLE,
-                         lite=True)
+
+class _MCCheckpoint:
+    """
+    Monte Carlo 진행 상태 — 실행 조건(params), 결과 출처(origin), 병합된 MonteCarloSummary,
+    완료 런 구간, 누적 경과 시간, 아카이브 커밋 행 수. save() 는 pickle 을 임시 파일에 쓰고 os.replace 로
+    교체하므로 저장 도중 중단되어도 이전 체크포인트가 남음.
+    commit() 구간(아카이브 추가 + 집계 병합 + 완료 구간 기록) 안에서 받은 SIGINT/SIGTERM 은
+    구간이 끝날 때까지 미뤄서, 체크포인트의 집계와 완료 구간이 항상 일치하도록 보장.
+    """
+    def __init__(self, params: dict, summary: MonteCarloSummary, archive: ResultArchive = None,
+                 path: str = None, every: float = 60.0, state: dict = None):
+        self.params  = params
+        self.summary = summary
+        self.archive = archive
+        self.path    = path
+        self.every   = every
+        self.done    = [tuple(r) for r in state["done"]] if state else []   # [(첫 런 번호, 런 수)]
+        self.t0      = time.monotonic() - (state["elapsed"] if state else 0.0)
+        self.archive_rows = len(archive) if archive is not None else None
+        self.origin  = _mc_ckpt_origin()
+        self._last   = time.monotonic()
+        self._in_commit = False
+        self._stop      = False
+
+    @property
+    def completed(self) -> int:
+        return sum(size for _, size in self.done)
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.t0
+
+    def next_start(self) -> int:
+        """런 번호 1부터 이어진 완료 구간 다음 번호 (순서대로 병합하는 경로용)."""
+        return self.done[0][0] + self.done[0][1] if self.done and self.done[0][0] == 1 else 1
+
+    def remaining(self, n: int, chunk: int) -> list:
+        """1..n 중 아직 완료되지 않은 런을 chunk 크기 작업 [(첫 런 번호, 런 수)] 로 분할."""
+        tasks, pos = [], 1
+        for start, size in self.done + [(n + 1, 0)]:
+            while pos < min(start, n + 1):
+                size_ = min(chunk, start - pos, n + 1 - pos)
+                tasks.append((pos, size_))
+                pos += size_
+            pos = max(pos, start + size)
+        return tasks
+
+    def _add(self, start: int, size: int):
+        self.done.append((start, size))
+        self.done.sort()
+        merged = []
+        for s, k in self.done:
+            if merged and merged[-1][0] + merged[-1][1] == s:
+                merged[-1] = (merged[-1][0], merged[-1][1] + k)
+            else:
+                merged.append((s, k))
+        self.done = merged
+
+    def commit(self, start: int, size: int, apply):
+        """apply()(아카이브 추가·집계 병합)와 완료 구간 기록을 중단 없이 한 단위로 실행한 뒤,
+        미뤄 둔 중단 요청이 있으면 KeyboardInterrupt, 없으면 주기가 되었을 때 저장."""
+        self._in_commit = True
+        try:
+            apply()
+            self._add(start, size)
+            if self.archive is not None:
+                self.archive_rows = len(self.archive)
+        finally:
+            self._in_commit = False
+        if self._stop:
+            raise KeyboardInterrupt
+        if self.path and time.monotonic() - self._last >= self.every:
+            self.save()
+
+    def on_signal(self, signum, frame):
+        """SIGINT/SIGTERM 처리기 — commit 중이면 끝난 뒤로 미루고, 아니면 즉시 중단."""
+        if self._in_commit:
+            self._stop = True
+        else:
+            raise KeyboardInterrupt
+
+    def save(self, complete: bool = False, path: str = None) -> str:
+        path  = path or self.path
+        state = {"version": _MC_CKPT_VERSION, "params": self.params, "origin": self.origin,
+                 "summary": _mc_summary_state(self.summary),
+                 "done": self.done, "elapsed": self.elapsed(),
+                 "archive_rows": self.archive_rows, "complete": complete}
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+        self._last = time.monotonic()
+        return path
+
+
+def _mc_load_checkpoint(path: str) -> dict:
+    """체크포인트 파일 읽기. 실패 시 [오류] 출력 후 None."""
+    try:
+        with open(path, "rb") as f:
+            state = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError) as e:
+        print(f"  [오류] 체크포인트를 읽을 수 없습니다: {path} ({e})")
+        return None
+    if not isinstance(state, dict) or state.get("version") != _MC_CKPT_VERSION:
+        print(f"  [오류] 지원하지 않는 체크포인트 형식입니다: {path}")
+        return None
+    state["summary"] = _mc_summary_from_state(state["summary"])
+    return state
+
+
+def _mc_summary_state(summary: MonteCarloSummary) -> dict:
+    """MonteCarloSummary → 내장 타입만으로 된 dict (스크립트 실행/임포트 어느 쪽에서 저장해도
+    클래스 경로(__main__ / simulation)와 무관하게 다시 읽을 수 있도록)."""
+    state = dict(vars(summary))
+    state["sketch"] = {k: dict(vars(sk)) for k, sk in summary.sketch.items()}
+    return state
+
+
+def _mc_summary_from_state(state: dict) -> MonteCarloSummary:
+    summary = MonteCarloSummary.__new__(MonteCarloSummary)
+    summary.__dict__.update(state)
+    summary.sketch = {}
+    for k, sk_state in state["sketch"].items():
+        sk = QuantileSketch.__new__(QuantileSketch)
+        sk.__dict__.update(min=-math.inf, max=math.inf)   # min/max 기록 이전 체크포인트 — 제한 없음
+        sk.__dict__.update(sk_state)
+        summary.sketch[k] = sk
+    return summary
+
+
+def resume_monte_carlo(path: str, checkpoint_every: float = 60.0):
+    """체크포인트에 저장된 실행 조건으로 simulate_monte_carlo 를 이어서 실행.
+    반환: 종료 코드 — 0 완료, 2 체크포인트를 읽을 수 없거나 저장 이후 엔진·데이터가 바뀜,
+          130 다시 중단됨 (체크포인트 저장 후 128 + SIGINT)."""
+    state = _mc_load_checkpoint(path)
+    if state is None:
+        return 2
+    current = _mc_ckpt_origin()
+    changed = [k for k, v in current.items() if state["origin"].get(k) != v]
+    if changed:
+        labels = {"engine_version": "ENGINE_VERSION", "rng_stream": "RNG_STREAM_VERSION",
+                  "data_hash": "data/ CSV 내용"}
+        print(f"  [오류] 체크포인트 저장 이후 {', '.join(labels[k] for k in changed)} 이(가) "
+              f"바뀌어 이어서 실행할 수 없습니다: {path}")
+        return 2
+    interrupted = simulate_monte_carlo(**state["params"], checkpoint=path,
+                                       checkpoint_every=checkpoint_every, resume=state)
+    return 130 if interrupted else 0
 
 
 # =========================================================
 #  Monte Carlo 시뮬레이션
 # =========================================================
-def simulate_monte_carlo(n: int, target_level: int = 70, difficulty: str = "Normal",
-                         exp_version: str = "v1"):
-    """n회 레벨업 시뮬레이션을 병렬 반복하고 결과를 테이블로 출력."""
-    lv_table = _load_level_exp_table(exp_version)
+@TABLES.fresh
+def simulate_monte_carlo(n: int = None, target_level: int = 70, difficulty: str = "Normal",
+                         exp_version: str = "v1", batch: bool = False, chunk: int = None,
+                         show_runs: int = 0, ci_width: float = None,
+                         time_budget: float = None, shm: bool = False,
+                         archive: str = None, checkpoint: str = None,
+                         checkpoint_every: float = 60.0, resume: dict = None,
+                         cache: ResultCache = None, seed: int = None):
+    """
+    레벨업 시뮬레이션을 병렬 반복하고 집계 결과를 출력.
+    워커 호출 1회가 chunk 회를 실행하고 MonteCarloSummary(부분 집계)만 돌려주므로
+    런별 결과 dict 의 pickling/IPC 비용이 없고, 부모 메모리도 런 수와 무관.
+    n          : 실행 횟수. ci_width/time_budget 지정 시에는 최대 횟수 (None = 무제한).
+    chunk      : 작업 단위 런 수. None 이면 자동 설정
+                 (고정 n: 워커당 약 4개 작업, 최대 1000 / 순차 정지: 작업당 약 2초).
+    batch      : True 이면 각 작업을 run_leveling_batch 로 실행 (numpy 필요).
+    show_runs  : 0 보다 크면 런 번호 해시로 고른 표본 런 show_runs 개를 표로 출력.
+    ci_width   : 평균 소요 시간(h) 95% 신뢰구간의 전체 폭(±반폭 × 2)이 이 값 이하가 되면 정지.
+    time_budget: 경과 시간(초)이 이 값에 도달하면 정지.
+    shm        : True 이면 (고정 n, numpy 필요) 워커가 런별 고정 폭 레코드를 공유 메모리
+                 (_MCSharedResults, n × 12열 × 8바이트)에 직접 쓰고 완료 구간만 반환 —
+                 부모는 완료된 구간을 배열에서 바로 벡터 집계 (부모 메모리는 O(n)).
+    archive    : 디렉터리 경로 — 작업이 끝날 때마다 런별 결과를 ResultArchive 에 추가 기록
+                 (numpy 필요). 순차 정지 시 버린 진행 중 작업은 기록하지 않음.
+    checkpoint : 체크포인트 파일 경로 — checkpoint_every 초마다, 그리고 끝날 때 진행 상태 저장.
+                 고정 n 실행은 작업 크기를 체크포인트 주기에 맞추고 끝난 순서대로 병합
+                 (_mc_run_adaptive — 배치도 워커당 작업 1개로 묶지 않음).
+    resume     : _mc_load_checkpoint() 상태 — 주면 완료된 런은 건너뛰고 이어서 실행
+                 (resume_monte_carlo 가 저장된 실행 조건과 함께 전달).
+    cache      : ResultCache — 고정 n 실행(순차 정지·아카이브·재개 제외)에서 런 1..m 집계를
+                 재사용. m = n 이면 즉시 출력, m < n 이면 m+1..n 만 실행해 병합 후 저장.
+                 마스터 시드를 지정한 실행에만 적용 (키에 시드 포함).
+    seed       : 마스터 시드 — 런 i 는 _run_stream(seed, i) 독립 난수열로 실행되므로 워커 수·
+                 chunk·완료 순서와 무관하게 재현되고, 런 하나를 --replay i --seed seed 로
+                 전체 모드 재실행 가능. None 이면 무작위로 정해 출력 (체크포인트에 저장).
+    순차 정지 모드에서는 작업을 워커 수의 2배만큼만 미리 보내고, 결과가 올 때마다
+    (제출 순서대로) 병합한 뒤 정지 조건을 확인. 정지 시 진행 중 작업은 버림.
+    Ctrl-C / SIGTERM 시 병합이 끝난 작업까지를 체크포인트로 저장(경로 미지정 시
+    _MC_CKPT_DEFAULT)하고 부분 집계를 출력 — --resume 으로 이어서 실행 가능.
+    반환: 중단되었으면 True (CLI 는 종료 코드 130 으로 종료).
+    """
+    sequential = ci_width is not None or time_budget is not None
+    if not sequential and not n:
+        print("  [오류] 실행 횟수(--runs) 또는 정지 조건(--ci-width / --time-budget)이 필요합니다.")
+        return
+    lv_table = TABLES.get("level_exp", exp_version)
     if not lv_table:
         print(f"  [오류] EXP 버전 '{exp_version}' 에 데이터가 없습니다.")
         return
-    mt_table = _load_monster_templates(exp_version) or MONSTER_TEMPLATES
+    if batch and np is None:
+        print("  [오류] 배치 엔진에는 numpy 가 필요합니다 (pip install numpy).")
+        return
+    if shm and (np is None or sequential):
+        print("  [오류] 공유 메모리 모드는 numpy 와 고정 실행 횟수(--runs)가 필요합니다.")
+        return
+    if archive and np is None:
+        print("  [오류] 결과 아카이브에는 numpy 가 필요합니다 (pip install numpy).")
+        return
+    fixed_seed = seed is not None
+    if not fixed_seed:
+        seed = random.SystemRandom().getrandbits(32)
+    params = {"n": n, "target_level": target_level, "difficulty": difficulty,
+              "exp_version": exp_version, "batch": batch, "chunk": chunk,
+              "show_runs": show_runs, "ci_width": ci_width, "time_budget": time_budget,
+              "shm": shm, "archive": archive, "seed": seed}
+    state = resume
+    if resume:
+        print(f"  체크포인트에서 재개: {checkpoint}  ({resume['summary'].count:,}회 완료"
+              f" / 경과 {resume['elapsed']:.1f}초)")
+        if resume["complete"]:
+            print("  이미 완료된 작업입니다 — 저장된 집계를 출력합니다.\n")
+            _print_mc_summary(resume["summary"], resume["summary"].count, target_level,
+                              difficulty, exp_version, show_runs, seed=seed, batch=batch)
+            return
+    elif not fixed_seed:
+        print(f"  마스터 시드: {seed}  (재현: --seed {seed})")
+
+    cache_key = None
+    # 체크포인트 배치 실행은 작업 분할이 처리량에 따라 정해지므로 (_mc_run_adaptive) 캐시 제외
+    cacheable = not (sequential or archive or resume or (batch and checkpoint and chunk is None))
+    if cache is not None and cacheable and not fixed_seed:
+        print("  (결과 캐시는 --seed 로 마스터 시드를 지정한 실행에만 적용됩니다)")
+    elif cache is not None and cacheable:
+        if batch and chunk is None:
+            chunk = _mc_default_chunk(n, cpu_count() or 1, batch)
+        # 배치 결과는 (마스터 시드, 작업 구간)별 _chunk_seed 로 정해지므로 분할 크기도 키에 포함
+        cache_key = cache.key("mc", target_level=target_level, difficulty=difficulty,
+                              exp_version=exp_version, batch=batch, seed=seed,
+                              partition=chunk if batch else None)
+        m, cached = cache.mc_lookup(cache_key, n, show_runs, exact=batch)
+        if m == n:
+            print(f"  결과 캐시 적중: {n:,}회 집계 재사용 ({cache.root})\n")
+            _print_mc_summary(cached, n, target_level, difficulty, exp_version, show_runs,
+                              seed=seed, batch=batch)
+            return
+        if m:
+            print(f"  결과 캐시 적중: 런 1~{m:,} 재사용 — 나머지 {n - m:,}회만 실행")
+            state = {"summary": cached, "done": [(1, m)], "elapsed": 0.0}
+    summary = state["summary"] if state else MonteCarloSummary(sample_size=show_runs)
+    arc = None
+    if archive:
+        try:
+            if resume:
+                arc = ResultArchive.reopen(archive, resume["archive_rows"] or 0)
+            else:
+                arc = ResultArchive.create(archive, {"target_level": target_level,
+                                                     "difficulty": difficulty,
+                                                     "exp_version": exp_version, "batch": batch,
+                                                     "seed": seed})
+        except (OSError, ValueError) as e:
+            print(f"  [오류] 아카이브를 열 수 없습니다: {e}")
+            return
+
+    workers = cpu_count() or 1
+    ckpt    = _MCCheckpoint(params, summary, arc, checkpoint, checkpoint_every, state)
+    reason, tasks = None, 0
+    interrupted   = False
+
+    TABLES.warm(*_LEVELING_TABLES, version=exp_version)
+    _monster_templates_for(exp_version)   # 해당 버전 열이 비어 v1 로 대체되는 경우도 스냅샷에 포함
+    try:   # 선점(SIGTERM)도 Ctrl-C 와 같이 처리 — 주 스레드에서만 설치 가능
+        prev_handlers = {sig: signal.signal(sig, ckpt.on_signal)
+                         for sig in (signal.SIGINT, signal.SIGTERM)}
+    except ValueError:
+        prev_handlers = {}
+    try:
+        if shm:
+            tasks, chunk = _mc_run_shared(ckpt, workers, n, chunk, target_level, difficulty,
+                                          exp_version, batch, seed)
+        else:
+            with Pool(initializer=_mc_worker_init,
+                      initargs=(TABLES.snapshot(),)) as pool:
+                if sequential:
+                    reason, tasks = _mc_run_sequential(pool, ckpt, workers, n, chunk,
+                                                       target_level, difficulty, exp_version,
+                                                       batch, show_runs, ci_width, time_budget,
+                                                       seed)
+                elif checkpoint:
+                    tasks, chunk = _mc_run_adaptive(
+                        pool, _mc_chunk_worker,
+                        lambda s, k: (s, k, target_level, difficulty, exp_version, batch,
+                                      show_runs, arc is not None, seed),
+                        ckpt, workers, n, chunk, batch,
+                        lambda s, k, part: ckpt.commit(s, k, lambda: _mc_apply(summary, arc, part)))
+                else:
+                    if chunk is None:
+                        chunk = _mc_default_chunk(n, workers, batch)
+                    task_args = [(start, size, target_level, difficulty, exp_version, batch,
+                                  show_runs, arc is not None, seed)
+                                 for start, size in ckpt.remaining(n, chunk)]
+                    for (start, size, *_), part in zip(task_args,
+                                                       pool.imap(_mc_chunk_worker, task_args)):
+                        ckpt.commit(start, size, lambda part=part: _mc_apply(summary, arc, part))
+                        done = ckpt.completed
+                        print(f"\r  실행 중... {done:,}/{n:,}  ({done / n * 100:.0f}%)",
+                              end="", flush=True)
+                    tasks = len(task_args)
+    except KeyboardInterrupt:
+        interrupted = True
+    finally:
+        for sig, handler in prev_handlers.items():
+            signal.signal(sig, handler)
+
+    elapsed = ckpt.elapsed()
+    if interrupted:
+        path = ckpt.save(path=checkpoint or _MC_CKPT_DEFAULT)
+        print(f"\r  중단! {summary.count:,}회까지 병합  ({elapsed:.1f}초)")
+        print(f"  체크포인트 저장: {path}  (재개: --resume {path})\n")
+    elif reason is None:
+        print(f"\r  완료! {summary.count:,}회 시뮬레이션  ({workers}코어 병렬 / 작업 {tasks:,}개 × 최대 {chunk:,}회)\n")
+    else:
+        print(f"\r  완료! {summary.count:,}회 시뮬레이션  ({workers}코어 병렬 / 작업 {tasks:,}개 / "
+              f"{elapsed:.1f}초 / 정지 사유: {reason})\n")
+    if checkpoint and not interrupted:
+        ckpt.save(complete=True)
+    if cache_key is not None and not interrupted:
+        cache.mc_store(cache_key, n, summary)
+
+    if arc is not None:
+        arc.close()
+        print(f"  결과 아카이브 저장: {archive}  ({len(arc):,}행, 조회: --query {archive})\n")
+
+    if not summary.count:
+        print("  결과 없음.")
+        return interrupted
 
-    workers   = cpu_count() or 1
-    chunksize = max(1, n // (workers * 8))
-    task_args = [(target_level, difficulty, exp_version)] * n
+    if interrupted:
+        print("  [부분 집계 — 중단 시점까지]")
+    _print_mc_summary(summary, summary.count, target_level, difficulty, exp_version, show_runs,
+                      seed=seed, batch=batch)
+    return interrupted
 
-    raw_stats = []
-    done      = 0
 
-    with Pool(initializer=_mc_worker_init, initargs=(lv_table, mt_table)) as pool:
-        for stats in pool.imap_unordered(_mc_worker, task_args, chunksize=chunksize):
-            done += 1
-            print(f"\r  실행 중... {done:,}/{n:,}  ({done / n * 100:.0f}%)",
-                  end="", flush=True)
-            if stats:
-                raw_stats.append(stats)
+def _mc_apply(summary: MonteCarloSummary, archive: ResultArchive, part):
+    """워커 반환값(부분 집계 또는 (부분 집계, _MCRecords))을 아카이브와 집계에 반영."""
+    if archive is not None:
+        part, rec = part
+        archive.append(rec)
+    summary.merge(part)
 
-    print(f"\r  완료! {n:,}회 시뮬레이션  ({workers}코어 병렬)\n")
 
-    results = []
-    for i, stats in enumerate(raw_stats):
-        fw          = stats.get("final_weapon", {})
-        total_drops = sum(stats["weapon_drops"].values())
-        results.append({
-            "run":       i + 1,
-            "hours":     stats["total_time"] / 3600,
-            "drops":     total_drops,
-            "equips":    stats["weapon_equips"],
-            "destroyed": stats["weapons_destroyed"],
-            "fw_type":   fw.get("type",    "-"),
-            "fw_tier":   fw.get("tier",    0),
-            "fw_enh":    fw.get("enhance", 0),
-            "fw_atk":    fw.get("atk",     0),
-        })
-
-    if not results:
-        print("  결과 없음.")
-        return
+def _mc_run_adaptive(pool, worker, make_args, ckpt: _MCCheckpoint, workers: int, n: int,
+                     chunk: int, batch: bool, apply) -> tuple:
+    """
+    체크포인트를 쓰는 고정 n 실행 (simulate_monte_carlo / _mc_run_shared 내부용).
+    남은 런을 작업으로 잘라 워커 수의 2배까지 apply_async 로 보내고, 끝난 순서대로
+    apply(첫 런 번호, 런 수, 워커 반환값) 로 병합 — 느린 앞 작업이 끝난 뒷 작업을 붙잡지 않음.
+    chunk 가 None 이면 _mc_run_sequential 처럼 처리량으로 작업 크기를 정해 작업 1개가
+    min(_MC_SEQ_TASK_SEC, 체크포인트 주기/2) 초 안팎이 되게 함 (배치도 같은 상한 — 워커당
+    작업 1개면 끝날 때까지 체크포인트를 남길 수 없음). 작업 크기는 남은 런의 워커당 몫을 넘지 않음.
+    반환: (작업 수, 가장 큰 작업의 런 수)
+    """
+    fixed_chunk = chunk
+    chunk    = fixed_chunk or (16 if batch else 1)
+    task_sec = min(_MC_SEQ_TASK_SEC, ckpt.every / 2)
+    gaps     = deque(ckpt.remaining(n, n))          # 아직 안 한 런 구간 (재개 시 여러 개)
+    results  = queue.Queue()
+    t0, runs = time.monotonic(), 0
+    pending = tasks = largest = 0
+
+    while gaps or pending:
+        # ── 진행 중 작업을 워커 수의 2배까지 채움 ─────────
+        while gaps and pending < workers * 2:
+            start, size = gaps[0]
+            take = min(chunk, size)
+            if take == size:
+                gaps.popleft()
+            else:
+                gaps[0] = (start + take, size - take)
+            pool.apply_async(worker, (make_args(start, take),),
+                             callback=lambda res, s=start, k=take: results.put((s, k, res)),
+                             error_callback=lambda e: results.put((None, 0, e)))
+            pending += 1
+            largest  = max(largest, take)
+
+        # ── 먼저 끝난 작업부터 병합 ───────────────────────
+        start, size, res = results.get()
+        pending -= 1
+        if start is None:
+            raise res
+        apply(start, size, res)
+        tasks += 1
+        runs  += size
+        if fixed_chunk is None:
+            left  = sum(k for _, k in gaps)
+            rate  = runs / max(time.monotonic() - t0, 1e-9) / workers
+            floor = 16 if batch else 1   # 배치는 스텝당 고정 비용이 커서 더 잘게 나누면 처리량만 손해
+            chunk = max(floor, min(_MC_SEQ_MAX_CHUNK, int(rate * task_sec),
+                                   -(-left // workers) or 1))
+        done = ckpt.completed
+        print(f"\r  실행 중... {done:,}/{n:,}  ({done / n * 100:.0f}%)", end="", flush=True)
+    return tasks, largest
+
+
+def _mc_run_shared(ckpt: _MCCheckpoint, workers: int, n: int, chunk: int,
+                   target_level: int, difficulty: str, exp_version: str, batch: bool,
+                   seed: int) -> tuple:
+    """
+    공유 메모리 모드 실행 (simulate_monte_carlo 내부용) — 워커는 _MCSharedResults 에
+    런별 레코드를 기록하고 완료 구간만 반환, 부모는 그 구간을 배열에서 바로 add_batch 로 집계
+    (아카이브가 있으면 같은 구간을 추가). 완료 순서가 섞이므로 구간 단위로 체크포인트에 기록.
+    체크포인트 경로가 있으면 작업 크기는 _mc_run_adaptive 가 체크포인트 주기에 맞춰 정함.
+    반환: (작업 수, 작업 단위 런 수)
+    """
+    buf = _MCSharedResults(n)
+
+    def apply(view: _MCRecords):
+        if ckpt.archive is not None:
+            ckpt.archive.append(view)
+        ckpt.summary.add_batch(view.as_batch(), first_run_id=view.first_run_id)
+
+    try:
+        with Pool(initializer=_mc_worker_init,
+                  initargs=(TABLES.snapshot(), buf.name, n)) as pool:
+            if ckpt.path:
+                return _mc_run_adaptive(
+                    pool, _mc_shm_worker,
+                    lambda s, k: (s, k, target_level, difficulty, exp_version, batch, seed),
+                    ckpt, workers, n, chunk, batch,
+                    lambda s, k, _: ckpt.commit(s, k, lambda v=buf.view(s, k): apply(v)))
+            if chunk is None:
+                chunk = _mc_default_chunk(n, workers, batch)
+            task_args = [(start, size, target_level, difficulty, exp_version, batch, seed)
+                         for start, size in ckpt.remaining(n, chunk)]
+            for start, size in pool.imap_unordered(_mc_shm_worker, task_args):
+                ckpt.commit(start, size, lambda v=buf.view(start, size): apply(v))
+                done = ckpt.completed
+                print(f"\r  실행 중... {done:,}/{n:,}  ({done / n * 100:.0f}%)",
+                      end="", flush=True)
+    finally:
+        buf.close()
+    return len(task_args), chunk
+
+
+def _mc_run_sequential(pool, ckpt: _MCCheckpoint, workers: int, n_max: int,
+                       chunk: int, target_level: int, difficulty: str,
+                       exp_version: str, batch: bool, show_runs: int,
+                       ci_width: float, time_budget: float, seed: int) -> tuple:
+    """
+    정지 조건을 만족할 때까지 작업을 순차 제출·병합 (simulate_monte_carlo 내부용).
+    제출 순서대로 병합하므로 완료 구간은 항상 런 번호 1부터 이어짐 — 재개 시 그다음부터 제출.
+    반환: (정지 사유 문자열, 병합한 작업 수)
+    """
+    summary     = ckpt.summary
+    fixed_chunk = chunk
+    chunk       = fixed_chunk or (16 if batch else 1)
+    pending     = []          # [(첫 런 번호, 런 수, AsyncResult)] — 제출 순서
+    next_start  = ckpt.next_start()
+    tasks       = 0
+    reason      = None
+
+    while True:
+        # ── 진행 중 작업을 워커 수의 2배까지 채움 ─────────
+        while len(pending) < workers * 2 and (n_max is None or next_start <= n_max):
+            size = chunk if n_max is None else min(chunk, n_max - next_start + 1)
+            args = (next_start, size, target_level, difficulty, exp_version, batch, show_runs,
+                    ckpt.archive is not None, seed)
+            pending.append((next_start, size, pool.apply_async(_mc_chunk_worker, (args,))))
+            next_start += size
+        if not pending:
+            reason = f"최대 런 수({n_max:,}회) 도달"
+            break
+
+        # ── 가장 먼저 제출한 작업을 기다려 병합 ───────────
+        start, size, res = pending.pop(0)
+        wait = None if time_budget is None else max(0.0, ckpt.t0 + time_budget - time.monotonic())
+        res.wait(wait)
+        if not res.ready():
+            reason = f"시간 예산({time_budget:g}초) 소진"
+            break
+        part = res.get()
+        ckpt.commit(start, size, lambda: _mc_apply(summary, ckpt.archive, part))
+        tasks  += 1
+        elapsed = ckpt.elapsed()
+        width   = 2 * summary.ci95("hours")
+
+        # 자동 chunk: 지금까지 처리량으로 작업당 약 _MC_SEQ_TASK_SEC 초가 되도록 조정
+        if fixed_chunk is None and elapsed > 0:
+            per_worker_rate = summary.count / elapsed / workers
+            chunk = max(1, min(_MC_SEQ_MAX_CHUNK, int(per_worker_rate * _MC_SEQ_TASK_SEC)))
+
+        print(f"\r  실행 중... {summary.count:,}회  CI 폭 {width:.3f}h  {elapsed:.1f}초",
+              end="", flush=True)
+        if ci_width is not None and summary.count >= _MC_SEQ_MIN_RUNS and width <= ci_width:
+            reason = f"CI 폭 {width:.3f}h ≤ {ci_width:g}h"
+            break
+        if time_budget is not None and elapsed >= time_budget:
+            reason = f"시간 예산({time_budget:g}초) 소진"
+            break
+
+    return reason, tasks
 
+
+def _print_mc_summary(summary: MonteCarloSummary, n: int, target_level: int,
+                      difficulty: str, exp_version: str, show_runs: int = None,
+                      seed: int = None, batch: bool = False):
+    """MonteCarloSummary 를 요약 표·소요 시간 분포·최종 무기 빈도로 출력.
+    show_runs: 표본 런 표시 개수 상한 (캐시된 집계가 표본을 더 많이 가진 경우). None = 전부.
+    seed     : 마스터 시드 (제목에 표시, 표본 런 재실행 안내용)."""
     W   = 82
     DIV = "-" * W
     print("=" * W)
-    print(f"  Monte Carlo  ({n:,}회 / Lv.1→{target_level} / {difficulty} / EXP:{exp_version})")
+    print(f"  Monte Carlo  ({n:,}회 / Lv.1→{target_level} / {difficulty} / EXP:{exp_version}"
+          + (f" / seed:{seed}" if seed is not None else "") + ")")
     print("=" * W)
-    print(f"  {'#':>6}  {'소요(h)':>8}  {'획득':>5}  {'교체':>5}  {'파괴':>5}  "
-          f"{'최종 무기':<18}  {'ATK':>6}")
+
+    # ── 표본 런 (요청 시에만) ────────────────────────────────
+    s = summary
+    sample = s.sample if show_runs is None else s.sample[:show_runs]
+    if sample:
+        print(f"  [표본 런 {len(sample):,}개 / 전체 {s.count:,}회 중 런 번호 해시 기준]")
+        print(f"  {'#':>8}  {'소요(h)':>8}  {'획득':>5}  {'교체':>5}  {'파괴':>5}  "
+              f"{'최종 무기':<18}  {'ATK':>6}")
+        print(DIV)
+        for _, run_id, r in sorted(sample, key=lambda e: e[1]):
+            print(f"  {run_id:>8,}  {r['hours']:>8.2f}  {r['drops']:>5,}  {r['equips']:>5,}  "
+                  f"{r['destroyed']:>5,}  {r['fw']:<18}  {r['fw_atk']:>6,}")
+        if seed is not None and not batch:
+            print(DIV)
+            print(f"  (런 하나를 전체 모드로 재실행: --replay <#> --seed {seed})")
+        print("=" * W)
+
+    print(f"  {'':>8}  {'소요(h)':>8}  {'획득':>7}  {'교체':>7}  {'파괴':>7}  {'ATK':>7}")
     print(DIV)
+    print(f"  {'최솟값':>6}  {s.min['hours']:>8.2f}  {s.min['drops']:>7,}  {s.min['equips']:>7,}  "
+          f"{s.min['destroyed']:>7,}  {s.min['fw_atk']:>7,}")
+    for q in _MC_QUANTILES:
+        label = f"p{q * 100:g}"
+        print(f"  {label:>8}  {s.quantile('hours', q):>8.2f}  {'-':>7}  {'-':>7}  {'-':>7}  "
+              f"{s.quantile('fw_atk', q):>7.0f}")
+    print(f"  {'최댓값':>6}  {s.max['hours']:>8.2f}  {s.max['drops']:>7,}  {s.max['equips']:>7,}  "
+          f"{s.max['destroyed']:>7,}  {s.max['fw_atk']:>7,}")
+    print(DIV)
+    print(f"  {'평균':>7}  {s.mean('hours'):>8.2f}  {s.mean('drops'):>7.1f}  {s.mean('equips'):>7.1f}  "
+          f"{s.mean('destroyed'):>7.1f}  {s.mean('fw_atk'):>7.0f}")
+    print(f"  {'95% CI':>8}  {'±' + format(s.ci95('hours'), '.2f'):>8}  "
+          f"{'±' + format(s.ci95('drops'), '.1f'):>7}  {'±' + format(s.ci95('equips'), '.1f'):>7}  "
+          f"{'±' + format(s.ci95('destroyed'), '.1f'):>7}  {'±' + format(s.ci95('fw_atk'), '.1f'):>7}")
+    print(f"  {'표준편차':>5}  {s.std('hours'):>8.2f}  {s.std('drops'):>7.1f}  {s.std('equips'):>7.1f}  "
+          f"{s.std('destroyed'):>7.1f}  {s.std('fw_atk'):>7.1f}")
+    print(f"  (분위수는 상대 오차 {QuantileSketch().rel_accuracy * 100:.1f}% 이내 근사, "
+          f"95% CI 는 평균의 정규 근사 신뢰구간)")
+    print("=" * W)
 
-    for r in results:
-        fw_str = f"{r['fw_type']} Tier{r['fw_tier']} +{r['fw_enh']}"
-        print(f"  {r['run']:>6,}  {r['hours']:>8.2f}  {r['drops']:>5,}  {r['equips']:>5,}  "
-              f"{r['destroyed']:>5,}  {fw_str:<18}  {r['fw_atk']:>6,}")
+    # ── 소요 시간 분포 (히스토그램, 최대 20행으로 묶어 표시) ──
+    hist  = s.hist["hours"]
+    lo, hi = min(hist), max(hist)
+    group = max(1, -(-(hi - lo + 1) // 20))
+    width = _MC_METRICS["hours"]
+    print("\n  [소요 시간 분포]")
+    print(DIV)
+    peak = max(sum(hist.get(b, 0) for b in range(g, g + group))
+               for g in range(lo, hi + 1, group))
+    for g in range(lo, hi + 1, group):
+        c   = sum(hist.get(b, 0) for b in range(g, g + group))
+        bar = "#" * int(c / peak * 50) if peak else ""
+        print(f"  {g * width:>8.1f} ~ {(g + group) * width:>8.1f} h  {c:>9,}  {bar}")
+    print("=" * W)
 
+    # ── 최종 장착 무기 빈도 (상위 5개) ──────────────────────
+    print("\n  [최종 장착 무기 상위 5]")
     print(DIV)
+    for fw, c in sorted(s.final_weapons.items(), key=lambda kv: -kv[1])[:5]:
+        print(f"  {fw:<18}  {c:>9,}회  ({c / s.count * 100:5.1f}%)")
+    print("=" * W)
+
+
+# =========================================================
+#  희귀 이벤트 추정 (--rare) — 드랍·강화 중요도 샘플링 + 우도비 가중치
+# =========================================================
+_RARE_DEFAULT_RUNS = 2000   # --rare 에서 --runs 미지정 시 런 수
+_RARE_MAX_DROP     = 0.5    # 제안 분포의 처치당 드랍 확률 상한
+_RARE_RATE_CLIP    = (0.02, 0.98)   # 제안 강화 성공률 범위 (원래 0<r<1 인 단계) — 우도비 유계 유지
+_RARE_CE_RHO       = 0.1    # 교차 엔트로피: 상위 ρ 분위 런을 엘리트로 사용
+_RARE_CE_SMOOTH    = 0.7    # 교차 엔트로피: 새 모수 가중치 (나머지는 이전 모수)
+_RARE_CE_ITERS     = 5      # 교차 엔트로피 최대 반복 수
+
+
+class _TiltedDropSampler:
+    """WeaponDropSampler 의 제안 분포 버전 — 드랍 간격을 처치당 확률 pq 의 기하분포에서 뽑고
+    우도비 (p/pq)·((1-p)/(1-pq))^g 를 owner.log_w 에 누적 (교차 엔트로피용 간격 통계도 기록).
+    owner 의 이벤트가 이미 일어났으면 원래 분포에서 추출 (우도비 1). 종류 선택은 그대로."""
+
+    def __init__(self, base: WeaponDropSampler, pq: float, owner):
+        p = base.total
+        self.base, self.owner = base, owner
+        self._log_miss_q = math.log1p(-pq)
+        self._log_ratio  = (math.log(p / pq), math.log1p(-p) - math.log1p(-pq))
+
+    def gap(self, rand=random.random) -> int:
+        owner = self.owner
+        if owner.hit:
+            return self.base.gap(rand)
+        g = int(math.log(1.0 - rand()) / self._log_miss_q)
+        owner.log_w   += self._log_ratio[0] + g * self._log_ratio[1]
+        owner.gap_n   += 1
+        owner.gap_sum += g
+        return g
+
+    def choose(self, rand=random.random) -> int:
+        return self.base.choose(rand)
+
+
+class _RareEventIS:
+    """
+    희귀 이벤트 '티어 tier 무기가 +enhance 이상으로 장착됨 (목표 레벨 도달 전)' 의 확률을
+    중요도 샘플링으로 추정하기 위한 런 1개의 상태. _run_leveling(importance=...) 에 전달.
+    - 드랍: 사냥터 tier 의 처치당 드랍 확률 p → drop_q (_TiltedDropSampler)
+    - 강화: 티어 tier 무기의 단계별 성공률 r → rates[단계] (0·1 인 단계는 그대로) —
+            결과 목록 구조가 원래 분포와 같으므로 같은 위치의 확률 비 p_i/q_i 가 우도비
+    제안 분포는 이벤트가 일어나기 전까지만 사용 (이후 추출은 원래 분포, 우도비 1).
+    log_w: 누적 로그 우도비, hit: 이벤트 발생 여부 — 추정량은 E_q[exp(log_w)·hit].
+    score: 장착된 티어 tier 무기의 최고 강화 단계 (-1 = 없음, 교차 엔트로피 중간 이벤트 기준).
+    gap_n/gap_sum, attempts/successes: 제안 분포로 뽑은 드랍 간격·강화 단계 통계 (모수 갱신용).
+    """
 
-    def _s(lst):
-        return min(lst), sum(lst) / len(lst), max(lst)
-
-    h_min,  h_avg,  h_max  = _s([r["hours"]     for r in results])
-    d_min,  d_avg,  d_max  = _s([r["drops"]     for r in results])
-    e_min,  e_avg,  e_max  = _s([r["equips"]    for r in results])
-    x_min,  x_avg,  x_max  = _s([r["destroyed"] for r in results])
-    a_min,  a_avg,  a_max  = _s([r["fw_atk"]    for r in results])
-
-    blank = f"{'':18}"
-    print(f"  {'최솟값':>6}  {h_min:>8.2f}  {d_min:>5,}  {e_min:>5,}  {x_min:>5,}  "
-          f"{blank}  {a_min:>6,}")
-    print(f"  {'평균':>6}  {h_avg:>8.2f}  {d_avg:>5.1f}  {e_avg:>5.1f}  {x_avg:>5.1f}  "
-          f"{blank}  {a_avg:>6.0f}")
-    print(f"  {'최댓값':>6}  {h_max:>8.2f}  {d_max:>5,}  {e_max:>5,}  {x_max:>5,}  "
-          f"{blank}  {a_max:>6,}")
+    def __init__(self, tier: int, enhance: int, drop_q: float = None, rates: dict = None):
+        enhance_table = TABLES.get("enhance")
+        sampler = TABLES.get("drop_samplers").get(tier)
+        self.tier, self.enhance = tier, enhance
+        self.drop_q = drop_q if drop_q is not None else (sampler.total if sampler else 0.0)
+        self.rates  = dict(enhance_table) if rates is None else dict(rates)
+        self._tilted = EnhanceDistTable(self.rates)
+        self._base   = None
+        self.reset()
+
+    def reset(self):
+        self.log_w, self.hit, self.score = 0.0, False, -1
+        self.gap_n, self.gap_sum = 0, 0
+        self.attempts  = dict.fromkeys(self.rates, 0)
+        self.successes = dict.fromkeys(self.rates, 0)
+
+    def wrap(self, drop_samplers: dict, enhance_dist: EnhanceDistTable) -> tuple:
+        """새 런 시작 — 상태를 초기화하고 (드랍 샘플러 dict, 강화 분포) 대체물을 반환."""
+        self.reset()
+        self._base = enhance_dist
+        samplers = dict(drop_samplers)
+        base = samplers.get(self.tier)
+        if base is not None and base.total < 1.0 and 0.0 < self.drop_q < 1.0:
+            samplers[self.tier] = _TiltedDropSampler(base, self.drop_q, self)
+        return samplers, self
+
+    def sample(self, weapon_tier: int, stop_atk: int, start_level: int = 0,
+               rand=random.random) -> tuple:
+        """EnhanceDistTable.sample 대체 — 티어 tier 무기면 제안 분포에서 추출."""
+        if self.hit or weapon_tier != self.tier:
+            return self._base.sample(weapon_tier, stop_atk, start_level, rand)
+        cum_p, outcomes = self._base.distribution(weapon_tier, stop_atk, start_level)
+        cum_q, _        = self._tilted.distribution(weapon_tier, stop_atk, start_level)
+        i = min(bisect_right(cum_q, rand()), len(outcomes) - 1)
+        p = cum_p[i] - (cum_p[i - 1] if i else 0.0)
+        q = cum_q[i] - (cum_q[i - 1] if i else 0.0)
+        self.log_w += math.log(p) - math.log(q)
+        level, equipped, destroyed = outcomes[i]
+        for step in range(start_level + 1, level + 1):
+            self.attempts[step]  += 1
+            self.successes[step] += 1
+        if destroyed:
+            self.attempts[level + 1] += 1
+        if equipped:
+            self.score = max(self.score, level)
+            self.hit   = level >= self.enhance
+        return outcomes[i]
+
+
+def _rare_worker(args: tuple) -> list:
+    """Pool 워커 — 런 번호 start..start+size-1 을 제안 분포(drop_q, rates)로 실행.
+    stream: 런 스트림 하위 식별자 (교차 엔트로피 예비 반복마다 다른 난수열).
+    반환: [(런 번호, 이벤트 발생 여부, 우도비, score, gap_n, gap_sum, attempts, successes), ...]"""
+    (start, size, target_level, difficulty, exp_version, seed, stream,
+     tier, enhance, drop_q, rates) = args
+    est = _RareEventIS(tier, enhance, drop_q, rates)
+    out = []
+    for run_id in range(start, start + size):
+        stats = _run_leveling(target_level, difficulty, exp_version,
+                              lite=True, rand=_run_stream(seed, run_id, stream=stream),
+                              importance=est)
+        if stats:
+            out.append((run_id, est.hit, math.exp(est.log_w), est.score,
+                        est.gap_n, est.gap_sum, est.attempts, est.successes))
+    return out
+
+
+def _rare_run(pool, n: int, stream: tuple, target_level: int, difficulty: str,
+              exp_version: str, seed: int, tier: int, enhance: int,
+              drop_q: float, rates: dict, label: str) -> list:
+    """제안 분포 (drop_q, rates) 로 런 1..n 을 병렬 실행 (simulate_rare_event 내부용)."""
+    workers   = cpu_count() or 1
+    chunk     = max(1, min(1000, -(-n // (workers * 4))))
+    task_args = [(start, size, target_level, difficulty, exp_version, seed, stream,
+                  tier, enhance, drop_q, rates) for start, size in _mc_chunks(n, chunk)]
+    rows = []
+    for part in pool.imap_unordered(_rare_worker, task_args):
+        rows.extend(part)
+        print(f"\r  {label}... {len(rows):,}/{n:,}  ({len(rows) / n * 100:.0f}%)",
+              end="", flush=True)
+    return rows
+
+
+def _rare_ce_update(rows: list, gamma: int, drop_q: float, rates: dict,
+                    base_rates: dict) -> tuple:
+    """교차 엔트로피 모수 갱신 — score ≥ gamma 인 엘리트 런의 우도비 가중 최대우도 추정.
+    드랍: 가중 (간격 수) / (간격 합 + 간격 수), 강화: 단계별 가중 (성공 수 / 시도 수).
+    새 값과 이전 값을 _RARE_CE_SMOOTH 비율로 섞고, 원래 0<r<1 인 단계만 _RARE_RATE_CLIP 범위로 제한."""
+    elite = [r for r in rows if r[3] >= gamma]
+    num   = sum(w * gn for _, _, w, _, gn, _, _, _ in elite)
+    den   = sum(w * (gs + gn) for _, _, w, _, gn, gs, _, _ in elite)
+    a     = _RARE_CE_SMOOTH
+    if den > 0 and num > 0:
+        drop_q = min(_RARE_MAX_DROP, a * num / den + (1 - a) * drop_q)
+    new_rates = dict(rates)
+    lo, hi = _RARE_RATE_CLIP
+    for step, r0 in base_rates.items():
+        if not 0.0 < r0 < 1.0:
+            continue
+        att = sum(w * at[step] for _, _, w, _, _, _, at, _ in elite)
+        suc = sum(w * sc[step] for _, _, w, _, _, _, _, sc in elite)
+        if att > 0:
+            new_rates[step] = min(hi, max(lo, a * suc / att + (1 - a) * rates[step]))
+    return drop_q, new_rates
+
+
+@TABLES.fresh
+def simulate_rare_event(tier: int, enhance: int, n: int = _RARE_DEFAULT_RUNS,
+                        target_level: int = 70, difficulty: str = "Normal",
+                        exp_version: str = "v1", seed: int = None,
+                        boost: float = None, fail: float = None):
+    """
+    '티어 tier 무기가 +enhance 이상으로 장착됨 (Lv.target_level 도달 전)' 의 확률을 중요도 샘플링으로 추정.
+    제안 분포(_RareEventIS: 사냥터 tier 드랍 확률, 티어 tier 무기 단계별 강화 성공률)로 런 n 개를 실행하고
+    우도비 가중 평균 p̂ = (1/n) Σ w_i·1[이벤트_i] 와 표준 오차로 95% CI 를 출력 (불편 추정).
+    boost/fail: 제안 분포 직접 지정 — 드랍 확률 ×boost, 강화 실패 확률 ×fail (boost=fail=1 은 일반 MC).
+                둘 다 None 이면 교차 엔트로피 방법으로 자동 결정: 예비 런 max(100, n/10) 개씩 최대
+                _RARE_CE_ITERS 회, 매번 score 상위 _RARE_CE_RHO 분위(중간 이벤트 '+γ 이상 장착',
+                γ ≤ enhance)를 엘리트로 삼아 우도비 가중 최대우도로 모수 갱신. 예비 런은 추정에 쓰지 않음.
+    진단: 전체 런 평균 우도비(기댓값 1), 이벤트 런 가중치의 유효 표본 수(ESS),
+          같은 상대 오차에 필요한 일반 Monte Carlo 런 수 (1-p̂)/(p̂·상대오차²).
+    seed: 마스터 시드 — 런 i 는 _run_stream(seed, i) 로 실행 (None 이면 무작위로 정해 출력).
+    """
+    lv_table = TABLES.get("level_exp", exp_version)
+    if not lv_table:
+        print(f"  [오류] EXP 버전 '{exp_version}' 에 데이터가 없습니다.")
+        return
+    base_rates = TABLES.get("enhance")
+    tiers      = TABLES.get("weapon_stat")
+    if tier not in tiers or not 0 < enhance <= max(base_rates):
+        print(f"  [오류] 이벤트 대상이 올바르지 않습니다: Tier{tier} +{enhance}"
+              f"  (티어 {min(tiers)}~{max(tiers)}, 강화 1~{max(base_rates)})")
+        return
+    sampler = TABLES.get("drop_samplers").get(tier)
+    if sampler is None:
+        print(f"  [오류] Tier{tier} 사냥터에는 무기 드랍이 없습니다.")
+        return
+    manual = boost is not None or fail is not None
+    boost  = 1.0 if boost is None else boost
+    fail   = 1.0 if fail is None else fail
+    if boost < 1.0 or not 0.0 < fail <= 1.0:
+        print("  [오류] --is-boost 는 1 이상, --is-fail 은 (0, 1] 이어야 합니다.")
+        return
+    if seed is None:
+        seed = random.SystemRandom().getrandbits(32)
+    n = max(2, n)
+    p_drop = sampler.total
+    drop_q = min(_RARE_MAX_DROP, p_drop * boost) if p_drop < 1.0 else p_drop
+    rates  = {lv: r if r <= 0.0 else 1.0 - (1.0 - r) * fail for lv, r in base_rates.items()}
+
+    print(f"  희귀 이벤트 추정: Tier{tier} +{enhance} 이상 장착 (Lv.1 -> Lv.{target_level} 도달 전)"
+          f"  (난이도: {difficulty} / EXP:{exp_version} / seed:{seed})")
+
+    t0 = time.monotonic()
+    TABLES.warm(*_LEVELING_TABLES, version=exp_version)
+    _monster_templates_for(exp_version)   # 해당 버전 열이 비어 v1 로 대체되는 경우도 스냅샷에 포함
+    with Pool(initializer=_mc_worker_init,
+              initargs=(TABLES.snapshot(),)) as pool:
+        if not manual:
+            # ── 교차 엔트로피: 중간 이벤트를 올려 가며 제안 분포 모수 갱신 ──
+            pilot = max(100, n // 10)
+            for it in range(1, _RARE_CE_ITERS + 1):
+                rows   = _rare_run(pool, pilot, (it,), target_level, difficulty, exp_version,
+                                   seed, tier, enhance, drop_q, rates, f"예비 {it}")
+                scores = sorted(r[3] for r in rows)
+                gamma  = min(enhance, scores[int((1 - _RARE_CE_RHO) * (len(scores) - 1))])
+                drop_q, rates = _rare_ce_update(rows, gamma, drop_q, rates, base_rates)
+                print(f"\r  예비 {it}: 중간 이벤트 +{gamma} 이상  (엘리트 "
+                      f"{sum(r[3] >= gamma for r in rows):,}/{len(rows):,})            ")
+                if gamma >= enhance:
+                    break
+        rows = _rare_run(pool, n, (), target_level, difficulty, exp_version, seed,
+                         tier, enhance, drop_q, rates, "실행 중")
+    elapsed = time.monotonic() - t0
+    print(f"\r  완료! {len(rows):,}회  ({cpu_count() or 1}코어 병렬 / {elapsed:.1f}초)\n")
+
+    m       = len(rows)
+    vals    = [r[2] if r[1] else 0.0 for r in rows]
+    hit_w   = [r[2] for r in rows if r[1]]
+    p_hat   = sum(vals) / m
+    se      = (_sample_var(vals) / m) ** 0.5
+    mean_w  = sum(r[2] for r in rows) / m
+    ess     = sum(hit_w) ** 2 / sum(w * w for w in hit_w) if hit_w else 0.0
+
+    W = 78
+    print("=" * W)
+    print(f"  [희귀 이벤트]  Tier{tier} +{enhance} 이상 장착  /  Lv.1 -> Lv.{target_level}"
+          f"  /  {difficulty}  /  EXP:{exp_version}")
+    print("=" * W)
+    print(f"  제안 분포 ({'직접 지정' if manual else '교차 엔트로피'}) — Tier{tier} 사냥터 드랍 확률 "
+          f"{p_drop:.3g} → {drop_q:.3g} (×{drop_q / p_drop:.2f})")
+    steps = [lv for lv in sorted(base_rates) if 0.0 < base_rates[lv] < 1.0]
+    print("    강화 성공률 : " + "  ".join(f"+{lv} {base_rates[lv]:.2f}→{rates[lv]:.2f}" for lv in steps))
+    print("-" * W)
+    print(f"  런 수                 : {m:>12,}")
+    print(f"  이벤트 발생 (제안 분포) : {len(hit_w):>12,}회  ({len(hit_w) / m * 100:.2f}%)")
+    print(f"  추정 확률 p̂           : {p_hat:>12.4e}  ± {_Z95 * se:.2e}  (95% CI)")
+    if p_hat > 0 and se > 0:
+        rel   = se / p_hat
+        plain = (1 - p_hat) / (p_hat * rel * rel)
+        print(f"  상대 표준 오차         : {rel * 100:>11.1f}%")
+        print(f"  1/p̂                  : {1 / p_hat:>12,.0f}회에 1번")
+        print(f"  일반 MC 환산          : 같은 상대 오차에 약 {plain:,.0f}회 필요  (이번의 {plain / m:,.1f}배)")
+    print("-" * W)
+    print(f"  평균 우도비 (전체 런)   : {mean_w:>12.3f}  (기댓값 1 — 크게 벗어나면 제안 분포가 과도)")
+    print(f"  이벤트 런 가중치 ESS    : {ess:>12,.1f}  / {len(hit_w):,}")
+    if hit_w:
+        print(f"  이벤트 런 가중치 범위   : {min(hit_w):.2e} ~ {max(hit_w):.2e}")
+    else:
+        print("  (이벤트가 한 번도 일어나지 않음 — 런 수를 늘리거나 --is-boost / --is-fail 을 지정하세요)")
     print("=" * W)
 
 
 # =========================================================
 #  EXP 버전 비교 시뮬레이션
 # =========================================================
+def _tier_hours(st: dict, target_level: int, max_tier: int) -> list:
+    """_run_leveling(전체 모드) 결과에서 티어별 소요 시간(h) 목록 추출."""
+    lv_time = st["level_time"]
+    t_total = st["total_time"]
+    hours   = []
+    for t in range(1, min((target_level - 1) // 10 + 1, max_tier) + 1):
+        start_lv = (t - 1) * 10 + 1
+        end_lv   = min(t * 10, target_level)
+        t_start  = lv_time.get(start_lv, 0.0)
+        t_end    = lv_time.get(end_lv + 1, t_total)
+        hours.append((t_end - t_start) / 3600)
+    return hours
+
+
+_COMPARE_MAX_DEFEATS = 1000   # 비교 런의 연속 패배 상한 — 넘으면 그 조건은 진행 불가 (예: Boss)
+
+
+def _compare_worker(args: tuple) -> tuple:
+    """Pool 워커 — (버전, 난이도, 시드) 1건을 실행하고 비교 표에 필요한 값만 반환.
+    master 가 있으면 seed 를 런 번호로 보고 공통 난수열 _CRNStreams(master, seed) 로 실행.
+    반환: (버전, 난이도, 시드, 총시간(h), 전투횟수, 티어별 시간(h) 목록) / 데이터 없으면 None.
+          연속 패배가 _COMPARE_MAX_DEFEATS 에 이르면 (버전, 난이도, 시드, None, 멈춘 레벨)."""
+    ver, seed, target_level, difficulty, master = args
+    if master is None:
+        st = _run_leveling(target_level, difficulty, ver, seed, max_defeats=_COMPARE_MAX_DEFEATS)
+    else:
+        st = _run_leveling(target_level, difficulty, ver, rand=_CRNStreams(master, seed),
+                           max_defeats=_COMPARE_MAX_DEFEATS)
+    if not st:
+        return None
+    if st.get("unreachable"):
+        return ver, difficulty, seed, None, st["level"]
+    return (ver, difficulty, seed, st["total_time"] / 3600, st["total_fights"],
+            _tier_hours(st, target_level, max(TABLES.get("monster_templates", "v1").keys())))
+
+
+# 자유도 1~30 의 t 분포 양측 95% 분위수 (scipy 없이 — 그 이상은 _t95 의 Cornish-Fisher 전개)
+_T95_TABLE = (12.7062, 4.3027, 3.1824, 2.7764, 2.5706, 2.4469, 2.3646, 2.3060, 2.2622, 2.2281,
+              2.2010, 2.1788, 2.1604, 2.1448, 2.1314, 2.1199, 2.1098, 2.1009, 2.0930, 2.0860,
+              2.0796, 2.0739, 2.0687, 2.0639, 2.0595, 2.0555, 2.0518, 2.0484, 2.0452, 2.0423)
+
+
+def _t95(dof: int) -> float:
+    """자유도 dof 인 t 분포의 양측 95% 분위수 (dof ≤ 30 은 표, 그 이상은 정규 분위수의 전개)."""
+    if dof <= len(_T95_TABLE):
+        return _T95_TABLE[max(1, dof) - 1]
+    z = _Z95
+    return (z + (z ** 3 + z) / (4 * dof)
+            + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * dof ** 2)
+            + (3 * z ** 7 + 19 * z ** 5 + 17 * z ** 3 - 15 * z) / (384 * dof ** 3))
+
+
+def _sample_var(values: list) -> float:
+    """표본 분산 (n-1 분모). 표본 1개면 0."""
+    n = len(values)
+    if n < 2:
+        return 0.0
+    mean = sum(values) / n
+    return sum((v - mean) ** 2 for v in values) / (n - 1)
+
+
+def _mean_ci(values: list) -> tuple:
+    """표본 평균과 95% 신뢰구간 반폭 (t 분포, 자유도 n-1 — 런 수가 적은 비교용). 표본 1개면 반폭 0."""
+    n    = len(values)
+    mean = sum(values) / n
+    if n < 2:
+        return mean, 0.0
+    return mean, _t95(n - 1) * (_sample_var(values) / n) ** 0.5
+
+
+@TABLES.fresh
 def simulate_comparison(target_level: int = 70, difficulty: str = "Normal",
-                        seed: int = 42):
+                        seed: int = 42, runs: int = 1, cache: ResultCache = None,
+                        by: str = "version", exp_version: str = "v1", paired: bool = False,
+                        arms: list = None):
     """
-    level_exp.csv 의 모든 EXP 버전을 동일 시드로 실행하여 나란히 비교 출력.
+    level_exp.csv 의 모든 EXP 버전(또는 모든 난이도)을 동일 시드로 실행하여 나란히 비교 출력.
     데이터가 없는 버전(빈 열)은 건너뜀.
+    조건 × 시드(seed, seed+1, ..., seed+runs-1) 조합을 프로세스 풀에서 동시에 실행.
+    runs > 1 이면 각 칸을 평균 ± 95% 신뢰구간으로 표시.
+    cache : ResultCache — (조건, 시드) 조합별 결과를 재사용하고 없는 조합만 실행.
+    by    : "version" 이면 EXP 버전들을 난이도 difficulty 로,
+            "difficulty" 이면 DIFFICULTY 표의 난이도들을 EXP 버전 exp_version 으로 비교.
+    paired: True 이면 공통 난수(CRN) 쌍 비교 — 런 1..runs 를 모든 조건에서 같은 티어·용도별
+            난수열(_CRNStreams(seed, 런 번호))로 실행하고, 첫 조건 대비 런별 차이의 평균 ± 95% CI (t 분포)와
+            분산 감소 배수(독립 표본으로 같은 CI 폭을 얻는 데 필요한 런 수의 배수)를 출력.
+    arms  : 비교할 버전/난이도 이름 목록 (None = 전부). 첫 항목이 기준.
     """
-    versions = _available_exp_versions()
-    max_tier = max(MONSTER_TEMPLATES.keys())
-    num_tiers = (target_level - 1) // 10 + 1
-
-    print(f"  EXP 버전 비교 시뮬레이션: Lv.1 -> Lv.{target_level}"
-          f"  (난이도: {difficulty} / seed:{seed})")
-    print(f"  버전 목록: {', '.join(versions)}")
-    print()
-
-    all_stats = {}
-    for ver in versions:
-        tbl = _load_level_exp_table(ver)
-        if not tbl:
-            print(f"  [{ver}] 데이터 없음 - 건너뜀")
-            continue
-        print(f"  [{ver}] 계산 중...", end="", flush=True)
-        all_stats[ver] = _run_leveling(target_level, difficulty, ver, seed)
+    known   = TABLES.get("difficulty") if by == "difficulty" else _available_exp_versions()
+    only    = arms
+    unknown = [a for a in only or () if a not in known]
+    if unknown:
+        print(f"  [오류] 알 수 없는 비교 대상: {', '.join(unknown)}  (가능: {', '.join(known)})")
+        return
+    runs = max(2 if paired else 1, runs)
+    if paired:
+        ids, master = list(range(1, runs + 1)), seed
+        seed_txt = f"공통 난수 seed:{seed} / {runs}쌍"
+    else:
+        ids, master = list(range(seed, seed + runs)), None
+        seed_txt = f"seed:{seed}" if runs == 1 else f"seed:{seed}~{seed + runs - 1} ({runs}회)"
+
+    if by == "difficulty":
+        if not TABLES.get("level_exp", exp_version):
+            print(f"  [오류] EXP 버전 '{exp_version}' 에 데이터가 없습니다.")
+            return
+        arms  = [(diff, exp_version, diff) for diff in (only or known)]
+        title = "난이도 비교"
+        scope = f"Lv.1 -> Lv.{target_level}  /  EXP:{exp_version}"
+        print(f"  난이도 비교 시뮬레이션: Lv.1 -> Lv.{target_level}"
+              f"  (EXP:{exp_version} / {seed_txt})")
+        print(f"  난이도 목록: {', '.join(a[0] for a in arms)}")
+        print()
+    else:
+        versions = only or known
+        title    = "EXP 버전 비교"
+        scope    = f"Lv.1 -> Lv.{target_level}  /  {difficulty}"
+        print(f"  EXP 버전 비교 시뮬레이션: Lv.1 -> Lv.{target_level}"
+              f"  (난이도: {difficulty} / {seed_txt})")
+        print(f"  버전 목록: {', '.join(versions)}")
+        print()
+        arms = []
+        for ver in versions:
+            if not TABLES.get("level_exp", ver):
+                print(f"  [{ver}] 데이터 없음 - 건너뜀")
+                continue
+            arms.append((ver, ver, difficulty))
+    label_of = {(ver, diff): label for label, ver, diff in arms}
+
+    # 조건 × 시드 조합을 병렬 실행 — 결과는 도착 순서와 무관하게 (조건, 시드) 로 정렬해 병합
+    task_args = [(ver, sd, target_level, diff, master) for _, ver, diff in arms for sd in ids]
+    results   = {label: {} for label, _, _ in arms}
+    keys      = {}
+    if cache is not None:
+        crn     = {"crn_master": master} if paired else {}
+        missing = []
+        for args in task_args:
+            ver, sd, _, diff, _ = args
+            keys[ver, diff, sd] = cache.key("compare", version=ver, seed=sd,
+                                            target_level=target_level, difficulty=diff, **crn)
+            res = cache.get("compare", keys[ver, diff, sd])
+            if res is not None:
+                results[label_of[ver, diff]][sd] = res
+            else:
+                missing.append(args)
+        if len(missing) < len(task_args):
+            print(f"  결과 캐시 적중: {len(task_args) - len(missing):,}/{len(task_args):,}개 조합")
+        task_args = missing
+    if task_args:
+        workers = min(cpu_count() or 1, len(task_args))
+        for ver in {ver for _, ver, _ in arms}:
+            TABLES.warm(*_LEVELING_TABLES, version=ver)
+        with Pool(processes=workers, initializer=TABLES.preload,
+                  initargs=(TABLES.snapshot(),)) as pool:
+            for done, res in enumerate(pool.imap_unordered(_compare_worker, task_args), 1):
+                if res is not None:
+                    ver, diff, sd = res[:3]
+                    results[label_of[ver, diff]][sd] = res[3:]
+                    if cache is not None:
+                        cache.put("compare", keys[ver, diff, sd], res[3:])
+                print(f"\r  계산 중... {done:,}/{len(task_args):,}  ({workers}코어 병렬)",
+                      end="", flush=True)
         print(" 완료!")
 
+    # 진행 불가 런이 하나라도 있는 조건은 표에서 제외 (끝난 런만 평균하면 치우침)
+    stuck = {label: min(res[1] for res in r.values() if res[0] is None)
+             for label, r in results.items() if any(res[0] is None for res in r.values())}
+    for label, level in stuck.items():
+        print(f"  [{label}] Lv.{level} 에서 {_COMPARE_MAX_DEFEATS:,}연패 — 진행 불가, 비교에서 제외")
+    all_stats = {label: [r[sd] for sd in ids if sd in r] for label, r in results.items()
+                 if r and label not in stuck}
     if not all_stats:
         print("\n  비교할 데이터가 없습니다. level_exp.csv 를 채워주세요.")
         return
 
     # ── 비교 표 출력 ──────────────────────────────────────
-    W   = 90
+    arm_list  = list(all_stats.keys())
+    num_tiers = len(next(iter(all_stats.values()))[0][2])
+    w_label   = max(6, *(len(label) for label in arm_list))
+    w_total   = 10 if runs == 1 else 14
+    w_tier    = 8  if runs == 1 else 12
+    W   = 90 if runs == 1 else max(90, 28 + w_label + w_total + num_tiers * (w_tier + 3))
     DIV = "-" * W
-    ver_list = list(all_stats.keys())
+
+    def cell(values: list, width: int, digits: int = 2) -> str:
+        mean, ci = _mean_ci(values)
+        txt = f"{mean:.{digits}f}" if runs == 1 else f"{mean:.{digits}f}±{ci:.{digits}f}"
+        return f"{txt:>{width}}"
 
     print()
     print("=" * W)
-    print(f"  [EXP 버전 비교]  Lv.1 -> Lv.{target_level}  /  {difficulty}  /  seed:{seed}")
+    print(f"  [{title}]  {scope}  /  {seed_txt}")
     print("=" * W)
 
     # 헤더
-    hdr = f"  {'버전':<6} | {'총시간(h)':>10} | {'전투횟수':>8} |"
+    hdr = (f"  {'난이도' if by == 'difficulty' else '버전':<{w_label}} | "
+           f"{'총시간(h)':>{w_total}} | {'전투횟수':>8} |")
     for t in range(1, num_tiers + 1):
-        if t > max_tier:
-            break
-        hdr += f" Tier{t}(h) |"
+        hdr += f" {'Tier' + str(t) + '(h)':>{w_tier}} |"
     print(hdr)
     print(DIV)
 
-    for ver, st in all_stats.items():
-        lv_time   = st["level_time"]
-        t_total   = st["total_time"]
-        t_fights  = st["total_fights"]
-        t_ct      = st["tier_combat_time"]
-
-        row = f"  {ver:<6} | {t_total/3600:>10.2f} | {t_fights:>8,} |"
-        for t in range(1, num_tiers + 1):
-            if t > max_tier:
-                break
-            start_lv = (t - 1) * 10 + 1
-            end_lv   = min(t * 10, target_level)
-            t_start  = lv_time.get(start_lv, 0.0)
-            t_end    = lv_time.get(end_lv + 1, t_total)
-            dur_h    = (t_end - t_start) / 3600
-            row += f" {dur_h:>8.2f} |"
+    for label, rows in all_stats.items():
+        fights = sum(r[1] for r in rows) / len(rows)
+        row = f"  {label:<{w_label}} | {cell([r[0] for r in rows], w_total)} | {fights:>8,.0f} |"
+        for t in range(num_tiers):
+            row += f" {cell([r[2][t] for r in rows], w_tier)} |"
         print(row)
 
     print(DIV)
 
-    # 버전 간 차이 (첫 번째 버전 대비 %)
-    if len(ver_list) >= 2:
-        base_ver = ver_list[0]
-        base_st  = all_stats[base_ver]
-        print(f"\n  [{base_ver} 대비 변화율]")
+    # 조건 간 차이 (첫 번째 조건 대비 %, 시드 평균 기준)
+    if len(arm_list) >= 2 and paired:
+        base = arm_list[0]
+        print(f"\n  [{base} 대비 런별 차이 — 공통 난수 쌍 평균 ± 95% CI]")
+        print(DIV)
+        for label in arm_list[1:]:
+            common = [sd for sd in ids if sd in results[base] and sd in results[label]]
+            a  = [results[base][sd][0] for sd in common]
+            b  = [results[label][sd][0] for sd in common]
+            d  = [y - x for x, y in zip(a, b)]
+            df = [results[label][sd][1] - results[base][sd][1] for sd in common]
+            base_h        = sum(a) / len(a)
+            mean_d, ci_d  = _mean_ci(d)
+            var_d         = _sample_var(d)
+            # 같은 런 수의 독립 표본 CI(자유도 2n-2) 대비 쌍 CI(자유도 n-1) 폭 비의 제곱
+            n      = len(d)
+            factor = ((_t95(2 * n - 2) ** 2 * (_sample_var(a) + _sample_var(b)))
+                      / (_t95(n - 1) ** 2 * var_d) if var_d > 0 else float("inf"))
+            print(f"  {label} vs {base}  |  "
+                  f"총시간: {mean_d / base_h * 100:+.2f}% ± {ci_d / base_h * 100:.2f}%"
+                  f"  ({mean_d:+.3f}h ± {ci_d:.3f}h)  |  "
+                  f"전투횟수: {sum(df) / len(df):+,.0f}회  |  분산 감소 ×{factor:,.1f}")
         print(DIV)
-        for ver in ver_list[1:]:
-            st = all_stats[ver]
-            delta_pct = (st["total_time"] - base_st["total_time"]) / base_st["total_time"] * 100
-            delta_h   = (st["total_time"] - base_st["total_time"]) / 3600
+        print("  (CI 는 t 분포(자유도 N-1). 분산 감소 ×k: 독립 표본으로 같은 CI 폭을 얻으려면 약 k배의 런이 필요)")
+    elif len(arm_list) >= 2:
+        base   = arm_list[0]
+        base_h = _mean_ci([r[0] for r in all_stats[base]])[0]
+        base_f = sum(r[1] for r in all_stats[base]) / len(all_stats[base])
+        print(f"\n  [{base} 대비 변화율]")
+        print(DIV)
+        for label in arm_list[1:]:
+            rows      = all_stats[label]
+            arm_h     = _mean_ci([r[0] for r in rows])[0]
+            arm_f     = sum(r[1] for r in rows) / len(rows)
+            delta_pct = (arm_h - base_h) / base_h * 100
+            delta_h   = arm_h - base_h
             sign = "+" if delta_pct >= 0 else ""
-            print(f"  {ver} vs {base_ver}  |  "
+            print(f"  {label} vs {base}  |  "
                   f"총시간: {sign}{delta_pct:.1f}%  ({sign}{delta_h:.2f}h)  |  "
-                  f"전투횟수: {sign}{st['total_fights']-base_st['total_fights']:,}회")
+                  f"전투횟수: {sign}{arm_f - base_f:,.0f}회")
         print(DIV)
 
     print("=" * W)
 
 
+# =========================================================
+#  엔진 동등성 검증 (--validate) — 고속 경로 vs 참조 엔진
+# =========================================================
+_VALIDATE_ALPHA  = 0.01   # 분포 검정 전체 유의수준 (검정 수로 Bonferroni 보정)
+_VALIDATE_FIGHTS = 2000   # 단일 전투 정확 일치 검사 상태 수
+
+
+def _ks_2samp(a: list, b: list) -> tuple:
+    """2표본 Kolmogorov–Smirnov 검정. 반환: (D, 근사 p값).
+    이산 값(동률)이 많으면 보수적 (p값이 실제보다 큼)."""
+    a, b   = sorted(a), sorted(b)
+    na, nb = len(a), len(b)
+    i = j = 0
+    d = 0.0
+    while i < na and j < nb:
+        x = a[i] if a[i] <= b[j] else b[j]
+        while i < na and a[i] == x:
+            i += 1
+        while j < nb and b[j] == x:
+            j += 1
+        d = max(d, abs(i / na - j / nb))
+    en  = (na * nb / (na + nb)) ** 0.5
+    lam = (en + 0.12 + 0.11 / en) * d
+    if lam < 0.2:
+        return d, 1.0
+    p = 2.0 * sum((-1) ** (k - 1) * math.exp(-2.0 * k * k * lam * lam) for k in range(1, 101))
+    return d, min(1.0, max(0.0, p))
+
+
+def _chi2_sf(x: float, dof: int) -> float:
+    """카이제곱 분포 상위 꼬리 확률 P(X >= x) — 정규화 상위 불완전 감마 Q(dof/2, x/2)."""
+    if x <= 0.0:
+        return 1.0
+    s, z = dof / 2.0, x / 2.0
+    log_pre = s * math.log(z) - z - math.lgamma(s)
+    if z < s + 1.0:                         # 급수 전개 → P, Q = 1 - P
+        term = total = 1.0 / s
+        a = s
+        for _ in range(1000):
+            a    += 1.0
+            term *= z / a
+            total += term
+            if abs(term) < abs(total) * 1e-15:
+                break
+        return max(0.0, 1.0 - total * math.exp(log_pre))
+    b = z + 1.0 - s                         # 연분수 (Lentz)
+    c = 1.0 / 1e-300
+    d = 1.0 / b
+    h = d
+    for k in range(1, 1000):
+        an = -k * (k - s)
+        b += 2.0
+        d  = an * d + b
+        d  = 1e-300 if abs(d) < 1e-300 else d
+        c  = b + an / c
+        c  = 1e-300 if abs(c) < 1e-300 else c
+        d  = 1.0 / d
+        delta = d * c
+        h *= delta
+        if abs(delta - 1.0) < 1e-15:
+            break
+    return min(1.0, math.exp(log_pre) * h)
+
+
+def _chi2_homogeneity(a: list, b: list, min_expected: float = 5.0) -> tuple:
+    """이산 값 두 표본의 2×k 카이제곱 동질성 검정. 인접 값 구간은 기대 빈도가
+    min_expected 이상이 되도록 병합. 반환: (통계량, 자유도, p값) — 병합 후 구간이 1개(자유도 0)면
+    표본이 부족해 검정할 수 없으므로 (0, 0, None)."""
+    na, nb = len(a), len(b)
+    ca, cb = {}, {}
+    for v in a:
+        ca[v] = ca.get(v, 0) + 1
+    for v in b:
+        cb[v] = cb.get(v, 0) + 1
+    frac = min(na, nb) / (na + nb)
+    bins, oa, ob = [], 0, 0
+    for v in sorted(set(ca) | set(cb)):
+        oa += ca.get(v, 0)
+        ob += cb.get(v, 0)
+        if (oa + ob) * frac >= min_expected:
+            bins.append((oa, ob))
+            oa = ob = 0
+    if oa or ob:
+        if bins:
+            pa, pb  = bins.pop()
+            oa, ob  = oa + pa, ob + pb
+        bins.append((oa, ob))
+    if len(bins) < 2:
+        return 0.0, 0, None
+    stat = 0.0
+    for oa, ob in bins:
+        tot = oa + ob
+        ea, eb = tot * na / (na + nb), tot * nb / (na + nb)
+        stat += (oa - ea) ** 2 / ea + (ob - eb) ** 2 / eb
+    dof = len(bins) - 1
+    return stat, dof, _chi2_sf(stat, dof)
+
+
+def _validate_spec(rng: random.Random, difficulties: list, max_tier: int) -> tuple:
+    """무작위 전투 시작 상태 1개 (레벨·무기·HP/MP·쿨타임 위상·몬스터 그룹)."""
+    level   = rng.randint(1, 70)
+    tier    = max(1, min(max_tier, _tier_for_level(level) + rng.choice((-1, 0, 0, 1))))
+    w_tier  = max(1, min(max_tier, tier + rng.choice((-1, 0, 1))))
+    sim_t   = rng.choice((0.0, rng.uniform(0.0, 5000.0)))
+    skills  = tuple(sim_t - rng.uniform(0.0, cd * 1.5) for cd in SKILL_COOLDOWNS)
+    return (level, w_tier, rng.randint(0, 9), rng.uniform(0.05, 1.0), rng.uniform(0.0, 1.0),
+            sim_t, skills, sim_t - rng.uniform(0.0, 2 * POTION_COOLDOWN),
+            tier, rng.choice((2, 3)), rng.choice(difficulties))
+
+
+def _validate_player(spec: tuple) -> Character:
+    level, w_tier, w_enh, hp_frac, mp_frac, _, skills, potion_t = spec[:8]
+    player = Character(level=level)
+    _equip(player, w_tier, w_enh)
+    player.hp = player.max_hp * hp_frac
+    player.mp = player.max_mp * mp_frac
+    for sk, t in zip(player.skill_list, skills):
+        sk.last_used_time = t
+    player.last_potion_time = potion_t
+    return player
+
+
+def _fight_state(result: tuple, player: Character) -> tuple:
+    """전투 결과 + 전투 후 플레이어 상태 (정확 일치 비교용)."""
+    return (result, player.hp, player.mp, player.last_basic_attack_time,
+            tuple(sk.last_used_time for sk in player.skill_list), player.last_potion_time)
+
+
+def _validate_fights(n: int, seed: int) -> dict:
+    """
+    무작위 상태 n개에서 _fight(참조) 와 _fight_analytic / FightCache(미스·적중 재생) 결과를
+    비트 단위로 비교. 반환: {"analytic": (일치, 불일치, 미적용), "cache_miss": (...), "cache_hit": (...)}
+    """
+    rng       = random.Random(seed)
+    templates = TABLES.get("monster_templates", "v1")
+    diffs     = list(TABLES.get("difficulty").keys())
+    max_tier  = max(templates.keys())
+    counts    = {k: [0, 0, 0] for k in ("analytic", "cache_miss", "cache_hit")}
+
+    def check(kind: str, got: tuple, ref: tuple):
+        counts[kind][0 if got == ref else 1] += 1
+
+    for _ in range(n):
+        spec  = _validate_spec(rng, diffs, max_tier)
+        sim_t, tier, count, diff = spec[5], spec[8], spec[9], spec[10]
+
+        player = _validate_player(spec)
+        ref    = _fight_state(_fight(player, [Monster(tier=tier, index=i, difficulty=diff)
+                                              for i in range(count)], 300, sim_t), player)
+
+        player = _validate_player(spec)
+        res    = _fight_analytic(player, [Monster(tier=tier, index=i, difficulty=diff)
+                                          for i in range(count)], 300, sim_t)
+        if res is None:
+            counts["analytic"][2] += 1
+        else:
+            check("analytic", _fight_state(res, player), ref)
+
+        cache = FightCache()
+        for kind in ("cache_miss", "cache_hit"):
+            player = _validate_player(spec)
+            hits   = cache.hits
+            res    = cache.fight(player, tier, count, diff, templates, 300, sim_t)
+            if kind == "cache_hit" and cache.hits == hits:
+                counts[kind][2] += 1   # 저장 제외(동률) 또는 min_sim 미달 → 재생 없음
+            else:
+                check(kind, _fight_state(res, player), ref)
+    return {k: tuple(v) for k, v in counts.items()}
+
+
+def _validate_row(st: dict) -> dict:
+    """_run_leveling(전체 모드) 결과에서 비교 지표 추출."""
+    return {
+        "hours":       st["total_time"] / 3600,
+        "drops":       sum(st["weapon_drops"].values()),
+        "equips":      st["weapon_equips"],
+        "final_atk":   st["final_weapon"]["atk"],
+        "tier_fights": tuple(st["tier_fights"][t] for t in sorted(st["tier_fights"])),
+    }
+
+
+def _validate_worker(args: tuple) -> tuple:
+    """Pool 워커 — 같은 시드로 참조 전투 엔진(캐시·해석 솔버 끔)과 기본 고속 경로를 실행해
+    결과가 같은지, 런별 스트림 _run_stream(master, seed) 으로 lite(Monte Carlo) 와
+    전체 모드(--replay) 결과가 같은지 확인. 분포 검정용 참조 행은 드랍·강화까지 참조 구현
+    (reference=True — 처치별 random() 판정 + _run_enhance) 으로 따로 실행.
+    반환: (seed, 참조 행, 기본 경로 행, 전투 엔진 일치 여부, 스트림 재실행 일치 여부)"""
+    seed, target_level, difficulty, exp_version, master = args
+    engine = _run_leveling(target_level, difficulty, exp_version, seed,
+                           use_fight_cache=False, analytic_fight=False)
+    fast   = _run_leveling(target_level, difficulty, exp_version, seed)
+    if not engine:
+        return seed, None, None, True, True
+    ref  = _run_leveling(target_level, difficulty, exp_version, seed,
+                         use_fight_cache=False, analytic_fight=False, reference=True)
+    lite = _run_leveling(target_level, difficulty, exp_version, lite=True,
+                         rand=_run_stream(master, seed))
+    full = _run_leveling(target_level, difficulty, exp_version, rand=_run_stream(master, seed))
+    fast_row = _validate_row(fast)
+    return (seed, _validate_row(ref), fast_row, _validate_row(engine) == fast_row,
+            _mc_row(lite) == _mc_row(full))
+
+
+def _validate_batch_worker(args: tuple) -> list:
+    """Pool 워커 — run_leveling_batch 1회 (시드 고정) 결과를 지표 행 목록으로 변환."""
+    seed, size, target_level, difficulty, exp_version = args
+    res = run_leveling_batch(size, target_level, difficulty, exp_version, seed=seed)
+    if not res:
+        return []
+    drops = res["weapon_drops"].sum(axis=1)
+    return [{"hours": float(res["total_time"][i]) / 3600, "drops": int(drops[i]),
+             "equips": int(res["weapon_equips"][i]), "final_atk": int(res["final_atk"][i])}
+            for i in range(size)]
+
+
+@TABLES.fresh
+def simulate_validation(n: int = 100, target_level: int = 70, difficulty: str = "Normal",
+                        exp_version: str = "v1", seed: int = 1,
+                        fights: int = _VALIDATE_FIGHTS) -> int:
+    """
+    고속 경로(FightCache, 해석적 솔버, NumPy 배치 엔진)가 참조 엔진과 같은 답을 내는지 검증.
+    1) 단일 전투: 무작위 상태 fights 개에서 _fight 와 결과·전투 후 상태가 비트 단위로 같은지.
+    2) 레벨업 시드별: 시드 seed..seed+n-1 각각을 참조 전투 엔진(_run_leveling, 캐시·해석 솔버 끔)과
+       기본 경로로 실행해 결과가 정확히 같은지. 또 마스터 시드 seed 의 런 번호별 스트림으로
+       lite(Monte Carlo) 와 전체 모드(--replay) 결과가 같은지.
+    3) 분포: 참조(드랍·강화까지 reference=True, 앞쪽 절반 시드) vs 기본 경로(뒤쪽 절반 시드),
+       참조(전체) vs 배치 엔진 (numpy 있을 때) — 총 소요 시간·티어별 전투 수는 KS,
+       드랍·장착·최종 ATK 는 카이제곱 (기대 빈도 5 미만 구간은 병합).
+       유의수준 _VALIDATE_ALPHA 를 실제로 검정한 수로 나눈 값(Bonferroni) 미만이면 불합격.
+       병합 후 자유도가 0 인 카이제곱(표본 부족)은 검정 불가로 표시하고 Bonferroni 검정 수에서 제외.
+    반환: 종료 코드 — 0 합격, 1 불합격, 2 입력 오류,
+          3 판정 불가 (다른 항목은 합격이지만 분포 검정의 과반이 검정 불가 — 시드 수를 늘려 재실행).
+    """
+    if not TABLES.get("level_exp", exp_version):
+        print(f"  [오류] EXP 버전 '{exp_version}' 에 데이터가 없습니다.")
+        return 2
+    n  = max(2, n)
+    W  = 90
+    ok = True
+    print("=" * W)
+    print(f"  [엔진 동등성 검증]  Lv.1 -> Lv.{target_level}  /  {difficulty}  /  EXP:{exp_version}"
+          f"  /  seed:{seed}~{seed + n - 1} ({n}개)")
+    print("=" * W)
+
+    # ── 1) 단일 전투 정확 일치 ──────────────────────────
+    t0 = time.monotonic()
+    fight_res = _validate_fights(fights, seed)
+    print(f"  [단일 전투 정확 일치]  상태 {fights:,}개  ({time.monotonic() - t0:.1f}초)")
+    labels = {"analytic": "_fight_analytic", "cache_miss": "FightCache (미스)",
+              "cache_hit": "FightCache (적중 재생)"}
+    for kind, (same, diff, skipped) in fight_res.items():
+        ok &= diff == 0
+        print(f"    {labels[kind]:<24} 일치 {same:>6,}  /  불일치 {diff:>4,}  /  미적용 {skipped:>6,}"
+              f"   {'OK' if diff == 0 else '✗ 불합격'}")
+    print("-" * W)
+
+    # ── 2) 레벨업 시드별 실행 (병렬) ─────────────────────
+    TABLES.warm(*_LEVELING_TABLES, version=exp_version)
+    task_args = [(sd, target_level, difficulty, exp_version, seed) for sd in range(seed, seed + n)]
+    ref_rows, fast_rows, batch_rows = {}, {}, []
+    mismatch, replay_bad = [], []
+    workers = min(cpu_count() or 1, n)
+    t0 = time.monotonic()
+    with Pool(processes=workers, initializer=TABLES.preload,
+              initargs=(TABLES.snapshot(),)) as pool:
+        for done, (sd, ref, fast, exact, same) in enumerate(
+                pool.imap_unordered(_validate_worker, task_args), 1):
+            if ref is not None:
+                ref_rows[sd], fast_rows[sd] = ref, fast
+            if not exact:
+                mismatch.append(sd)
+            if not same:
+                replay_bad.append(sd)
+            print(f"\r  레벨업 실행 중... {done:,}/{n:,}  ({workers}코어 병렬)", end="", flush=True)
+        if np is not None:
+            per = -(-n // workers)
+            batch_args = [(seed + 1_000_003 * (i + 1), size, target_level, difficulty, exp_version)
+                          for i, (_, size) in enumerate(_mc_chunks(n, per))]
+            for rows in pool.imap(_validate_batch_worker, batch_args):
+                batch_rows.extend(rows)
+    print(f"\r  레벨업 실행 완료: {len(ref_rows):,}개 시드 × 3 엔진"
+          + (f" + 배치 {len(batch_rows):,}회" if batch_rows else "") +
+          f"  ({time.monotonic() - t0:.1f}초)")
+    seeds    = sorted(ref_rows)
+    mismatch.sort()
+    ok &= not mismatch
+    print(f"  [레벨업 시드별 정확 일치]  참조 전투 엔진 vs 기본 경로: 일치 {len(seeds) - len(mismatch):,}"
+          f"  /  불일치 {len(mismatch):,}   {'OK' if not mismatch else '✗ 불합격'}")
+    if mismatch:
+        print(f"    불일치 시드: {', '.join(map(str, mismatch[:10]))}{' ...' if len(mismatch) > 10 else ''}")
+    ok &= not replay_bad
+    print(f"  [런별 스트림 재실행 일치]  lite vs 전체 모드: 일치 {len(seeds) - len(replay_bad):,}"
+          f"  /  불일치 {len(replay_bad):,}   {'OK' if not replay_bad else '✗ 불합격'}")
+    if replay_bad:
+        print(f"    불일치 런: {', '.join(map(str, sorted(replay_bad)[:10]))}"
+              f"{' ...' if len(replay_bad) > 10 else ''}")
+    print("-" * W)
+
+    # ── 3) 분포 검정 ─────────────────────────────────────
+    half  = len(seeds) // 2
+    pairs = [("참조 vs 기본 경로", [ref_rows[sd] for sd in seeds[:half]],
+              [fast_rows[sd] for sd in seeds[half:]])]
+    if batch_rows:
+        pairs.append(("참조 vs 배치 엔진", [ref_rows[sd] for sd in seeds], batch_rows))
+    elif np is None:
+        print("  (numpy 없음 — 배치 엔진 분포 검정 생략)")
+
+    tests = []
+    for label, a, b in pairs:
+        tests.append((label, "hours", "KS", [r["hours"] for r in a], [r["hours"] for r in b]))
+        if "tier_fights" in b[0]:
+            for t in range(len(a[0]["tier_fights"])):
+                fa = [r["tier_fights"][t] for r in a]
+                fb = [r["tier_fights"][t] for r in b]
+                if any(fa) or any(fb):   # 목표 레벨 밖 티어(전부 0) 제외
+                    tests.append((label, f"fights/Tier{t + 1}", "KS", fa, fb))
+        for key in ("drops", "equips", "final_atk"):
+            tests.append((label, key, "χ²", [r[key] for r in a], [r[key] for r in b]))
+
+    # 검정 불가(자유도 0) 항목은 Bonferroni 검정 수에서 제외 — 먼저 모두 계산한 뒤 유의수준 결정
+    results = []
+    for label, key, kind, a, b in tests:
+        if kind == "KS":
+            stat, p = _ks_2samp(a, b)
+            stat_txt = f"D={stat:.4f}"
+        else:
+            stat, dof, p = _chi2_homogeneity(a, b)
+            stat_txt = f"{stat:.1f}/{dof}"
+        results.append((label, key, kind, stat_txt, p, sum(a) / len(a), sum(b) / len(b)))
+    untested = sum(1 for r in results if r[4] is None)
+    tested   = len(results) - untested
+    alpha    = _VALIDATE_ALPHA / max(1, tested)
+
+    print(f"  [분포 검정]  {tested}개 (검정 불가 {untested}개 제외)  /  "
+          f"유의수준 {_VALIDATE_ALPHA:g} / {tested} = {alpha:.2e} (Bonferroni)")
+    print(f"  {'비교':<18} | {'지표':<14} | {'검정':<4} | {'통계량':>10} | {'p값':>9} | {'평균 A':>11} | {'평균 B':>11} |")
+    print("-" * W)
+    for label, key, kind, stat_txt, p, mean_a, mean_b in results:
+        mean_txt = f" {mean_a:>11.2f} | {mean_b:>11.2f} |"
+        if p is None:
+            print(f"  {label:<18} | {key:<14} | {kind:<4} | {stat_txt:>10} | {'-':>9} |"
+                  f"{mean_txt}  ⚠ 검정 불가")
+            continue
+        passed = p >= alpha
+        ok &= passed
+        print(f"  {label:<18} | {key:<14} | {kind:<4} | {stat_txt:>10} | {p:>9.4f} |"
+              f"{mean_txt}{'' if passed else '  ✗ 불합격'}")
+    if untested:
+        print(f"  ⚠ 경고: {untested}개 검정은 구간 병합 후 자유도가 0 (표본 부족) — "
+              f"시드 수(n={n})를 늘려 다시 실행하세요.")
+    print("=" * W)
+    if not ok:
+        print("  결과: 불합격 — 위 ✗ 항목 확인")
+        code = 1
+    elif untested * 2 > len(results):
+        print(f"  결과: 판정 불가 — 분포 검정 {len(results)}개 중 {untested}개가 검정 불가 "
+              f"(시드 수 n={n} 부족)")
+        code = 3
+    else:
+        print("  결과: 합격 — 고속 경로가 참조 엔진과 일치"
+              + (f"  (검정 불가 {untested}개)" if untested else ""))
+        code = 0
+    print("=" * W)
+    return code
+
+
+# =========================================================
+#  벤치마크 (--bench) — 고정 시드 + 워밍업, 중앙값/IQR, JSON 기준선 비교
+# =========================================================
+_BENCH_SEED       = 20240601   # 모든 벤치마크 공통 기준 시드 (반복마다 동일 작업)
+_BENCH_FIGHTS     = 50         # _fight 벤치마크 1회 측정당 전투 수
+_BENCH_ENHANCE    = 20000      # _run_enhance 벤치마크 1회 측정당 강화 호출 수
+_BENCH_MC_LEVEL   = 30         # Monte Carlo 스케일링 목표 레벨 (짧게 유지)
+_BENCH_MC_PER_CPU = 16         # Monte Carlo 워커 1개당 런 수 (weak) / 워커 1개 기준 총 런 수 (strong)
+
+
+def _quantile(values: list, q: float) -> float:
+    """정렬된 values 의 q 분위수 (선형 보간)."""
+    pos = (len(values) - 1) * q
+    lo  = int(pos)
+    hi  = min(lo + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (pos - lo)
+
+
+def _bench_measure(fn, setup=None, repeat: int = 5, warmup: int = 1) -> dict:
+    """
+    fn(*setup()) 을 warmup 회 버린 뒤 repeat 회 측정 (time.perf_counter, setup 은 측정 제외).
+    반환: {"median", "q1", "q3", "iqr", "repeat", "check"} — check 는 마지막 fn 반환값
+    (작업량 검증용 체크섬: 코드 변경 후 값이 달라지면 '같은 일'을 잰 것이 아님).
+    """
+    samples, check = [], None
+    for i in range(warmup + repeat):
+        args  = setup() if setup is not None else ()
+        t0    = time.perf_counter()
+        check = fn(*args)
+        dt    = time.perf_counter() - t0
+        if i >= warmup:
+            samples.append(dt)
+    samples.sort()
+    q1, q3 = _quantile(samples, 0.25), _quantile(samples, 0.75)
+    return {"median": _quantile(samples, 0.5), "q1": q1, "q3": q3, "iqr": q3 - q1,
+            "repeat": repeat, "check": check}
+
+
+def _bench_fight_setup(tier: int, difficulty: str) -> tuple:
+    """Tier 시작 레벨 캐릭터 × 2~3마리 그룹 _BENCH_FIGHTS 쌍 (시드 고정)."""
+    rng   = random.Random(_BENCH_SEED + tier)
+    level = (tier - 1) * 10 + 1
+    pairs = []
+    for _ in range(_BENCH_FIGHTS):
+        count = 2 if rng.random() < 0.4 else 3
+        pairs.append((Character(level=level),
+                      [Monster(tier=tier, index=i, difficulty=difficulty) for i in range(count)]))
+    return (pairs,)
+
+
+def _bench_fights(pairs: list) -> float:
+    """이벤트 힙 엔진(_fight) 으로 전투 묶음 실행. 체크섬: 전투 시간 합."""
+    return round(sum(_fight(p, ms)[3] for p, ms in pairs), 6)
+
+
+def _bench_leveling(lite: bool, fight_cache: FightCache) -> float:
+    """고정 시드 Lv.1 → 70 레벨업 1회. 체크섬: 총 소요 시간(초).
+    fight_cache: setup 에서 만든 빈 캐시 — 공용 FIGHT_CACHE 를 쓰면 워밍업이 채운 결과를
+                 재생할 뿐이므로 측정마다 새 캐시로 실행."""
+    st = _run_leveling(70, "Normal", "v1", seed=_BENCH_SEED, lite=lite,
+                       fight_cache=fight_cache)
+    return round(st["total_time"], 6)
+
+
+def _bench_enhance() -> int:
+    """_run_enhance 참조 구현을 티어별로 반복 호출. 체크섬: 최종 강화 단계 합."""
+    rng   = random.Random(_BENCH_SEED)
+    table = TABLES.get("enhance")
+    tiers = sorted(TABLES.get("weapon_stat").keys())
+    total = 0
+    for i in range(_BENCH_ENHANCE):
+        tier   = tiers[i % len(tiers)]
+        total += _run_enhance(table, tier, calc_weapon_atk(tier, 5), 0, rng.random)[0]
+    return total
+
+
+def _bench_mc_worker(args: tuple) -> float:
+    """Pool 워커 — 런 번호를 시드로 lite 레벨업 실행 (워커 수와 무관하게 같은 작업).
+    fork 로 물려받은 공용 FIGHT_CACHE 대신 작업마다 빈 FightCache 사용 (이전 측정 결과 재생 방지)."""
+    start, size, target_level = args
+    fight_cache = FightCache()
+    return sum(_run_leveling(target_level, "Normal", "v1", seed=_BENCH_SEED + run_id,
+                             lite=True, fight_cache=fight_cache)["total_time"]
+               for run_id in range(start, start + size))
+
+
+def _bench_mc(n: int, workers: int) -> float:
+    """n 회 Monte Carlo 를 workers 프로세스로 실행 (Pool 생성 포함). 체크섬: 총 시간 합."""
+    task_args = [(start, size, _BENCH_MC_LEVEL) for start, size in _mc_chunks(n, -(-n // workers))]
+    with Pool(processes=workers, initializer=TABLES.preload,
+              initargs=(TABLES.snapshot(),)) as pool:
+        return round(sum(pool.map(_bench_mc_worker, task_args)), 6)
+
+
+def _bench_cases() -> list:
+    """(이름, fn, setup, repeat, warmup) 목록 — 이름은 기준선 JSON 의 키."""
+    cases = []
+    for tier in sorted(TABLES.get("monster_templates", "v1").keys()):
+        for diff in TABLES.get("difficulty").keys():
+            cases.append((f"fight/tier{tier}/{diff}", _bench_fights,
+                          lambda t=tier, d=diff: _bench_fight_setup(t, d), 7, 1))
+    cases.append(("leveling/lite/lv70", lambda c: _bench_leveling(True, c),
+                  lambda: (FightCache(),), 5, 1))
+    cases.append(("leveling/full/lv70", lambda c: _bench_leveling(False, c),
+                  lambda: (FightCache(),), 5, 1))
+    cases.append(("enhance/run_enhance", _bench_enhance, None, 7, 1))
+    cpus    = cpu_count() or 1
+    workers = sorted({w for w in (1, 2, 4, 8, 16, 32, 64) if w <= cpus} | {cpus})
+    for w in workers:
+        cases.append((f"mc/strong/w{w}", lambda w=w: _bench_mc(_BENCH_MC_PER_CPU, w), None, 3, 1))
+        cases.append((f"mc/weak/w{w}", lambda w=w: _bench_mc(_BENCH_MC_PER_CPU * w, w), None, 3, 1))
+    return cases
+
+
+@TABLES.fresh
+def simulate_benchmark(out_path: str = None, baseline_path: str = None,
+                       threshold: float = 10.0, name_filter: str = None) -> int:
+    """
+    벤치마크 스위트 실행 후 결과 표 출력.
+    out_path     : 결과를 JSON 기준선으로 저장할 경로.
+    baseline_path: 이전 기준선 JSON — 같은 이름끼리 중앙값을 비교해 threshold(%) 이상
+                   느려지면 회귀로 표시. 체크섬이 다르면 '작업 변경'으로 따로 표시.
+    name_filter  : 이름에 이 문자열이 포함된 벤치마크만 실행.
+    반환: 회귀 건수 (기준선이 없으면 0). 기준선을 읽을 수 없거나 실행할 벤치마크가 없으면 -1.
+    """
+    TABLES.warm(*_LEVELING_TABLES, version="v1")
+    baseline = None
+    if baseline_path:
+        try:
+            with open(baseline_path, encoding="utf-8") as f:
+                baseline = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"  [오류] 기준선 파일을 읽을 수 없습니다: {baseline_path} ({e})")
+            return -1
+
+    cases = [c for c in _bench_cases() if not name_filter or name_filter in c[0]]
+    if not cases:
+        print(f"  [오류] '{name_filter}' 에 해당하는 벤치마크가 없습니다.")
+        return -1
+
+    W = 90
+    print("=" * W)
+    print(f"  [벤치마크]  {len(cases)}개  /  seed:{_BENCH_SEED}  /  {cpu_count() or 1}코어"
+          + (f"  /  기준선: {baseline_path} (임계 {threshold:g}%)" if baseline else ""))
+    print("=" * W)
+    print(f"  {'이름':<24} | {'중앙값(ms)':>11} | {'IQR(ms)':>9} | {'기준선(ms)':>11} | {'변화':>8} |")
+    print("-" * W)
+
+    results, regressions = {}, 0
+    base_res = baseline.get("results", {}) if baseline else {}
+    for name, fn, setup, repeat, warmup in cases:
+        res = _bench_measure(fn, setup, repeat, warmup)
+        results[name] = res
+        row = f"  {name:<24} | {res['median'] * 1e3:>11.2f} | {res['iqr'] * 1e3:>9.2f} |"
+        old = base_res.get(name)
+        if old is None:
+            row += f" {'-':>11} | {'-':>8} |"
+        else:
+            pct  = (res["median"] - old["median"]) / old["median"] * 100 if old["median"] else 0.0
+            row += f" {old['median'] * 1e3:>11.2f} | {pct:>+7.1f}% |"
+            if pct > threshold:
+                regressions += 1
+                row += "  ▲ 회귀"
+            if old.get("check") != res["check"]:
+                row += "  ≠ 작업 변경"
+        print(row)
+
+    print("-" * W)
+    if baseline:
+        missing = sorted(set(base_res) - set(results))
+        if missing and not name_filter:
+            print(f"  기준선에만 있는 항목: {', '.join(missing)}")
+        print(f"  회귀 {regressions}건 (중앙값 +{threshold:g}% 초과)")
+
+    if out_path:
+        doc = {
+            "meta": {
+                "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "python":  sys.version.split()[0],
+                "platform": sys.platform,
+                "cpu_count": cpu_count() or 1,
+                "numpy":   np.__version__ if np is not None else None,
+                "seed":    _BENCH_SEED,
+            },
+            "results": results,
+        }
+        with open(out_path, "w", encoding="utf-8") as f:
+            json.dump(doc, f, ensure_ascii=False, indent=2, sort_keys=True)
+        print(f"  기준선 저장: {out_path}")
+    print("=" * W)
+    return regressions
+
+
 # =========================================================
 #  진입점
 # =========================================================
+def _parse_speed(text: str) -> float:
+    """--speed 인자 파싱: '4', '4x', '0.5X' → 배속(float)."""
+    try:
+        return float(text.rstrip("xX"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"배속 형식 오류: {text!r} (예: 4x)")
+
+
+def _int_at_least(low: int):
+    """low 이상의 정수만 받는 argparse type (예: --chunk 0 → 파싱 단계에서 오류)."""
+    def parse(text: str) -> int:
+        try:
+            value = int(text)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"정수가 아닙니다: {text!r}")
+        if value < low:
+            raise argparse.ArgumentTypeError(f"{low} 이상이어야 합니다: {value}")
+        return value
+    return parse
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="MMORPG 레벨업 시뮬레이터")
     parser.add_argument("--log-tier", type=int,
                         help="단일 전투 로그를 출력할 몬스터 티어 (예: --log-tier 2).")
+    parser.add_argument("--speed", type=_parse_speed, default=1.0, metavar="Nx",
+                        help="--log-tier / --pvp 로그 재생 배속 (예: --speed 4x, 기본값: 1x = 실시간, 0 = 대기 없음).")
+    parser.add_argument("--headless", action="store_true",
+                        help="--log-tier / --pvp 로그를 화면 갱신·대기 없이 줄 단위로만 출력 (파일 저장용).")
+    parser.add_argument("--fps", type=float, default=30.0, metavar="N",
+                        help="--log-tier / --pvp 실시간 화면 갱신 상한 (기본값: 30).")
+    parser.add_argument("--log-fights", type=int, default=1, metavar="N",
+                        help="--log-tier 에서 기록할 전투 수 (기본값: 1). 한 캐릭터의 연속 전투 — "
+                             "HP·스킬 쿨타임·EXP 가 이어지고 전투 사이에 레벨업 루프와 같은 휴식 규칙 적용.")
+    parser.add_argument("--pvp-matrix", action="store_true",
+                        help="Lv.1~--target-level 전 레벨 × 무기(티어·강화) 조합의 PvP 승률/TTK 매트릭스 (병렬).")
     parser.add_argument("--pvp", type=int, metavar="LEVEL",
                         help="PvP 시뮬레이션을 실행할 캐릭터 레벨 (예: --pvp 25).")
     parser.add_argument("--target-level", type=int, default=70,
                         help="레벨업 시뮬레이션 목표 레벨 (기본값: 70).")
     parser.add_argument("--difficulty", type=str, default="Normal",
-                        choices=list(DIFFICULTY_TABLE.keys()),
-                        help="난이도 (기본값: Normal).")
+                        help="난이도 — monster_difficulty.csv 의 이름 (기본값: Normal).")
     parser.add_argument("--exp-ver", type=str, default="v1", metavar="VERSION",
                         help="사용할 EXP 테이블 버전 (기본값: v1). 예: --exp-ver v2")
     parser.add_argument("--compare", action="store_true",
                         help="모든 EXP 버전을 동일 시드로 실행하여 비교. "
                              "--seed 미지정 시 seed=42 사용.")
+    parser.add_argument("--compare-runs", type=int, default=1, metavar="N",
+                        help="--compare 에서 버전마다 N개 시드(seed~seed+N-1)로 실행해 평균 ± 95%% CI (t 분포) 표시 (기본값: 1).")
+    parser.add_argument("--compare-by", type=str, default="version", choices=("version", "difficulty"),
+                        help="--compare 비교 축: version = EXP 버전들 (--difficulty 고정), "
+                             "difficulty = 난이도들 (--exp-ver 고정). 기본값: version.")
+    parser.add_argument("--compare-arms", type=str, default=None, metavar="A,B,..",
+                        help="--compare 비교 대상 버전/난이도 (쉼표 구분, 첫 항목이 기준). 기본값: 전부.")
+    parser.add_argument("--paired", type=_int_at_least(2), default=None, metavar="N",
+                        help="공통 난수 쌍 비교 (--compare 포함): 런 N개를 모든 조건에서 같은 용도별 "
+                             "난수열(그룹 크기·드랍·강화)로 실행해 런별 차이의 평균 ± 95%% CI 출력 "
+                             "(N ≥ 2, --seed = 마스터 시드, 기본 42).")
     parser.add_argument("--seed", type=int, default=None,
-                        help="랜덤 시드 고정 (기본값: 없음 = 매번 다른 결과).")
+                        help="랜덤 시드 고정 (기본값: 없음 = 매번 다른 결과). "
+                             "Monte Carlo 에서는 런별 난수열을 파생하는 마스터 시드.")
+    parser.add_argument("--replay", type=int, default=None, metavar="RUN",
+                        help="Monte Carlo 런 번호 RUN 을 전체 모드로 재실행 (--seed 에 그 실행의 "
+                             "마스터 시드 필요, 배치 엔진 실행은 제외).")
     parser.add_argument("--runs", type=int, default=1, metavar="N",
                         help="Monte Carlo 반복 횟수 (기본값: 1 = 단일 상세 출력).")
+    parser.add_argument("--chunk", type=_int_at_least(1), default=None, metavar="K",
+                        help="Monte Carlo 작업 단위 런 수 (기본값: 자동). 워커는 K회마다 부분 집계만 반환.")
+    parser.add_argument("--ci-width", type=float, default=None, metavar="H",
+                        help="Monte Carlo 평균 소요 시간 95%% CI 전체 폭이 H시간 이하가 되면 정지 "
+                             "(--runs 는 최대 횟수, 1 이면 무제한).")
+    parser.add_argument("--time-budget", type=float, default=None, metavar="SEC",
+                        help="Monte Carlo 를 SEC초 동안 실행 후 정지 (--ci-width 와 함께 쓰면 먼저 만족하는 쪽).")
+    parser.add_argument("--show-runs", type=int, default=0, metavar="N",
+                        help="Monte Carlo 표본 런 N개를 표로 출력 (기본값: 0 = 요약만).")
+    parser.add_argument("--batch", action="store_true",
+                        help="Monte Carlo 를 NumPy 배치 엔진(run_leveling_batch)으로 실행 (numpy 필요).")
+    parser.add_argument("--shm", action="store_true",
+                        help="Monte Carlo 워커가 런별 숫자 레코드를 공유 메모리 배열에 직접 기록 "
+                             "(결과 직렬화 없음, 부모는 벡터 집계). numpy·고정 --runs 필요.")
+    parser.add_argument("--archive", type=str, default=None, metavar="DIR",
+                        help="Monte Carlo 런별 결과를 DIR 에 열 단위 아카이브로 기록 (numpy 필요, 새 디렉터리).")
+    parser.add_argument("--query", type=str, default=None, metavar="DIR",
+                        help="--archive 로 저장한 아카이브 조회 (memmap). --where 로 최종 무기 조건 지정.")
+    parser.add_argument("--where", type=str, default=None, metavar="COND",
+                        help="--query 조건: 'tier=7,enhance=5,type=활' (생략 시 전체).")
+    parser.add_argument("--checkpoint", type=str, default=None, metavar="FILE",
+                        help="Monte Carlo 진행 상태를 FILE 에 주기적으로 저장 (Ctrl-C 시 항상 저장, "
+                             f"미지정 시 {_MC_CKPT_DEFAULT}).")
+    parser.add_argument("--checkpoint-every", type=float, default=60.0, metavar="SEC",
+                        help="--checkpoint 저장 주기 초 (기본값: 60).")
+    parser.add_argument("--resume", type=str, default=None, metavar="FILE",
+                        help="체크포인트 FILE 의 실행 조건으로 Monte Carlo 를 이어서 실행.")
+    parser.add_argument("--cache", type=str, nargs="?", const=_CACHE_DEFAULT_DIR, default=None,
+                        metavar="DIR",
+                        help="디스크 결과 캐시 사용 (기본 디렉터리: %(const)s). 키 = data/ 내용 해시 + "
+                             "실행 조건. 시드 고정 레벨업·--compare·고정 --runs Monte Carlo(--seed 지정)에 적용.")
+    parser.add_argument("--profile", action="store_true",
+                        help="단일 레벨업 실행을 계측해 전투/초·이벤트/초·단계별 시간 출력.")
+    parser.add_argument("--profile-out", type=str, default=None, metavar="FILE",
+                        help="계측 중 프로파일 저장: FILE.folded = folded-stack(flame graph), "
+                             "그 외 = cProfile pstats 덤프. --profile 을 함께 켬.")
+    parser.add_argument("--validate", type=int, default=None, metavar="N",
+                        help="고속 경로(캐시·해석 솔버·배치 엔진) vs 참조 엔진 동등성 검증 — 시드 N개 "
+                             "(--seed 부터, 기본 1). 단일 전투 정확 일치 + KS/카이제곱 분포 검정. "
+                             "종료 코드 0 합격 / 1 불합격 / 3 판정 불가 (분포 검정 과반이 표본 부족).")
+    parser.add_argument("--bench", action="store_true",
+                        help="벤치마크 스위트 실행 (_fight 티어×난이도, 레벨업 lite/full, _run_enhance, "
+                             "Monte Carlo strong/weak 스케일링). 중앙값·IQR 출력.")
+    parser.add_argument("--bench-out", type=str, default=None, metavar="FILE",
+                        help="--bench 결과를 JSON 기준선으로 저장.")
+    parser.add_argument("--bench-baseline", type=str, default=None, metavar="FILE",
+                        help="--bench 결과를 기준선 JSON 과 비교해 회귀 표시 (회귀가 있으면 종료 코드 1, 기준선을 읽을 수 없으면 2).")
+    parser.add_argument("--bench-threshold", type=float, default=10.0, metavar="PCT",
+                        help="회귀로 판정할 중앙값 증가율 %% (기본값: 10).")
+    parser.add_argument("--bench-filter", type=str, default=None, metavar="TEXT",
+                        help="이름에 TEXT 가 포함된 벤치마크만 실행 (예: fight/tier3, mc/).")
+    parser.add_argument("--rare", type=str, default=None, metavar="TIER:ENH",
+                        help="희귀 이벤트 'Tier TIER 무기가 +ENH 이상으로 장착 (--target-level 도달 전)' "
+                             "확률을 중요도 샘플링으로 추정 (예: --rare 7:9). --runs = 런 수 "
+                             f"(기본 {_RARE_DEFAULT_RUNS}), --seed = 마스터 시드.")
+    parser.add_argument("--is-boost", type=float, default=None, metavar="B",
+                        help="--rare 제안 분포 직접 지정: 대상 티어 사냥터 드랍률 배수 "
+                             "(--is-boost/--is-fail 모두 생략 시 교차 엔트로피로 자동 결정).")
+    parser.add_argument("--is-fail", type=float, default=None, metavar="F",
+                        help="--rare 제안 분포 직접 지정: 대상 티어 무기 강화 실패 확률 배수 (0~1].")
+    parser.add_argument("--exact", action="store_true",
+                        help="정확 해석 엔진: 무기 궤적을 고정하고 레벨별 전투 수 분포(마르코프 연쇄)와 "
+                             "합성곱으로 티어별 기대 시간 ± 표본 표준오차·p10/p50/p90 계산 (레벨별 전투 특성만 고정 시드 "
+                             "전투 표본에서 추정, numpy 필요).")
+    parser.add_argument("--weapons", type=str, default=None, metavar="SPEC",
+                        help="--exact 무기 궤적 '레벨:티어+강화,...' (예: 1:1+0,11:2+4,21:3+5). "
+                             "기본값: 각 티어 진입 레벨부터 그 티어 무기 +3.")
+    parser.add_argument("--no-fight-cache", action="store_true",
+                        help="전투 결과 캐시(FightCache) 비활성화 — 매 전투를 새로 계산.")
+    parser.add_argument("--no-analytic-fight", action="store_true",
+                        help="해석적 전투 솔버 비활성화 — 이벤트 힙 엔진(_fight)만 사용.")
     args = parser.parse_args()
-
-    if args.pvp:
-        simulate_pvp(level=args.pvp, difficulty=args.difficulty)
+    # 난이도는 파싱 후 검사 — --help 나 난이도와 무관한 경로가 CSV 를 읽지 않도록 (기본값은 검사 생략)
+    if args.difficulty != parser.get_default("difficulty"):
+        known = TABLES.get("difficulty")
+        if args.difficulty not in known:
+            parser.error(f"argument --difficulty: invalid choice: {args.difficulty!r} "
+                         f"(choose from {', '.join(known)})")
+    cache = ResultCache(args.cache) if args.cache else None
+
+    if args.resume:
+        code = resume_monte_carlo(args.resume, checkpoint_every=args.checkpoint_every)
+        if code:
+            sys.exit(code)   # 2: 입력 오류, 130: 중단 — 체크포인트 저장 후 128 + SIGINT
+    elif args.query:
+        query_archive(args.query, where=args.where)
+    elif args.validate:
+        sys.exit(simulate_validation(n=args.validate, target_level=args.target_level,
+                                     difficulty=args.difficulty, exp_version=args.exp_ver,
+                                     seed=args.seed if args.seed is not None else 1))
+    elif args.bench:
+        regressions = simulate_benchmark(out_path=args.bench_out,
+                                         baseline_path=args.bench_baseline,
+                                         threshold=args.bench_threshold,
+                                         name_filter=args.bench_filter)
+        sys.exit(2 if regressions < 0 else (1 if regressions else 0))
+    elif args.rare:
+        try:
+            rare_tier, rare_enh = (int(v) for v in args.rare.split(":"))
+        except ValueError:
+            print(f"  [오류] --rare 형식은 TIER:ENH 입니다 (예: 7:9): {args.rare}")
+            sys.exit(2)
+        simulate_rare_event(rare_tier, rare_enh,
+                            n=args.runs if args.runs > 1 else _RARE_DEFAULT_RUNS,
+                            target_level=args.target_level, difficulty=args.difficulty,
+                            exp_version=args.exp_ver, seed=args.seed,
+                            boost=args.is_boost, fail=args.is_fail)
+    elif args.exact:
+        try:
+            weapons = _parse_weapons(args.weapons) if args.weapons else None
+        except ValueError as e:
+            print(f"  [오류] --weapons 형식이 올바르지 않습니다: {args.weapons} ({e})")
+            sys.exit(2)
+        simulate_exact(target_level=args.target_level, difficulty=args.difficulty,
+                       exp_version=args.exp_ver, weapons=weapons)
+    elif args.pvp_matrix:
+        simulate_pvp_matrix(max_level=args.target_level)
+    elif args.pvp:
+        simulate_pvp(level=args.pvp, max_fps=args.fps,
+                     speed=args.speed, headless=args.headless)
     elif args.log_tier:
-        # ── 단일 전투 모드 ──────────────────────────────
-        tier = max(1, min(args.log_tier, max(MONSTER_TEMPLATES.keys())))
+        # ── 단일 전투 모드 (--log-fights N 이면 N회 반복) ──
+        tier = max(1, min(args.log_tier, max(TABLES.get("monster_templates", "v1").keys())))
         start_level = (tier - 1) * 10 + 1
-        count = 2 if random.random() < 0.4 else 3
-        player   = Character(level=start_level)
-        monsters = [Monster(tier=tier, index=i, difficulty=args.difficulty)
-                    for i in range(count)]
-
-        print(f"  [단일 전투] Tier{tier}  Lv.{start_level}  {count}마리  (난이도: {args.difficulty})")
-        print(f"  캐릭터 스탯  ATK={player.atk}  DEF={player.defe}"
-              f"  HP={player.max_hp}  MP={player.max_mp}")
-        print()
+        if args.seed is not None:
+            random.seed(args.seed)
+        # 여러 전투는 한 캐릭터의 연속 전투 — HP·스킬 쿨타임·EXP 가 이어지고 사이에 휴식 규칙 적용
+        player = Character(level=start_level)
+        now    = 0.0
+        for fight_no in range(1, args.log_fights + 1):
+            count = 2 if random.random() < 0.4 else 3
+            monsters = [Monster(tier=tier, index=i, difficulty=args.difficulty)
+                        for i in range(count)]
+
+            no_txt = f" #{fight_no}" if args.log_fights > 1 else ""
+            print(f"  [단일 전투{no_txt}] Tier{tier}  Lv.{player.level}  {count}마리  (난이도: {args.difficulty})"
+                  + (f"  /  누적 {now:.1f}초" if fight_no > 1 else ""))
+            print(f"  캐릭터 스탯  ATK={player.atk}  DEF={player.defe}"
+                  f"  HP={player.hp:.0f}/{player.max_hp}  MP={player.mp:.0f}/{player.max_mp}")
+            print()
 
-        victory, exp_gained, kills, combat_time = _fight_and_log(player, monsters)
+            victory, exp_gained, kills, combat_time = _fight_and_log(
+                player, monsters, sim_time=now, speed=args.speed, headless=args.headless,
+                max_fps=args.fps)
+            now += combat_time
+            if victory:
+                player.add_exp(exp_gained)
 
-        print()
-        print("=" * 60)
-        print("  [전투 결과]")
-        print(f"  결과        : {'승리' if victory else '패배'}")
-        print(f"  처치 수     : {kills} / {count} 마리")
-        print(f"  획득 EXP    : {exp_gained}")
-        print(f"  전투 시간   : {combat_time:.1f} 초")
-        print(f"  남은 HP     : {player.hp:.0f} / {player.max_hp}")
-        print("=" * 60)
-    elif args.compare:
-        # ── 버전 비교 모드 ───────────────────────────────
+            print()
+            print("=" * 60)
+            print("  [전투 결과]")
+            print(f"  결과        : {'승리' if victory else '패배'}")
+            print(f"  처치 수     : {kills} / {count} 마리")
+            print(f"  획득 EXP    : {exp_gained}")
+            print(f"  전투 시간   : {combat_time:.1f} 초")
+            print(f"  남은 HP     : {player.hp:.0f} / {player.max_hp}")
+            if fight_no < args.log_fights:
+                rest = _rest_after_fight(player, now)
+                now += rest
+                print(f"  휴식        : {rest:.0f} 초  (다음 전투 시작 HP {player.hp:.0f})")
+            print("=" * 60)
+    elif args.compare or args.paired:
+        # ── 버전 / 난이도 비교 모드 ──────────────────────
         compare_seed = args.seed if args.seed is not None else 42
         simulate_comparison(
             target_level=args.target_level,
             difficulty=args.difficulty,
             seed=compare_seed,
+            runs=args.paired or args.compare_runs,
+            cache=cache,
+            by=args.compare_by,
+            exp_version=args.exp_ver,
+            paired=args.paired is not None,
+            arms=args.compare_arms.split(",") if args.compare_arms else None,
         )
-    elif args.runs > 1:
+    elif args.runs > 1 or args.ci_width is not None or args.time_budget is not None:
         # ── Monte Carlo 시뮬레이션 ───────────────────────
-        simulate_monte_carlo(
-            n=args.runs,
+        sequential = args.ci_width is not None or args.time_budget is not None
+        interrupted = simulate_monte_carlo(
+            n=None if sequential and args.runs <= 1 else args.runs,
             target_level=args.target_level,
             difficulty=args.difficulty,
             exp_version=args.exp_ver,
+            batch=args.batch,
+            chunk=args.chunk,
+            show_runs=args.show_runs,
+            ci_width=args.ci_width,
+            time_budget=args.time_budget,
+            shm=args.shm,
+            archive=args.archive,
+            checkpoint=args.checkpoint,
+            checkpoint_every=args.checkpoint_every,
+            cache=cache,
+            seed=args.seed,
         )
+        if interrupted:
+            sys.exit(130)   # 중단 — 체크포인트 저장 후 128 + SIGINT
+    elif args.replay is not None and args.seed is None:
+        print("  [오류] --replay 에는 Monte Carlo 실행의 마스터 시드(--seed)가 필요합니다.")
+        sys.exit(2)
     else:
         # ── 단일 버전 레벨업 시뮬레이션 ─────────────────
         simulate_leveling(
@@ -1472,4 +5756,10 @@ if __name__ == "__main__":
             difficulty=args.difficulty,
             exp_version=args.exp_ver,
             seed=args.seed,
+            use_fight_cache=not args.no_fight_cache,
+            analytic_fight=not args.no_analytic_fight,
+            profile=args.profile,
+            profile_out=args.profile_out,
+            cache=cache,
+            replay=args.replay,
         )